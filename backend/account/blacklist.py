@@ -0,0 +1,157 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from config.redis import publish, subscribe
+
+# Redis channel the JTIs of newly blacklisted tokens are published on
+BLACKLIST_CHANNEL = "auth:blacklist"
+
+
+class BlacklistFilter:
+    """
+    Bloom filter of blacklisted token JTIs. Membership tests can return false
+    positives but never false negatives.
+    """
+
+    def __init__(self, bits, hashes):
+        self.bits = bits
+        self.hashes = hashes
+        self.array = bytearray((bits + 7) // 8)
+
+    def _positions(self, jti):
+        digest = hashlib.sha256(jti.encode()).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, jti):
+        for position in self._positions(jti):
+            self.array[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, jti):
+        return all(
+            self.array[position >> 3] & (1 << (position & 7))
+            for position in self._positions(jti)
+        )
+
+
+_filter = None
+_loaded_at = 0.0
+# JTIs added since the filter was last built, replayed into the next one so
+# blacklistings that happen while it is being built are not lost
+_added = []
+_lock = threading.Lock()
+# Held by the thread rebuilding the filter
+_rebuild_lock = threading.Lock()
+
+
+def load_blacklist_filter():
+    """
+    Build a filter of the JTIs of every blacklisted token that has not
+    expired yet.
+    """
+    blacklist = BlacklistFilter(
+        settings.JWT_BLACKLIST_BLOOM_BITS, settings.JWT_BLACKLIST_BLOOM_HASHES
+    )
+    jtis = BlacklistedToken.objects.filter(token__expires_at__gt=now()).values_list(
+        "token__jti", flat=True
+    )
+    for jti in jtis.iterator():
+        blacklist.add(jti)
+    return blacklist
+
+
+def _is_stale(blacklist):
+    return (
+        blacklist is None
+        or time.monotonic() - _loaded_at > settings.JWT_BLACKLIST_SYNC_SECONDS
+    )
+
+
+def get_blacklist_filter():
+    """
+    Return the blacklist filter, building it on first use and rebuilding it
+    every ``JWT_BLACKLIST_SYNC_SECONDS`` so tokens blacklisted without a
+    broadcast are picked up and expired ones drop out.
+
+    Only one thread rebuilds the filter at a time. The others keep using the
+    current filter meanwhile, or wait for it if there is none yet.
+    """
+    global _filter, _loaded_at, _added
+    blacklist = _filter
+    if not _is_stale(blacklist):
+        return blacklist
+    if not _rebuild_lock.acquire(blocking=blacklist is None):
+        return blacklist
+
+    try:
+        blacklist = _filter
+        if not _is_stale(blacklist):
+            # Built by another thread while this one waited
+            return blacklist
+
+        if settings.JWT_BLACKLIST_BROADCAST:
+            subscribe(BLACKLIST_CHANNEL, _handle_blacklisted)
+
+        blacklist = load_blacklist_filter()
+        with _lock:
+            for jti in _added:
+                blacklist.add(jti)
+            _added = []
+            _filter = blacklist
+            _loaded_at = time.monotonic()
+        return blacklist
+    finally:
+        _rebuild_lock.release()
+
+
+def add_to_blacklist_filter(jti):
+    """
+    Add a JTI to this process's filter.
+    """
+    with _lock:
+        _added.append(jti)
+        if _filter is not None:
+            _filter.add(jti)
+
+
+def clear_blacklist_filter():
+    """
+    Drop this process's filter, so it is rebuilt on next use.
+    """
+    global _filter, _added
+    with _lock:
+        _filter = None
+        _added = []
+
+
+def _handle_blacklisted(jti):
+    add_to_blacklist_filter(jti.decode())
+
+
+class BloomRefreshToken(RefreshToken):
+    """
+    Refresh token whose blacklist check only queries the database for JTIs
+    the in-memory filter reports as possibly blacklisted, so valid tokens are
+    checked without a query.
+    """
+
+    def check_blacklist(self):
+        if self.payload[api_settings.JTI_CLAIM] in get_blacklist_filter():
+            super().check_blacklist()
+
+    def blacklist(self):
+        result = super().blacklist()
+        jti = self.payload[api_settings.JTI_CLAIM]
+        add_to_blacklist_filter(jti)
+        if settings.JWT_BLACKLIST_BROADCAST:
+            transaction.on_commit(lambda: publish(BLACKLIST_CHANNEL, jti))
+        return result
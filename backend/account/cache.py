@@ -0,0 +1,40 @@
+import threading
+from collections import OrderedDict
+
+# Returned by LRUCache.get for missing keys, as None can be a cached value
+MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe mapping that keeps at most ``maxsize`` entries, evicting the
+    least recently used.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key, MISSING)
+            if value is not MISSING:
+                self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
@@ -1,15 +1,23 @@
+from anymail.backends.base import AnymailBaseBackend
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.utils.timezone import now
 
-from account.models import OneTimePassword
-from experiment.process import generate_active_experiments_report
+from account.metrics import track_send
+from account.otp import get_otp_backend
+from account.rendering import context_digest, render_email
+from experiment.process import (
+    REPORT_COLUMNS,
+    build_active_experiments_report,
+    format_variation_row,
+)
+
+# Most recipients Anymail sends in one batch call (Postmark's limit)
+BATCH_SIZE = 500
 
 
 class Email:
-    def __init__(self, subject: str, to: list, template="default"):
+    def __init__(self, subject: str, to: list, template="default", cache=True):
         self.subject = subject
         self.to = to
         self.from_email = settings.DEFAULT_FROM_EMAIL
@@ -19,9 +27,9 @@ class Email:
             "content_list": [],
         }
         self.template = template
-
-    def _get_template(self):
-        return f"email/{self.template}.html"
+        # Whether the rendered email may be cached. Off for emails carrying
+        # one-time tokens, which are never rendered again.
+        self.cache = cache
 
     def add_context(self, key, value):
         self.context[key] = value
@@ -64,30 +72,95 @@ class Email:
     def add_space(self):
         self.context["content_list"].append({"type": "space"})
 
-    def send(self):
+    def render(self):
+        """
+        Render the email.
+
+        Returns:
+            tuple: The plain text and HTML bodies.
+        """
         if not self.context["content_list"]:
             raise ValueError("No content to send.")
 
-        html_content = render_to_string(self._get_template(), self.context)
-        text_content = strip_tags(html_content)
+        return render_email(self.template, self.context, cache=self.cache)
+
+    def message(self, to=None, rendered=None):
+        """
+        Build the message for ``to`` (default: the email's recipients), from
+        already ``rendered`` bodies if given.
+        """
+        text_content, html_content = rendered or self.render()
         email = EmailMultiAlternatives(
             subject=self.subject,
             body=text_content,
             from_email=self.from_email,
-            to=self.to,
+            to=to or self.to,
         )
         email.attach_alternative(html_content, "text/html")
-        email.send()
-
+        return email
 
-def verification_email(user):
-    otp = OneTimePassword.objects.create(user=user, token_length=6)
-    email = Email(subject="Verify your email", to=[user.email], template="default")
+    def send(self):
+        message = self.message()
+        track_send(message.send)
+
+
+def send_batch(emails):
+    """
+    Send many emails over a single backend connection. Emails with the same
+    template and content are rendered once.
+
+    Returns:
+        int: The number of messages sent.
+    """
+    rendered = {}
+    messages = []
+    for email in emails:
+        key = (email.template, context_digest(email.context))
+        if key not in rendered:
+            rendered[key] = email.render()
+        messages.append(email.message(rendered=rendered[key]))
+    with get_connection() as connection:
+        return track_send(lambda: connection.send_messages(messages)) or 0
+
+
+def send_broadcast(email, recipients):
+    """
+    Send a separate copy of ``email`` to each recipient, rendering it once
+    and sending over a single backend connection.
+
+    With an Anymail backend, recipients are sent ``BATCH_SIZE`` at a time as
+    one batch send (Postmark's batch API), where each recipient gets their
+    own message. Other backends get one message per recipient.
+
+    Returns:
+        int: The number of API calls or messages sent.
+    """
+    rendered = email.render()
+    with get_connection() as connection:
+        if isinstance(connection, AnymailBaseBackend):
+            messages = []
+            for start in range(0, len(recipients), BATCH_SIZE):
+                end = start + BATCH_SIZE
+                message = email.message(to=recipients[start:end], rendered=rendered)
+                # Any merge_data makes Anymail send to each recipient separately
+                message.merge_data = {}
+                messages.append(message)
+        else:
+            messages = [
+                email.message(to=[recipient], rendered=rendered)
+                for recipient in recipients
+            ]
+        return track_send(lambda: connection.send_messages(messages)) or 0
+
+
+def verification_email(user, new_user=False):
+    token = get_otp_backend().create(user, token_length=6, replace=not new_user)
+    email = Email(
+        subject="Verify your email", to=[user.email], template="default", cache=False
+    )
     email.add_paragraph(user.salutation())
     email.add_paragraph("Please click the button below to verify your email address.")
-    email.add_button(
-        "Verify Email", f"{settings.FRONTEND_URL}/verify?token={otp.token}"
-    )
+    email.add_button("Verify Email", f"{settings.FRONTEND_URL}/verify?token={token}")
     email.add_paragraph(
         "If you did not create an account, no further action is required."
     )
@@ -96,13 +169,18 @@ def verification_email(user):
 
 
 def initiate_password_reset_email(user):
-    otp = OneTimePassword.objects.create(user=user, token_length=6)
-    email = Email(subject="Reset your password", to=[user.email], template="default")
+    token = get_otp_backend().create(user, token_length=6)
+    email = Email(
+        subject="Reset your password",
+        to=[user.email],
+        template="default",
+        cache=False,
+    )
     email.add_paragraph(user.salutation())
     email.add_paragraph("Please click the button below to reset your password.")
     email.add_button(
         "Reset Password",
-        f"{settings.FRONTEND_URL}/password/confirm?token={otp.token}",
+        f"{settings.FRONTEND_URL}/password/confirm?token={token}",
     )
     email.add_paragraph(
         "If you did not request a password reset, no further action is required."
@@ -128,44 +206,30 @@ def password_changed_email(user):
 
 
 def experiment_report_email():
-    report = generate_active_experiments_report()
+    reports = build_active_experiments_report()
     email = Email(
         subject="Active Experiments Report",
         to=[settings.OWNER_EMAIL],
         template="default",
     )
-    lines = report.splitlines()[1:]  # Skip the header
-    table_headers = None
-    table_data = []
-
-    for i, line in enumerate(lines):
-        if line.startswith("Experiment:"):
-            # Add the previous table if it exists before starting a new experiment
-            if table_headers and table_data:
-                email.add_table(table_headers, table_data)
-                email.add_space()
-                table_headers = None
-                table_data = []
-
-            # Add the experiment section header
-            email.add_section_header(line)
-        elif line.startswith("Description:"):
-            email.add_paragraph(line.replace("Description: ", ""))
-        elif line.startswith("Created at:"):
-            email.add_paragraph(line)
-        elif line.startswith("Variations:"):
-            email.add_divider()
-            email.add_section_subheader(line)
-        elif "Name,Weight,Views,Conversion Rate" in line:
-            # Capture the header row for stats
-            table_headers = line.split(",")
-        elif table_headers:
-            # The next line should be the stats data
-            stats = line.split(",")
-            table_data.append(stats)
-
-    # If there was a table pending, add it to the email
-    if table_headers and table_data:
-        email.add_table(table_headers, table_data)
+    headers = list(REPORT_COLUMNS)
+
+    for index, experiment in enumerate(reports):
+        if index and reports[index - 1].variations:
+            email.add_space()
+
+        email.add_section_header(f"Experiment: {experiment.name}")
+        email.add_paragraph(experiment.description)
+        email.add_paragraph(f"Created at: {experiment.created_at}")
+        email.add_divider()
+        email.add_section_subheader("Variations:")
+        if experiment.variations:
+            email.add_table(
+                headers,
+                [
+                    format_variation_row(variation)
+                    for variation in experiment.variations
+                ],
+            )
 
     return email
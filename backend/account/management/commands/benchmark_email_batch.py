@@ -0,0 +1,48 @@
+import time
+
+from django.core import mail
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from account.emails import Email, send_batch, send_broadcast
+
+
+def make_email(to):
+    email = Email(subject="Product update", to=to)
+    email.add_section_header("What's new")
+    email.add_paragraph("We shipped a few things you asked for.")
+    email.add_unordered_list(["Faster reports", "Bulk export", "Dark mode"])
+    email.add_button("Read more", "https://example.com/changelog")
+    return email
+
+
+class Command(BaseCommand):
+    help = (
+        "Send the same email to many recipients through the locmem backend "
+        "one Email.send() at a time, with send_batch and with send_broadcast, "
+        "and report throughput."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        recipients = [f"user{i}@example.com" for i in range(options["messages"])]
+        runs = {
+            "send": lambda: [make_email([to]).send() for to in recipients],
+            "send_batch": lambda: send_batch([make_email([to]) for to in recipients]),
+            "send_broadcast": lambda: send_broadcast(make_email([]), recipients),
+        }
+
+        with override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend"
+        ):
+            for name, run in runs.items():
+                mail.outbox = []
+                start = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f"{name}: {len(mail.outbox)} messages in {elapsed:.2f}s "
+                    f"({len(mail.outbox) / elapsed:,.0f} messages/s)"
+                )
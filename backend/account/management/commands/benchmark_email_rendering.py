@@ -0,0 +1,88 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.utils.html import strip_tags
+
+from account.emails import Email
+from account.rendering import _render_email, email_cache, render_email
+from account.templatetags.email_tags import fragment_cache
+
+# The content_list loop templates used before render_email, for comparison
+LEGACY_TEMPLATE = """{% extends 'email/base.html' %}
+{% load email_tags %}
+{% block title %}{{ title }}{% endblock %}
+{% block header %}{{ title }}{% endblock %}
+{% block content %}
+  {% for item in content_list %}
+    {% if item.type == 'paragraph' %}{% paragraph item.text %}
+    {% elif item.type == 'section_header' %}{% section_header item.text %}
+    {% elif item.type == 'section_subheader' %}{% section_subheader item.text %}
+    {% elif item.type == 'divider' %}{% divider %}
+    {% elif item.type == 'bold_text' %}{% bold_text item.text %}
+    {% elif item.type == 'button' and item.url %}{% cta_button item.url item.text %}
+    {% elif item.type == 'unordered_list'%}{% unordered_list item.items %}
+    {% elif item.type == 'ordered_list' %}{% ordered_list item.items %}
+    {% elif item.type == 'table' %}{% table item.headers item.rows %}
+    {% elif item.type == 'space' %}{% space %}
+    {% endif %}
+  {% endfor %}
+{% endblock %}"""
+
+
+def make_email():
+    email = Email(subject="Active Experiments Report", to=["owner@example.com"])
+    for index in range(5):
+        email.add_section_header(f"Experiment: checkout-{index}")
+        email.add_paragraph("Testing the new checkout flow against the old one.")
+        email.add_divider()
+        email.add_section_subheader("Variations:")
+        email.add_table(
+            ["Variation", "Views", "Conversions"],
+            [["control", 1200, 48], ["new-flow", 1180, 61]],
+        )
+        email.add_space()
+    email.add_button("Open dashboard", "https://example.com/experiments")
+    return email
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rendering an email through the content_list template loop "
+        "plus strip_tags against render_email, with and without its caches, "
+        "and report renders per second."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--renders", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        context = make_email().context
+        legacy = engines["django"].from_string(LEGACY_TEMPLATE)
+
+        def render_legacy():
+            html = legacy.render(context)
+            return strip_tags(html), html
+
+        def render_uncached():
+            email_cache.clear()
+            fragment_cache.clear()
+            return render_email("default", context)
+
+        for name, render in [
+            ("template loop + strip_tags", render_legacy),
+            ("render_email, caches cleared", render_uncached),
+            (
+                "render_email, fragments cached",
+                lambda: _render_email("default", context),
+            ),
+            ("render_email, memoized", lambda: render_email("default", context)),
+        ]:
+            start = time.perf_counter()
+            for _ in range(options["renders"]):
+                render()
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"{name}: {options['renders'] / elapsed:,.0f} renders/s "
+                f"({elapsed / options['renders'] * 1000:.2f}ms each)"
+            )
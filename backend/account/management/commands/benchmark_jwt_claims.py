@@ -0,0 +1,63 @@
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.claims import add_user_claims
+from api.serializers import RegisterUserSerializer
+
+
+def serializer_claims(token, user):
+    """
+    Claims as they were built before JWT_USER_CLAIMS: every readable field
+    of RegisterUserSerializer.
+    """
+    for key, value in RegisterUserSerializer(user).data.items():
+        if key != "id":
+            token[key] = value
+    return token
+
+
+BUILDERS = {
+    "serializer": serializer_claims,
+    "claims": add_user_claims,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare building JWTs from a RegisterUserSerializer dump against the "
+        "JWT_USER_CLAIMS builder: token size, Authorization header bytes and "
+        "build time. Uses an unsaved user, so nothing touches the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tokens", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        user = get_user_model()(
+            id=uuid.uuid4(),
+            username="gytha",
+            email="gytha@lancre.gov",
+            first_name="Gytha",
+            last_name="Ogg",
+            payment_method_id="pm_1PgFhX2eZvKYlo2C6J0q3p7A",
+        )
+        for name, build in BUILDERS.items():
+            start = time.perf_counter()
+            for _ in range(options["tokens"]):
+                token = AccessToken()
+                token["id"] = str(user.id)
+                encoded = str(build(token, user))
+            elapsed = time.perf_counter() - start
+
+            header = f"Authorization: Bearer {encoded}"
+            claims = sorted(set(token.payload) - {"exp", "iat", "jti", "token_type"})
+            self.stdout.write(
+                f"{name}: token={len(encoded)} bytes "
+                f"header={len(header)} bytes "
+                f"build={elapsed / options['tokens'] * 1e6:.1f}us/token "
+                f"claims={','.join(claims)}"
+            )
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from rest_framework_simplejwt.token_blacklist.models import (
@@ -5,32 +6,68 @@ from rest_framework_simplejwt.token_blacklist.models import (
     OutstandingToken,
 )
 
+from worker.utils import chunked_delete
+
 
 class Command(BaseCommand):
-    help = "Delete expired tokens from the blacklist and outstanding tokens"
+    help = (
+        "Delete expired tokens from the blacklist and outstanding tokens, in "
+        "primary key ordered batches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.CLEANUP_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=settings.CLEANUP_BATCH_SLEEP_SECONDS,
+            help="Seconds to pause between batches",
+        )
+        parser.add_argument(
+            "--start-after",
+            type=int,
+            help="Resume the outstanding tokens pass after this id",
+        )
 
     def handle(self, *args, **options):
         now = timezone.now()
 
         # Delete expired blacklisted tokens
-        expired_blacklisted_tokens = BlacklistedToken.objects.filter(
-            token__expires_at__lt=now
+        blacklisted = chunked_delete(
+            BlacklistedToken.objects.filter(token__expires_at__lt=now),
+            options["batch_size"],
+            options["sleep"],
+            progress=self.report("blacklisted tokens"),
         )
-        blacklisted_count = expired_blacklisted_tokens.count()
-        expired_blacklisted_tokens.delete()
 
         # Delete expired outstanding tokens
-        expired_outstanding_tokens = OutstandingToken.objects.filter(expires_at__lt=now)
-        outstanding_count = expired_outstanding_tokens.count()
-        expired_outstanding_tokens.delete()
+        outstanding = chunked_delete(
+            OutstandingToken.objects.filter(expires_at__lt=now),
+            options["batch_size"],
+            options["sleep"],
+            start_after=options["start_after"],
+            progress=self.report("outstanding tokens"),
+        )
 
         self.stdout.write(
             self.style.SUCCESS(
-                f"Successfully deleted {blacklisted_count} expired blacklisted tokens."
+                f"Successfully deleted {blacklisted.deleted} expired blacklisted tokens."
             )
         )
         self.stdout.write(
             self.style.SUCCESS(
-                f"Successfully deleted {outstanding_count} expired outstanding tokens."
+                f"Successfully deleted {outstanding.deleted} expired outstanding tokens."
             )
         )
+
+    def report(self, name):
+        def progress(state):
+            self.stdout.write(
+                f"{name}: deleted {state.deleted} in {state.batches} batches, "
+                f"{state.deleted / max(state.elapsed, 1e-9):,.0f} rows/s, "
+                f"last id {state.last_pk}"
+            )
+
+        return progress
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from account.partitions import (
+    PartitioningError,
+    create_partitions,
+    drop_expired_partitions,
+    is_partitioned,
+    partition_otp_table,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Manage the daily expiry partitions of the OTP table (PostgreSQL "
+        "only): convert the existing table, pre-create future partitions and "
+        "drop expired ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "action",
+            choices=["convert", "create", "drop-expired"],
+            help=(
+                "convert: partition the existing table and copy its active OTPs. "
+                "create: pre-create partitions for the coming days. "
+                "drop-expired: drop partitions whose OTPs have all expired."
+            ),
+        )
+        parser.add_argument(
+            "--days-ahead",
+            type=int,
+            default=settings.OTP_PARTITION_DAYS_AHEAD,
+            help="Number of future days to create partitions for",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options["action"] == "convert":
+                copied = partition_otp_table(options["days_ahead"])
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Partitioned the OTP table and copied {copied} active OTPs."
+                    )
+                )
+                return
+
+            if not is_partitioned():
+                raise PartitioningError(
+                    "The OTP table is not partitioned. Run 'otp_partitions convert' first."
+                )
+            if options["action"] == "create":
+                names = create_partitions(options["days_ahead"])
+                verb = "Created"
+            else:
+                names = drop_expired_partitions()
+                verb = "Dropped"
+        except PartitioningError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {len(names)} partitions{': ' if names else '.'}{', '.join(names)}"
+            )
+        )
@@ -0,0 +1,130 @@
+import time
+from contextlib import contextmanager
+
+import redis
+from django.conf import settings
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import REGISTRY, GaugeMetricFamily
+
+from config.logger import logger
+
+# Email providers answer in tens to hundreds of milliseconds, batch calls in
+# seconds
+SEND_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+RENDER_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+# Seconds to wait for the broker when reading queue depths, so an unreachable
+# broker fails the scrape quickly instead of hanging it
+BROKER_TIMEOUT = 1
+
+EMAIL_RENDER_SECONDS = Histogram(
+    "email_render_seconds",
+    "Time spent rendering an email",
+    ["template"],
+    buckets=RENDER_BUCKETS,
+)
+EMAIL_RENDER_CACHE_HITS = Counter(
+    "email_render_cache_hits",
+    "Emails served from the render cache instead of being rendered",
+    ["template"],
+)
+EMAIL_SEND_SECONDS = Histogram(
+    "email_send_seconds",
+    "Time spent handing messages to the email provider, per call",
+    ["provider"],
+    buckets=SEND_BUCKETS,
+)
+EMAIL_MESSAGES_SENT = Counter(
+    "email_messages_sent",
+    "Messages accepted by the email provider (an Anymail batch send counts once)",
+    ["provider"],
+)
+EMAIL_SEND_FAILURES = Counter(
+    "email_send_failures",
+    "Failed calls to the email provider, by provider error code",
+    ["provider", "error_code"],
+)
+
+
+def email_provider():
+    """
+    Short name of the configured email backend, e.g. ``postmark`` or
+    ``smtp``.
+    """
+    return settings.EMAIL_BACKEND.rsplit(".", 2)[-2]
+
+
+def error_code(error):
+    """
+    The provider's error code for a failed send: Postmark's ``ErrorCode``,
+    else the HTTP status, else the exception class name.
+    """
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            return str(response.json()["ErrorCode"])
+        except (ValueError, KeyError, TypeError):
+            pass
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return str(status_code)
+    return type(error).__name__
+
+
+@contextmanager
+def track_render(template):
+    start = time.perf_counter()
+    yield
+    EMAIL_RENDER_SECONDS.labels(template).observe(time.perf_counter() - start)
+
+
+def track_send(send):
+    """
+    Call ``send`` and record its latency, the messages it reports sent and
+    any failure.
+    """
+    provider = email_provider()
+    start = time.perf_counter()
+    try:
+        sent = send()
+    except Exception as e:
+        EMAIL_SEND_FAILURES.labels(provider, error_code(e)).inc()
+        raise
+    finally:
+        EMAIL_SEND_SECONDS.labels(provider).observe(time.perf_counter() - start)
+    EMAIL_MESSAGES_SENT.labels(provider).inc(sent or 0)
+    return sent
+
+
+class CeleryQueueCollector:
+    """
+    Report the number of tasks waiting in each of ``METRICS_CELERY_QUEUES``,
+    read from the Redis broker at scrape time.
+    """
+
+    def describe(self):
+        # Without describe(), registering calls collect() to learn the metric
+        # names, which would read the broker on import
+        return []
+
+    def collect(self):
+        if not settings.CELERY_BROKER_URL.startswith(("redis://", "rediss://")):
+            return
+        depth = GaugeMetricFamily(
+            "celery_queue_depth", "Tasks waiting in a Celery queue", labels=["queue"]
+        )
+        try:
+            client = redis.Redis.from_url(
+                settings.CELERY_BROKER_URL,
+                socket_timeout=BROKER_TIMEOUT,
+                socket_connect_timeout=BROKER_TIMEOUT,
+            )
+            for queue in settings.METRICS_CELERY_QUEUES:
+                depth.add_metric([queue], client.llen(queue))
+        except redis.RedisError as e:
+            logger.warning(f"Could not read Celery queue depth: {e}")
+            return
+        yield depth
+
+
+CELERY_QUEUE_COLLECTOR = CeleryQueueCollector()
+REGISTRY.register(CELERY_QUEUE_COLLECTOR)
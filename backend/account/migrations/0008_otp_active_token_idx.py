@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-17 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("account", "0007_nullable_payment_method"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="onetimepassword",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["token"],
+                name="otp_active_token_idx",
+            ),
+        ),
+    ]
@@ -3,7 +3,7 @@ from datetime import timedelta
 
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import connection, models
 from django.utils.crypto import get_random_string
 from django.utils.timezone import now
 
@@ -45,16 +45,23 @@ class OneTimePassword(models.Model):
         db_table = "otp"
         verbose_name = "One-Time Password"
         verbose_name_plural = "One-Time Passwords"
+        indexes = [
+            # Only active tokens can be redeemed, so consume() searches a
+            # small index that redeemed and replaced tokens drop out of
+            models.Index(
+                fields=["token"],
+                condition=models.Q(is_active=True),
+                name="otp_active_token_idx",
+            ),
+        ]
 
-    def save(self, *args, **kwargs):
-        # Users should only have one token at a time
-        if OneTimePassword.objects.filter(user=self.user, is_active=True).exists():
-            if self.pk:
-                OneTimePassword.objects.filter(user=self.user).exclude(
-                    id=self.id
-                ).update(is_active=False)
-            else:
-                OneTimePassword.objects.filter(user=self.user).update(is_active=False)
+    def save(self, *args, replace=True, **kwargs):
+        # Users should only have one token at a time. Callers that know the
+        # user has no tokens yet, like sign-up, pass replace=False to skip it.
+        if replace:
+            OneTimePassword.objects.filter(user=self.user, is_active=True).exclude(
+                id=self.id
+            ).update(is_active=False)
 
         if not self.token:
             self.token = get_random_string(
@@ -69,6 +76,38 @@ class OneTimePassword(models.Model):
 
         super().save(*args, **kwargs)
 
+    @classmethod
+    def consume(cls, token):
+        """
+        Redeem an OTP: deactivate it if it is active and unexpired, in a
+        single ``UPDATE ... RETURNING`` statement.
+
+        Only one of several concurrent requests with the same token can match
+        the row while it is still active, so a double-click cannot redeem it
+        twice.
+
+        Returns:
+            The id of the OTP's user, or None if the token is unknown,
+            already used or expired.
+        """
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {qn(cls._meta.db_table)} SET {qn('is_active')} = %s "
+                f"WHERE {qn('token')} = %s AND {qn('is_active')} = %s "
+                f"AND {qn('expires')} >= %s RETURNING {qn('user_id')}",
+                [
+                    False,
+                    token,
+                    True,
+                    connection.ops.adapt_datetimefield_value(now()),
+                ],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        return cls._meta.get_field("user").to_python(row[0])
+
     def is_valid(self):
         """
         Check if the OTP is still valid. Deactivates the OTP no matter the result.
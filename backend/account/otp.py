@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.crypto import get_random_string
+from django.utils.module_loading import import_string
+
+from account.models import OneTimePassword
+from config.redis import get_redis
+
+# User id of an active token
+TOKEN_KEY = "otp:token:{token}"
+# Active token of a user
+USER_KEY = "otp:user:{user_id}"
+
+
+def get_otp_backend():
+    """
+    Return an instance of the OTP backend configured by ``settings.OTP_BACKEND``.
+    """
+    return import_string(settings.OTP_BACKEND)()
+
+
+class DatabaseOTPBackend:
+    """
+    Store OTPs as ``OneTimePassword`` rows.
+    """
+
+    def create(self, user, token_length=6, replace=True):
+        """
+        Issue a new token for ``user``, deactivating their previous one unless
+        ``replace`` is False because they cannot have one yet.
+
+        Returns:
+            str: The token.
+        """
+        otp = OneTimePassword(user=user, token_length=token_length)
+        otp.save(force_insert=True, replace=replace)
+        return otp.token
+
+    def consume(self, token):
+        """
+        Redeem a token.
+
+        Returns:
+            The id of the token's user, or None if the token is unknown,
+            already used or expired.
+        """
+        return OneTimePassword.consume(token)
+
+
+class RedisOTPBackend:
+    """
+    Store OTPs in Redis, where they expire through native TTLs instead of
+    being swept from the database.
+
+    Each token is a key holding its user's id, and each user has a pointer
+    to their active token, so issuing a new token deletes the previous one.
+    """
+
+    def create(self, user, token_length=6, replace=True):
+        client = get_redis()
+        ttl = timedelta(minutes=int(settings.OTP_EXPIRATION_MINUTES))
+        user_id = str(user.pk)
+
+        while True:
+            token = get_random_string(length=token_length)
+            if client.set(TOKEN_KEY.format(token=token), user_id, ex=ttl, nx=True):
+                break
+
+        previous = client.set(
+            USER_KEY.format(user_id=user_id), token, ex=ttl, get=replace
+        )
+        if replace and previous is not None:
+            client.delete(TOKEN_KEY.format(token=previous.decode()))
+        return token
+
+    def consume(self, token):
+        user_id = get_redis().getdel(TOKEN_KEY.format(token=token))
+        if user_id is None:
+            return None
+        return get_user_model()._meta.pk.to_python(user_id.decode())
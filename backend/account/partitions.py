@@ -0,0 +1,193 @@
+from datetime import datetime, time, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.utils.timezone import now
+
+from account.models import OneTimePassword
+from config.logger import logger
+
+# Daily partitions are named after the day whose expiry times they hold,
+# e.g. otp_p20240131
+PARTITION_PREFIX = "{table}_p"
+PARTITION_DAY_FORMAT = "%Y%m%d"
+DEFAULT_PARTITION = "{table}_default"
+
+
+class PartitioningError(Exception):
+    pass
+
+
+def _table():
+    return OneTimePassword._meta.db_table
+
+
+def _check_postgres():
+    if connection.vendor != "postgresql":
+        raise PartitioningError(
+            f"Partitioning is only supported on PostgreSQL, not {connection.vendor}."
+        )
+
+
+def partition_name(day):
+    return PARTITION_PREFIX.format(table=_table()) + day.strftime(PARTITION_DAY_FORMAT)
+
+
+def partition_bounds(day):
+    """
+    Return the UTC ``[start, end)`` range of expiry times of a day's partition.
+    """
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def is_partitioned():
+    """
+    Return True if the OTP table is a partitioned PostgreSQL table.
+    """
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [_table()],
+        )
+        return cursor.fetchone() is not None
+
+
+def create_partitions(days_ahead, cursor=None):
+    """
+    Create the daily partitions of the OTP table from yesterday until
+    ``days_ahead`` days from today, skipping existing ones.
+
+    Returns:
+        list: The names of the partitions created.
+    """
+    if cursor is None:
+        with connection.cursor() as cursor:
+            return create_partitions(days_ahead, cursor)
+
+    qn = connection.ops.quote_name
+    today = now().astimezone(timezone.utc).date()
+    existing = set(connection.introspection.table_names(cursor))
+    created = []
+    for offset in range(-1, days_ahead + 1):
+        day = today + timedelta(days=offset)
+        name = partition_name(day)
+        if name in existing:
+            continue
+        start, end = partition_bounds(day)
+        cursor.execute(
+            f"CREATE TABLE {qn(name)} PARTITION OF {qn(_table())} "
+            "FOR VALUES FROM (%s) TO (%s)",
+            [start, end],
+        )
+        created.append(name)
+    return created
+
+
+def drop_expired_partitions():
+    """
+    Drop the daily partitions of the OTP table whose expiry range has fully
+    passed, which removes their expired tokens without deleting rows.
+
+    Returns:
+        list: The names of the partitions dropped.
+    """
+    _check_postgres()
+    qn = connection.ops.quote_name
+    cutoff = now()
+    dropped = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = %s",
+            [_table()],
+        )
+        prefix = PARTITION_PREFIX.format(table=_table())
+        for (name,) in cursor.fetchall():
+            if not name.startswith(prefix):
+                # The default partition
+                continue
+            day = datetime.strptime(
+                name.removeprefix(prefix), PARTITION_DAY_FORMAT
+            ).date()
+            if partition_bounds(day)[1] <= cutoff:
+                cursor.execute(f"DROP TABLE {qn(name)}")
+                dropped.append(name)
+    return dropped
+
+
+def partition_otp_table(days_ahead):
+    """
+    Convert the OTP table into a table partitioned by expiry date, with one
+    partition per day and a default partition for anything out of range.
+
+    The existing table is renamed and locked while its active, unexpired
+    tokens are copied over, then dropped. Expired and used tokens are not
+    copied.
+
+    PostgreSQL requires unique constraints of a partitioned table to include
+    the partition key, so the primary key becomes ``(id, expires)`` and
+    tokens are only unique per expiry time. Random tokens make a clash
+    vanishingly rare.
+
+    Raises:
+        PartitioningError: If the database is not PostgreSQL or the table is
+            already partitioned.
+    """
+    _check_postgres()
+    if is_partitioned():
+        raise PartitioningError(f"Table '{_table()}' is already partitioned.")
+
+    qn = connection.ops.quote_name
+    table = _table()
+    legacy = f"{table}_unpartitioned"
+    user_table = get_user_model()._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {qn(table)} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}")
+        cursor.execute(
+            f"CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (expires)"
+        )
+        create_partitions(days_ahead, cursor)
+        cursor.execute(
+            f"CREATE TABLE {qn(DEFAULT_PARTITION.format(table=table))} "
+            f"PARTITION OF {qn(table)} DEFAULT"
+        )
+        cursor.execute(
+            f"INSERT INTO {qn(table)} SELECT * FROM {qn(legacy)} "
+            "WHERE is_active AND expires >= %s",
+            [now()],
+        )
+        copied = cursor.rowcount
+        # Dropped before the constraints are recreated, as constraint and
+        # index names are not renamed with the table
+        cursor.execute(f"DROP TABLE {qn(legacy)}")
+        cursor.execute(f"ALTER TABLE {qn(table)} ADD PRIMARY KEY (id, expires)")
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(table + '_token_expires_uniq')} "
+            "UNIQUE (token, expires)"
+        )
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(table + '_user_id_fk')} "
+            f"FOREIGN KEY (user_id) REFERENCES {qn(user_table)} (id) "
+            "DEFERRABLE INITIALLY DEFERRED"
+        )
+        cursor.execute(
+            f"CREATE INDEX {qn(table + '_user_id_idx')} ON {qn(table)} (user_id)"
+        )
+        cursor.execute(
+            f"CREATE INDEX {qn(table + '_token_idx')} ON {qn(table)} (token)"
+        )
+        cursor.execute(
+            f"CREATE INDEX {qn('otp_active_token_idx')} ON {qn(table)} (token) "
+            "WHERE is_active"
+        )
+    logger.info(f"Partitioned table {table}, copied {copied} active OTPs")
+    return copied
@@ -0,0 +1,140 @@
+import hashlib
+import json
+from functools import lru_cache
+
+from django.conf import settings
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from account.cache import MISSING, LRUCache
+from account.metrics import EMAIL_RENDER_CACHE_HITS, track_render
+from account.templatetags.email_tags import (
+    bold_text,
+    cta_button,
+    divider,
+    ordered_list,
+    paragraph,
+    section_header,
+    section_subheader,
+    space,
+    table,
+    uncached_fragments,
+    unordered_list,
+)
+
+# Rendered (text, html) bodies keyed by (template, digest of the context)
+email_cache = LRUCache(settings.EMAIL_RENDER_CACHE_SIZE)
+
+# HTML of each content_list block type
+HTML_RENDERERS = {
+    "paragraph": lambda item: paragraph(item["text"]),
+    "section_header": lambda item: section_header(item["text"]),
+    "section_subheader": lambda item: section_subheader(item["text"]),
+    "divider": lambda item: divider(),
+    "bold_text": lambda item: bold_text(item["text"]),
+    "button": lambda item: cta_button(item["url"], item["text"]) if item["url"] else "",
+    "unordered_list": lambda item: unordered_list(item["items"]),
+    "ordered_list": lambda item: ordered_list(item["items"]),
+    "table": lambda item: table(item["headers"], item["rows"]),
+    "space": lambda item: space(),
+}
+
+# Plain text of each content_list block type
+TEXT_RENDERERS = {
+    "paragraph": lambda item: item["text"],
+    "section_header": lambda item: item["text"],
+    "section_subheader": lambda item: item["text"],
+    "divider": lambda item: "-" * 40,
+    "bold_text": lambda item: item["text"],
+    "button": lambda item: f"{item['text']}: {item['url']}" if item["url"] else "",
+    "unordered_list": lambda item: "\n".join(f"- {i}" for i in item["items"]),
+    "ordered_list": lambda item: "\n".join(
+        f"{n}. {i}" for n, i in enumerate(item["items"], 1)
+    ),
+    "table": lambda item: "\n".join(
+        " | ".join(str(cell) for cell in row)
+        for row in [item["headers"], *item["rows"]]
+    ),
+    "space": lambda item: "",
+}
+
+
+def _render_blocks(renderers, content_list):
+    for item in content_list:
+        renderer = renderers.get(item["type"])
+        # Unknown block types are skipped, as the templates always did
+        if renderer is not None:
+            yield renderer(item)
+
+
+def render_html(content_list):
+    """
+    Return the HTML of a content list.
+    """
+    return mark_safe("".join(_render_blocks(HTML_RENDERERS, content_list)))
+
+
+def render_text(content_list):
+    """
+    Return the plain text of a content list, one paragraph per block.
+    """
+    return "\n\n".join(
+        text for text in _render_blocks(TEXT_RENDERERS, content_list) if text
+    )
+
+
+@lru_cache(maxsize=None)
+def get_email_template(name):
+    """
+    Return the compiled ``email/<name>.html`` template, loading it once per
+    process.
+    """
+    return get_template(f"email/{name}.html")
+
+
+def render_email(template, context, cache=True):
+    """
+    Render an email's content list into the layout of ``template``.
+
+    The content is rendered once as HTML, passed to the template as
+    ``body``, and once as plain text, without parsing the HTML back. Results
+    are memoized by a digest of the context, so sending the same content
+    again skips rendering entirely. Pass ``cache=False`` for content that is
+    never sent twice, such as one-time tokens, to keep it and its fragments
+    out of the caches.
+
+    Returns:
+        tuple: The plain text and HTML bodies.
+    """
+    if not cache:
+        with uncached_fragments(), track_render(template):
+            return _render_email(template, context)
+
+    key = (template, context_digest(context))
+    rendered = email_cache.get(key)
+    if rendered is MISSING:
+        with track_render(template):
+            rendered = _render_email(template, context)
+        email_cache.set(key, rendered)
+    else:
+        EMAIL_RENDER_CACHE_HITS.labels(template).inc()
+    return rendered
+
+
+def context_digest(context):
+    """
+    Return a digest identifying the content of an email context.
+    """
+    data = json.dumps(context, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).digest()
+
+
+def _render_email(template, context):
+    content_list = context["content_list"]
+    html = get_email_template(template).render(
+        {**context, "body": render_html(content_list)}
+    )
+    text = "\n\n".join(
+        part for part in (context["title"], render_text(content_list)) if part
+    )
+    return text, html
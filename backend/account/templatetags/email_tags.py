@@ -1,10 +1,56 @@
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
 from django import template
+from django.conf import settings
 from django.utils.safestring import mark_safe
 
+from account.cache import MISSING, LRUCache
+
 register = template.Library()
 
+# Rendered fragments keyed by (tag, hash of its arguments)
+fragment_cache = LRUCache(settings.EMAIL_FRAGMENT_CACHE_SIZE)
+# True while rendering content that must stay out of the cache
+_bypass_cache = ContextVar("bypass_fragment_cache", default=False)
+
+
+@contextmanager
+def uncached_fragments():
+    """
+    Render fragments without reading or filling the fragment cache, for
+    content that is never rendered twice, like links with one-time tokens.
+    """
+    token = _bypass_cache.set(True)
+    try:
+        yield
+    finally:
+        _bypass_cache.reset(token)
+
+
+def cached_fragment(tag):
+    """
+    Cache the HTML a tag renders for the same arguments.
+    """
+
+    @wraps(tag)
+    def wrapper(*args):
+        if _bypass_cache.get():
+            return tag(*args)
+        key = (tag.__name__, hashlib.sha256(repr(args).encode()).digest())
+        html = fragment_cache.get(key)
+        if html is MISSING:
+            html = tag(*args)
+            fragment_cache.set(key, html)
+        return html
+
+    return wrapper
+
 
 @register.simple_tag
+@cached_fragment
 def cta_button(url, text):
     """
     Renders a CTA button with inline styles.
@@ -28,6 +74,7 @@ def cta_button(url, text):
 
 
 @register.simple_tag
+@cached_fragment
 def paragraph(text):
     """
     Renders a paragraph with inline styles.
@@ -41,6 +88,7 @@ def paragraph(text):
 
 
 @register.simple_tag
+@cached_fragment
 def section_header(text):
     """
     Renders a section header with inline styles.
@@ -57,6 +105,7 @@ def section_header(text):
 
 
 @register.simple_tag
+@cached_fragment
 def section_subheader(text):
     """
     Renders a section subheader with inline styles.
@@ -71,6 +120,7 @@ def section_subheader(text):
 
 
 @register.simple_tag
+@cached_fragment
 def divider():
     """
     Renders a divider.
@@ -81,6 +131,7 @@ def divider():
 
 
 @register.simple_tag
+@cached_fragment
 def bold_text(text):
     """
     Renders bold text.
@@ -91,6 +142,7 @@ def bold_text(text):
 
 
 @register.simple_tag
+@cached_fragment
 def unordered_list(items):
     list_items = "".join(f"<li>{item}</li>" for item in items)
     html = f"<ul style='padding-left: 20px;'>{list_items}</ul>"
@@ -98,6 +150,7 @@ def unordered_list(items):
 
 
 @register.simple_tag
+@cached_fragment
 def ordered_list(items):
     list_items = "".join(f"<li>{item}</li>" for item in items)
     html = f"<ol style='padding-left: 20px;'>{list_items}</ol>"
@@ -105,6 +158,7 @@ def ordered_list(items):
 
 
 @register.simple_tag
+@cached_fragment
 def table(headers, rows):
     headers_html = "".join(f"<th>{header}</th>" for header in headers)
     rows_html = ""
@@ -124,6 +178,7 @@ def table(headers, rows):
 
 
 @register.simple_tag
+@cached_fragment
 def space():
     """
     Renders a space.
@@ -0,0 +1,92 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from config.redis import publish, subscribe
+
+# Redis channel the ids of saved or deleted users are published on
+INVALIDATION_CHANNEL = "auth:user:invalidate"
+
+# user id -> (User, time loaded), least recently used first
+_users = OrderedDict()
+_generation = 0
+_lock = threading.Lock()
+
+
+def get_cached_user(user_id):
+    """
+    Return the user with primary key ``user_id`` from a process-local LRU
+    cache, loading it from the database if it is missing or older than
+    ``JWT_USER_CACHE_SECONDS``.
+
+    A copy is returned, so changes made while handling a request never leak
+    into the cache.
+
+    Raises:
+        User.DoesNotExist: If there is no such user.
+    """
+    key = str(user_id)
+    with _lock:
+        entry = _users.get(key)
+        if entry is not None:
+            user, loaded_at = entry
+            if time.monotonic() - loaded_at <= settings.JWT_USER_CACHE_SECONDS:
+                _users.move_to_end(key)
+                return copy.copy(user)
+            del _users[key]
+        generation = _generation
+
+    if settings.JWT_USER_CACHE_BROADCAST:
+        subscribe(INVALIDATION_CHANNEL, _handle_invalidation)
+
+    user = get_user_model().objects.get(pk=user_id)
+    with _lock:
+        # Don't cache a user saved while it was loading
+        if generation == _generation:
+            _users[key] = (user, time.monotonic())
+            if len(_users) > settings.JWT_USER_CACHE_SIZE:
+                _users.popitem(last=False)
+    return copy.copy(user)
+
+
+def invalidate_cached_user(user_id):
+    """
+    Drop a user from this process's cache.
+    """
+    global _generation
+    with _lock:
+        _generation += 1
+        _users.pop(str(user_id), None)
+
+
+def clear_user_cache():
+    """
+    Drop every cached user in this process.
+    """
+    global _generation
+    with _lock:
+        _generation += 1
+        _users.clear()
+
+
+def invalidate_user(user_id):
+    """
+    Drop a user from this process's cache and, once the current transaction
+    commits, from every other process's.
+
+    This process's cache is cleared again on commit, as a request running
+    concurrently with the write may have reloaded the user from before it.
+    """
+    invalidate_cached_user(user_id)
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
+    if settings.JWT_USER_CACHE_BROADCAST:
+        transaction.on_commit(lambda: publish(INVALIDATION_CHANNEL, str(user_id)))
+
+
+def _handle_invalidation(user_id):
+    invalidate_cached_user(user_id.decode())
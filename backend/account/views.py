@@ -8,6 +8,7 @@ from account.emails import (
     password_changed_email,
     verification_email,
 )
+from account.rendering import render_html
 
 
 def test_templates(request, directory="email", template="welcome"):
@@ -67,4 +68,5 @@ def test_templates(request, directory="email", template="welcome"):
             ],
         }
 
+    context["body"] = render_html(context["content_list"])
     return render(request, f"{directory}/{template_name}.html", context)
@@ -0,0 +1,24 @@
+from functools import lru_cache
+from operator import attrgetter
+
+from django.conf import settings
+
+# Claim values that can go into a token as they are
+JSON_TYPES = (str, int, float, bool, type(None))
+
+
+@lru_cache(maxsize=None)
+def _claim_getters(claims):
+    return tuple((claim, attrgetter(claim)) for claim in claims)
+
+
+def add_user_claims(token, user):
+    """
+    Add the user attributes listed in ``settings.JWT_USER_CLAIMS`` to a
+    token, each as a claim of the same name. Values that are not JSON types,
+    such as UUIDs and dates, are added as strings.
+    """
+    for claim, getter in _claim_getters(tuple(settings.JWT_USER_CLAIMS)):
+        value = getter(user)
+        token[claim] = value if isinstance(value, JSON_TYPES) else str(value)
+    return token
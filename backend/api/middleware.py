@@ -3,12 +3,11 @@ from urllib.parse import parse_qs
 from channels.auth import AuthMiddleware
 from channels.db import database_sync_to_async
 from channels.sessions import CookieMiddleware, SessionMiddleware
-from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
 from django.db import close_old_connections
 from rest_framework_simplejwt.tokens import AccessToken
 
-User = get_user_model()
+from account.user_cache import get_cached_user
 
 
 @database_sync_to_async
@@ -21,7 +20,7 @@ def get_user(scope):
 
     try:
         access_token = AccessToken(token[0])
-        user = User.objects.get(id=access_token["id"])
+        user = get_cached_user(access_token["id"])
     except Exception:
         return AnonymousUser()
 
@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.utils.encoding import force_str
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import (
@@ -9,7 +10,10 @@ from rest_framework_simplejwt.serializers import (
 )
 from rest_framework_simplejwt.tokens import TokenError
 
+from account.blacklist import BloomRefreshToken
+from api.claims import add_user_claims
 from experiment.models import Experiment, Variation
+from experiment.process import TRACKED_EVENTS
 from payment.models import DiscountCode, Price, Product, Tier
 from payment.process import create_user_subscription
 
@@ -26,6 +30,11 @@ class RegisterUserSerializer(serializers.ModelSerializer):
     discountCode = serializers.DictField(required=False, allow_null=True)
     trialDays = serializers.IntegerField(required=False)
 
+    TAKEN_ERRORS = {
+        "username": "Username is already taken.",
+        "email": "Email is already associated with an account.",
+    }
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -44,18 +53,38 @@ class RegisterUserSerializer(serializers.ModelSerializer):
         if settings.PAYMENT_REQUIRED and "payment_method_id" not in data:
             raise serializers.ValidationError("Payment method is required.")
 
-        User = get_user_model()
-
-        if User.objects.filter(username=data["username"]).exists():
-            raise serializers.ValidationError("Username is already taken.")
-        if User.objects.filter(email=data["email"]).exists():
-            raise serializers.ValidationError(
-                "Email is already associated with an account."
-            )
+        # Check both fields in one query. The unique constraints still catch
+        # sign-ups racing past this, see create()
+        taken = (
+            get_user_model()
+            .objects.filter(Q(username=data["username"]) | Q(email=data["email"]))
+            .values_list("username", flat=True)[:2]
+        )
+        if taken:
+            field = "username" if data["username"] in taken else "email"
+            raise serializers.ValidationError(self.TAKEN_ERRORS[field])
         return data
 
+    def _taken_field(self, error):
+        """
+        The field whose unique constraint a failed user INSERT violated, or
+        None if the error is not a clash on username or email.
+        """
+        opts = self.Meta.model._meta
+        # PostgreSQL reports the violated constraint, SQLite the column
+        diag = getattr(error.__cause__, "diag", None)
+        constraint = getattr(diag, "constraint_name", None) or ""
+        for field in self.TAKEN_ERRORS:
+            column = opts.get_field(field).column
+            if constraint.startswith(
+                f"{opts.db_table}_{column}_"
+            ) or f"UNIQUE constraint failed: {opts.db_table}.{column}" in str(error):
+                return field
+        return None
+
     def create(self, validated_data):
-        with transaction.atomic():
+        # Joins the sign-up view's transaction rather than adding a savepoint
+        with transaction.atomic(savepoint=False):
             # Remove password1 and password2 from the validated data
             required_fields = (
                 "password1",
@@ -85,10 +114,15 @@ class RegisterUserSerializer(serializers.ModelSerializer):
             }
             data["password"] = validated_data["password1"]
 
-            # Create the user with the provided data
-            user = self.Meta.model.objects.create_user(**data)
-            user.is_active = False
-            user.save()
+            # Create the user with the provided data, inactive until their
+            # email is verified, in a single INSERT
+            try:
+                user = self.Meta.model.objects.create_user(**data, is_active=False)
+            except IntegrityError as e:
+                field = self._taken_field(e)
+                if field is None:
+                    raise
+                raise serializers.ValidationError(self.TAKEN_ERRORS[field])
 
             # Handle subscription
             if settings.PAYMENT_REQUIRED:
@@ -166,15 +200,12 @@ class LogInSerializer(TokenObtainPairSerializer):
 
     @classmethod
     def get_token(cls, user):
-        token = super().get_token(user)
-        user_data = RegisterUserSerializer(user).data
-        for key, value in user_data.items():
-            if key != "id":
-                token[key] = value
-        return token
+        return add_user_claims(super().get_token(user), user)
 
 
 class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = BloomRefreshToken
+
     def to_internal_value(self, data):
         if "refresh" not in data:
             raise serializers.ValidationError({"refresh": "No refresh token provided."})
@@ -202,6 +233,19 @@ class ExperimentSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "description", "created_at", "active", "variations"]
 
 
+class TrackEventSerializer(serializers.Serializer):
+    experiment = serializers.IntegerField()
+    variation = serializers.CharField()
+    event = serializers.ChoiceField(choices=list(TRACKED_EVENTS))
+
+
+class TrackEventBatchSerializer(serializers.Serializer):
+    events = TrackEventSerializer(
+        many=True, allow_empty=False, max_length=settings.EXPERIMENT_TRACK_BATCH_SIZE
+    )
+    visitor = serializers.CharField(required=False, max_length=255)
+
+
 class PriceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Price
@@ -1,17 +1,18 @@
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.views import TokenRefreshView as BaseTokenRefreshView
 
+from account.blacklist import BloomRefreshToken
 from account.emails import (
     initiate_password_reset_email,
     password_changed_email,
     verification_email,
 )
-from account.models import OneTimePassword
+from account.otp import get_otp_backend
 from api.serializers import (
     CustomTokenRefreshSerializer,
     LogInSerializer,
@@ -27,9 +28,11 @@ class AuthViewSet(StandardViewSet):
     def sign_up(self, request):
         serializer = RegisterUserSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
-
-        email = verification_email(user)
+        # The user and their OTP are created together, and the email is only
+        # sent once both are committed
+        with transaction.atomic():
+            user = serializer.save()
+            email = verification_email(user, new_user=True)
         email.send()
 
         return StandardResponse(
@@ -50,21 +53,14 @@ class AuthViewSet(StandardViewSet):
                 error="The 'token' field is required to verify the email.",
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        try:
-            otp = OneTimePassword.objects.get(token=token, is_active=True)
-        except OneTimePassword.DoesNotExist:
-            return StandardResponse(
-                error="Invalid or expired token.", status=status.HTTP_400_BAD_REQUEST
-            )
-
-        if not otp.is_valid():
-            return StandardResponse(
-                error="Invalid or expired token.", status=status.HTTP_400_BAD_REQUEST
-            )
-
-        user = otp.user
-        user.is_active = True
-        user.save()
+        with transaction.atomic():
+            user_id = get_otp_backend().consume(token)
+            if user_id is None:
+                return StandardResponse(
+                    error="Invalid or expired token.",
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            get_user_model().objects.filter(pk=user_id).update(is_active=True)
 
         return StandardResponse(
             message="Email verified successfully.", status=status.HTTP_200_OK
@@ -146,21 +142,16 @@ class AuthViewSet(StandardViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        try:
-            otp = OneTimePassword.objects.get(token=token, is_active=True)
-        except OneTimePassword.DoesNotExist:
-            return StandardResponse(
-                error="Invalid or expired token.", status=status.HTTP_400_BAD_REQUEST
-            )
-
-        if not otp.is_valid():
-            return StandardResponse(
-                error="Invalid or expired token.", status=status.HTTP_400_BAD_REQUEST
-            )
-
-        user = otp.user
-        user.set_password(password)
-        user.save()
+        with transaction.atomic():
+            user_id = get_otp_backend().consume(token)
+            if user_id is None:
+                return StandardResponse(
+                    error="Invalid or expired token.",
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            user = get_user_model().objects.get(pk=user_id)
+            user.set_password(password)
+            user.save(update_fields=["password"])
 
         email = password_changed_email(user)
         email.send()
@@ -184,7 +175,7 @@ class LogoutView(StandardAPIView):
     def post(self, request):
         try:
             refresh_token = request.data["refresh"]
-            token = RefreshToken(refresh_token)
+            token = BloomRefreshToken(refresh_token)
             token.blacklist()
             return StandardResponse(
                 message="Logout successful.", status=status.HTTP_200_OK
@@ -1,51 +1,328 @@
+import json
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 
-from config.api import StandardResponse, StandardViewSet
+from api.serializers import TrackEventBatchSerializer
+from config.api import STANDARD_MESSAGES, StandardResponse, StandardViewSet
+from experiment.assignment import assign_variations
+from experiment.cache import get_experiment_snapshots
+from experiment.export import FORMATS, ExportError, aiter_export, stream_export
 from experiment.models import Experiment
+from experiment.process import (
+    atrack_variation_event,
+    atrack_variation_events,
+    track_variation_event,
+    track_variation_events,
+)
+from experiment.timeseries import daily_variation_stats
 
 
 class ExperimentViewSet(StandardViewSet):
     queryset = Experiment.objects.all()
     permission_classes = [AllowAny]
 
-    @action(detail=True, methods=["post"], url_path="track-view")
-    def track_view(self, request, pk=None):
+    def _subject_id(self, request):
         """
-        Track that a variation has been shown to the user.
+        The id a user or visitor is bucketed and deduplicated by: the user id
+        when authenticated, otherwise the ``visitor`` the client sends.
         """
-        experiment = Experiment.objects.get(pk=pk)
-        variation_name = request.data.get("variation")
-        variation = experiment.variations.filter(name=variation_name).first()
+        if request.user.is_authenticated:
+            return str(request.user.id)
+        return request.data.get("visitor") or request.query_params.get("visitor")
 
-        if variation is None:
+    def _track(self, request, pk, event, message):
+        variation_name = request.data.get("variation")
+        subject_id = self._subject_id(request)
+        if not track_variation_event(pk, variation_name, event, subject_id):
             return StandardResponse(
                 error="Variation not found.", status=status.HTTP_400_BAD_REQUEST
             )
 
-        variation.views += 1
-        variation.save()
+        return StandardResponse(message=message, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"], url_path="assignments")
+    def assignments(self, request):
+        """
+        Assign the user to a variation of every active experiment.
+
+        Authenticated users are bucketed by their id, anonymous visitors by
+        the ``visitor`` query parameter. Assignment is deterministic, so the
+        same user or visitor always gets the same variations.
+        """
+        subject_id = self._subject_id(request)
+        if not subject_id:
+            return StandardResponse(
+                error="A 'visitor' id is required for anonymous users.",
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
         return StandardResponse(
-            message="View tracked successfully.", status=status.HTTP_200_OK
+            data={"assignments": assign_variations(subject_id)},
+            message="Assignments retrieved successfully.",
+            status=status.HTTP_200_OK,
         )
 
+    @action(detail=True, methods=["post"], url_path="track-view")
+    def track_view(self, request, pk=None):
+        """
+        Track that a variation has been shown to the user.
+        """
+        return self._track(request, pk, "view", "View tracked successfully.")
+
     @action(detail=True, methods=["post"], url_path="track-conversion")
     def track_conversion(self, request, pk=None):
         """
         Track that a user has performed the desired outcome for a variation.
         """
-        experiment = Experiment.objects.get(pk=pk)
-        variation_name = request.data.get("variation")
-        variation = experiment.variations.filter(name=variation_name).first()
+        return self._track(
+            request, pk, "conversion", "Conversion tracked successfully."
+        )
+
+    @action(detail=False, methods=["post"], url_path="track")
+    def track_batch(self, request):
+        """
+        Track a batch of views and conversions in one request.
+
+        Expects ``{"events": [{"experiment", "variation", "event"}, ...]}``,
+        plus a ``visitor`` id for anonymous users, and returns whether each
+        event was tracked, in the order received.
+        """
+        serializer = TrackEventBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        events = serializer.validated_data["events"]
+
+        tracked = track_variation_events(
+            [(item["experiment"], item["variation"], item["event"]) for item in events],
+            self._subject_id(request),
+        )
+        results = [
+            (
+                {**item, "tracked": was_tracked}
+                if was_tracked
+                else {**item, "tracked": False, "error": "Variation not found."}
+            )
+            for item, was_tracked in zip(events, tracked)
+        ]
+        return StandardResponse(
+            data={"results": results},
+            message="Events tracked successfully.",
+            status=status.HTTP_200_OK,
+        )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        permission_classes=[IsAdminUser],
+    )
+    def export(self, request):
+        """
+        Stream a table of experiment data as a CSV or Parquet download.
+
+        Accepts ``table`` (``experiments``, ``variations`` or ``stats``,
+        default ``variations``) and ``file_format`` (``csv`` or ``parquet``,
+        default ``csv``).
+        """
+        table = request.query_params.get("table", "variations")
+        file_format = request.query_params.get("file_format", "csv")
+        try:
+            content = stream_export(
+                table, file_format, settings.EXPERIMENT_EXPORT_CHUNK_SIZE
+            )
+        except ExportError as e:
+            return StandardResponse(error=str(e), status=status.HTTP_400_BAD_REQUEST)
+
+        if isinstance(request._request, ASGIRequest):
+            content = aiter_export(content)
+        content_type, extension = FORMATS[file_format]
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{table}.{extension}"'
+        return response
 
-        if variation is None:
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path="stats",
+        permission_classes=[IsAdminUser],
+    )
+    def stats(self, request, pk=None):
+        """
+        Daily views and conversions of each variation, for charting.
+
+        Accepts ``days`` (default 90) to set how far back to go.
+        """
+        try:
+            experiment = get_experiment_snapshots().get(int(pk))
+            days = int(request.query_params.get("days", 90))
+        except ValueError:
+            experiment, days = None, 0
+
+        if experiment is None:
             return StandardResponse(
-                error="Variation not found.", status=status.HTTP_400_BAD_REQUEST
+                error="Experiment not found.", status=status.HTTP_404_NOT_FOUND
+            )
+        if not 1 <= days <= 366:
+            return StandardResponse(
+                error="'days' must be between 1 and 366.",
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-        variation.conversions += 1
-        variation.save()
+        variations = experiment.variations.values()
+        series = daily_variation_stats([v.id for v in variations], days)
         return StandardResponse(
-            message="Conversion tracked successfully.", status=status.HTTP_200_OK
+            data={
+                "experiment": experiment.id,
+                "days": days,
+                "variations": {v.name: series[v.id] for v in variations},
+            },
+            message="Experiment stats retrieved successfully.",
+            status=status.HTTP_200_OK,
+        )
+
+
+# ASGI-native tracking endpoints. DRF views are synchronous, so under Daphne
+# every request to the ViewSet actions above is handed to a worker thread.
+# These plain async views handle the request on the event loop instead.
+
+
+def _request_data(request):
+    """
+    The JSON or form body of a request, or None if the JSON is malformed or
+    not an object.
+    """
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST
+
+
+def _async_subject_id(request, data):
+    """
+    The user id from a valid access token, read from its claims without a
+    database lookup, otherwise the ``visitor`` the client sends.
+
+    Raises:
+        InvalidToken: If an access token is sent but is not valid.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is not None:
+        raw_token = authentication.get_raw_token(header)
+        if raw_token is not None:
+            token = authentication.get_validated_token(raw_token)
+            return str(token[jwt_settings.USER_ID_CLAIM])
+    return data.get("visitor") or request.GET.get("visitor")
+
+
+def _parse_tracking_request(request):
+    """
+    Read the body and subject id of an async tracking request.
+
+    Returns:
+        tuple: ``(data, subject_id, error_response)``, where
+        ``error_response`` is set if the request cannot be handled.
+    """
+    data = _request_data(request)
+    if data is None:
+        return (
+            None,
+            None,
+            StandardResponse(
+                error="Invalid JSON body.", status=status.HTTP_400_BAD_REQUEST
+            ),
+        )
+    try:
+        return data, _async_subject_id(request, data), None
+    except InvalidToken:
+        return (
+            None,
+            None,
+            StandardResponse(
+                error=STANDARD_MESSAGES["token_invalid"],
+                error_code="TOKEN_EXPIRED",
+                status=status.HTTP_401_UNAUTHORIZED,
+            ),
+        )
+
+
+async def _atrack(request, pk, event, message):
+    data, subject_id, error_response = _parse_tracking_request(request)
+    if error_response:
+        return error_response
+
+    if not await atrack_variation_event(pk, data.get("variation"), event, subject_id):
+        return StandardResponse(
+            error="Variation not found.", status=status.HTTP_400_BAD_REQUEST
+        )
+    return StandardResponse(message=message, status=status.HTTP_200_OK)
+
+
+@csrf_exempt
+@require_POST
+async def track_view_async(request, pk):
+    """
+    Async version of ``ExperimentViewSet.track_view``.
+    """
+    return await _atrack(request, pk, "view", "View tracked successfully.")
+
+
+@csrf_exempt
+@require_POST
+async def track_conversion_async(request, pk):
+    """
+    Async version of ``ExperimentViewSet.track_conversion``.
+    """
+    return await _atrack(request, pk, "conversion", "Conversion tracked successfully.")
+
+
+@csrf_exempt
+@require_POST
+async def track_batch_async(request):
+    """
+    Async version of ``ExperimentViewSet.track_batch``.
+    """
+    data, subject_id, error_response = _parse_tracking_request(request)
+    if error_response:
+        return error_response
+
+    serializer = TrackEventBatchSerializer(data=data)
+    if not serializer.is_valid():
+        return StandardResponse(
+            error=" ".join(
+                f"{field}: {errors}" for field, errors in serializer.errors.items()
+            ),
+            error_code="VALIDATION_ERROR",
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    events = serializer.validated_data["events"]
+
+    tracked = await atrack_variation_events(
+        [(item["experiment"], item["variation"], item["event"]) for item in events],
+        subject_id,
+    )
+    results = [
+        (
+            {**item, "tracked": was_tracked}
+            if was_tracked
+            else {**item, "tracked": False, "error": "Variation not found."}
         )
+        for item, was_tracked in zip(events, tracked)
+    ]
+    return StandardResponse(
+        data={"results": results},
+        message="Events tracked successfully.",
+        status=status.HTTP_200_OK,
+    )
@@ -0,0 +1,40 @@
+import os
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector
+
+# Importing registers the email metrics and the Celery queue collector
+from account.metrics import CELERY_QUEUE_COLLECTOR
+
+
+def metrics(request):
+    """
+    Serve the Prometheus metrics of this process, or of every process
+    sharing ``PROMETHEUS_MULTIPROC_DIR`` if it is set. Requires
+    ``Authorization: Bearer <METRICS_TOKEN>``. Without a configured token,
+    the metrics are only served when ``DEBUG`` is on.
+    """
+    if not settings.METRICS_TOKEN and not settings.DEBUG:
+        raise Http404
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not constant_time_compare(
+            request.headers.get("Authorization", ""), expected
+        ):
+            return HttpResponse(status=401)
+
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        # Read from the broker, so not shared through the multiprocess files
+        registry.register(CELERY_QUEUE_COLLECTOR)
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -1,4 +1,4 @@
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils.encoding import force_str
 from rest_framework import status, viewsets
 from rest_framework.exceptions import (
@@ -121,8 +121,9 @@ class StandardMixin:
         return super().handle_exception(exc)
 
     def finalize_response(self, request, response, *args, **kwargs):
-        # Ensure the original response is a StandardResponse object
-        if isinstance(response, StandardResponse):
+        # Ensure the original response is a StandardResponse object. Streamed
+        # responses (file downloads) are passed through untouched.
+        if isinstance(response, (StandardResponse, StreamingHttpResponse)):
             return super().finalize_response(request, response, *args, **kwargs)
 
         if response.status_code >= 400:
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+import weakref
+
+import redis
+import redis.asyncio
+from django.conf import settings
+
+from config.logger import logger
+
+_client = None
+# Async clients per event loop, as their connections belong to one loop
+_async_clients = weakref.WeakKeyDictionary()
+_subscriptions = {}
+_subscriptions_lock = threading.Lock()
+
+# Seconds to wait before re-subscribing after losing the Redis connection
+RESUBSCRIBE_DELAY = 5
+
+
+def get_redis():
+    """
+    Return the process-wide Redis client for ``settings.REDIS_URL``.
+    """
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+def get_async_redis():
+    """
+    Return the ``redis.asyncio`` client for ``settings.REDIS_URL`` bound to
+    the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = redis.asyncio.Redis.from_url(settings.REDIS_URL)
+    return client
+
+
+def publish(channel, message):
+    """
+    Publish a message to other processes. Failures are logged, not raised,
+    so a Redis outage never breaks the caller.
+    """
+    try:
+        get_redis().publish(channel, message)
+    except redis.RedisError as e:
+        logger.warning(f"Could not publish to {channel}: {e}")
+
+
+def subscribe(channel, callback):
+    """
+    Call ``callback`` with the data of every message published to
+    ``channel``, from a daemon thread. Subscribing to the same channel again
+    is a no-op.
+    """
+    with _subscriptions_lock:
+        if channel in _subscriptions:
+            return
+        thread = threading.Thread(
+            target=_listen,
+            args=(channel, callback),
+            name=f"redis-subscriber-{channel}",
+            daemon=True,
+        )
+        _subscriptions[channel] = thread
+    thread.start()
+
+
+def _listen(channel, callback):
+    while True:
+        try:
+            pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(channel)
+            for message in pubsub.listen():
+                try:
+                    callback(message["data"])
+                except Exception:
+                    logger.exception(f"Error handling message on {channel}")
+        except redis.RedisError as e:
+            logger.warning(f"Lost subscription to {channel}: {e}")
+            time.sleep(RESUBSCRIBE_DELAY)
@@ -189,7 +189,7 @@ AUTH_USER_MODEL = "account.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
@@ -235,6 +235,29 @@ CORS_ORIGIN_WHITELIST = [
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
 
+# User attributes added to JWTs as claims of the same name, besides the user id
+JWT_USER_CLAIMS = [
+    claim.strip()
+    for claim in os.environ.get(
+        "JWT_USER_CLAIMS", "username,email,first_name,last_name"
+    ).split(",")
+    if claim.strip()
+]
+# Seconds an authenticated user is served from the process-local user cache
+JWT_USER_CACHE_SECONDS = int(os.environ.get("JWT_USER_CACHE_SECONDS", 30))
+# Maximum number of users in the process-local user cache
+JWT_USER_CACHE_SIZE = int(os.environ.get("JWT_USER_CACHE_SIZE", 1024))
+# Broadcast user cache invalidations to other processes over Redis
+JWT_USER_CACHE_BROADCAST = get_env_bool("JWT_USER_CACHE_BROADCAST", "True")
+# Size in bits of the in-memory Bloom filter of blacklisted refresh tokens
+JWT_BLACKLIST_BLOOM_BITS = int(os.environ.get("JWT_BLACKLIST_BLOOM_BITS", 2**20))
+# Hash functions per JTI in the blacklist Bloom filter
+JWT_BLACKLIST_BLOOM_HASHES = int(os.environ.get("JWT_BLACKLIST_BLOOM_HASHES", 7))
+# Seconds between rebuilds of the blacklist Bloom filter from the database
+JWT_BLACKLIST_SYNC_SECONDS = int(os.environ.get("JWT_BLACKLIST_SYNC_SECONDS", 60))
+# Broadcast blacklisted tokens to the filters of other processes over Redis
+JWT_BLACKLIST_BROADCAST = get_env_bool("JWT_BLACKLIST_BROADCAST", "True")
+
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
@@ -256,7 +279,20 @@ else:
         "EMAIL_BACKEND", "anymail.backends.postmark.EmailBackend"
     )
 
+# Rendered email blocks kept per process, e.g. buttons and repeated paragraphs
+EMAIL_FRAGMENT_CACHE_SIZE = int(os.environ.get("EMAIL_FRAGMENT_CACHE_SIZE", 1024))
+# Whole rendered emails kept per process, reused when the same content is sent again
+EMAIL_RENDER_CACHE_SIZE = int(os.environ.get("EMAIL_RENDER_CACHE_SIZE", 128))
+
 OTP_EXPIRATION_MINUTES = os.environ.get("OTP_EXPIRATION_MINUTES", 5)
+# Where OTPs are stored: account.otp.DatabaseOTPBackend or account.otp.RedisOTPBackend
+OTP_BACKEND = os.environ.get("OTP_BACKEND", "account.otp.DatabaseOTPBackend")
+# Days of OTP partitions to create in advance, if the otp table is partitioned
+OTP_PARTITION_DAYS_AHEAD = int(os.environ.get("OTP_PARTITION_DAYS_AHEAD", 7))
+# Rows deleted per transaction when cleaning up expired OTPs and tokens
+CLEANUP_BATCH_SIZE = int(os.environ.get("CLEANUP_BATCH_SIZE", 5000))
+# Seconds to pause between cleanup batches
+CLEANUP_BATCH_SLEEP_SECONDS = float(os.environ.get("CLEANUP_BATCH_SLEEP_SECONDS", 0.1))
 FRONTEND_URL = os.environ.get("FRONTEND_URL", "http://localhost:3001")
 DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "no-reply@test.io")
 
@@ -284,6 +320,14 @@ CELERY_TASK_DEFAULT_RATE_LIMIT = (
 # Queue settings
 CELERY_TASK_DEFAULT_QUEUE = os.environ.get("CELERY_TASK_DEFAULT_QUEUE", "default")
 
+# Celery queues whose depth /metrics reports, read from the Redis broker
+METRICS_CELERY_QUEUES = os.environ.get(
+    "METRICS_CELERY_QUEUES", CELERY_TASK_DEFAULT_QUEUE
+).split(",")
+# Bearer token required to read /metrics. Without one, /metrics is only served
+# when DEBUG is on.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
 # Monitoring and debugging
 CELERY_WORKER_LOG_LEVEL = os.environ.get("CELERY_WORKER_LOG_LEVEL", "INFO")
 CELERY_TRACK_STARTED = bool(int(os.environ.get("CELERY_TRACK_STARTED", 1)))
@@ -291,6 +335,50 @@ CELERY_TRACK_STARTED = bool(int(os.environ.get("CELERY_TRACK_STARTED", 1)))
 # Celery Beat settings
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 
+# Experiment tracking
+# Count tracking hits in Redis and flush them to the database periodically
+EXPERIMENT_TRACKING_BUFFER = get_env_bool("EXPERIMENT_TRACKING_BUFFER", "False")
+EXPERIMENT_BUFFER_FLUSH_SECONDS = int(
+    os.environ.get("EXPERIMENT_BUFFER_FLUSH_SECONDS", 10)
+)
+EXPERIMENT_FLUSH_RETENTION_DAYS = int(
+    os.environ.get("EXPERIMENT_FLUSH_RETENTION_DAYS", 7)
+)
+# Seconds an experiment cache snapshot is trusted without an invalidation
+EXPERIMENT_CACHE_TTL = int(os.environ.get("EXPERIMENT_CACHE_TTL", 300))
+# Broadcast experiment cache invalidations to other processes over Redis
+EXPERIMENT_CACHE_BROADCAST = get_env_bool("EXPERIMENT_CACHE_BROADCAST", "True")
+# Days hourly experiment stats are kept before being compacted into days
+EXPERIMENT_STATS_HOURLY_RETENTION_DAYS = int(
+    os.environ.get("EXPERIMENT_STATS_HOURLY_RETENTION_DAYS", 7)
+)
+# Days daily experiment stats are kept after compaction
+EXPERIMENT_STATS_RETENTION_DAYS = int(
+    os.environ.get("EXPERIMENT_STATS_RETENTION_DAYS", 400)
+)
+# Maximum number of events accepted by the batch tracking endpoint
+EXPERIMENT_TRACK_BATCH_SIZE = int(os.environ.get("EXPERIMENT_TRACK_BATCH_SIZE", 500))
+# Drop repeated conversions of a user or visitor and count unique visitors
+EXPERIMENT_DEDUP_ENABLED = get_env_bool("EXPERIMENT_DEDUP_ENABLED", "False")
+# Seconds each conversion dedup Bloom filter covers before rotating
+EXPERIMENT_DEDUP_WINDOW_SECONDS = int(
+    os.environ.get("EXPERIMENT_DEDUP_WINDOW_SECONDS", 86400)
+)
+# Bits per conversion dedup Bloom filter (2**24 bits is 2 MiB)
+EXPERIMENT_DEDUP_BLOOM_BITS = int(os.environ.get("EXPERIMENT_DEDUP_BLOOM_BITS", 2**24))
+# Hash functions per key in the conversion dedup Bloom filter
+EXPERIMENT_DEDUP_BLOOM_HASHES = int(os.environ.get("EXPERIMENT_DEDUP_BLOOM_HASHES", 7))
+# Seconds between recomputations of bandit experiment weights
+EXPERIMENT_BANDIT_INTERVAL_SECONDS = int(
+    os.environ.get("EXPERIMENT_BANDIT_INTERVAL_SECONDS", 60)
+)
+# Minimum share of traffic every arm of a bandit experiment keeps
+EXPERIMENT_BANDIT_MIN_SHARE = float(os.environ.get("EXPERIMENT_BANDIT_MIN_SHARE", 0.01))
+# Posterior draws per arm when computing Thompson sampling weights
+EXPERIMENT_BANDIT_SAMPLES = int(os.environ.get("EXPERIMENT_BANDIT_SAMPLES", 10000))
+# Rows fetched per server-side cursor round trip when exporting experiments
+EXPERIMENT_EXPORT_CHUNK_SIZE = int(os.environ.get("EXPERIMENT_EXPORT_CHUNK_SIZE", 2000))
+
 OWNER_EMAIL = os.environ.get("OWNER_EMAIL", "test@test.com")
 
 APP_NAME = os.environ.get("APP_NAME", "BaseBuild")
@@ -32,7 +32,13 @@ from api.views.auth import (  # type: ignore
     LogoutView,
     TokenRefreshView,
 )
-from api.views.experiment import ExperimentViewSet  # type: ignore
+from api.views.experiment import (  # type: ignore
+    ExperimentViewSet,
+    track_batch_async,
+    track_conversion_async,
+    track_view_async,
+)
+from api.views.metrics import metrics  # type: ignore
 from api.views.payment import ProductViewSet, PurchaseViewSet  # type: ignore
 from api.views.user import UserViewSet  # type: ignore
 
@@ -46,9 +52,25 @@ router.register(r"purchases", PurchaseViewSet, basename="purchases")
 urlpatterns = [
     path("admin", admin.site.urls),
     path("version", version, name="version"),
+    path("metrics", metrics, name="metrics"),
     path("api/auth/login", LogInView.as_view(), name="log_in"),
     path("api/auth/refresh", TokenRefreshView.as_view(), name="token_refresh"),
     path("api/auth/logout", LogoutView.as_view(), name="log_out"),
+    path(
+        "api/async/experiments/<int:pk>/track-view",
+        track_view_async,
+        name="track_view_async",
+    ),
+    path(
+        "api/async/experiments/<int:pk>/track-conversion",
+        track_conversion_async,
+        name="track_conversion_async",
+    ),
+    path(
+        "api/async/experiments/track",
+        track_batch_async,
+        name="track_batch_async",
+    ),
     path("api/", include(router.urls)),
     # OpenAPI 3 documentation with Swagger UI
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
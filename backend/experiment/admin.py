@@ -6,9 +6,16 @@ from .models import Experiment, Variation
 
 @admin.register(Experiment)
 class ExperimentAdmin(admin.ModelAdmin):
-    list_display = ("id", "name", "is_active", "created_at")
+    list_display = (
+        "id",
+        "name",
+        "is_active",
+        "allocation_mode",
+        "counter_shards",
+        "created_at",
+    )
     search_fields = ("name",)
-    list_filter = ("is_active",)
+    list_filter = ("is_active", "allocation_mode")
 
 
 @admin.register(Variation)
@@ -18,6 +25,7 @@ class VariationAdmin(admin.ModelAdmin):
         "name",
         "experiment",
         "weight",
+        "bandit_weight",
         "views",
         "conversions",
         "created_at",
@@ -25,4 +33,5 @@ class VariationAdmin(admin.ModelAdmin):
     search_fields = ("name",)
     list_filter = ("experiment",)
     raw_id_fields = ("experiment",)
+    readonly_fields = ("bandit_weight",)
     ordering = ("experiment", "weight")
@@ -0,0 +1,109 @@
+import bisect
+import hashlib
+from typing import NamedTuple
+
+from experiment.cache import get_experiment_snapshots
+from experiment.models import Experiment
+
+
+class AssignmentTable(NamedTuple):
+    """
+    Precomputed cumulative weights of an active experiment's variations.
+    """
+
+    experiment_id: int
+    experiment_name: str
+    cumulative_weights: tuple
+    variation_names: tuple
+
+    def pick(self, subject_id):
+        """
+        Pick a variation for a user or visitor id.
+
+        The id is hashed together with the experiment id, so the same subject
+        always lands on the same variation while different experiments bucket
+        independently.
+        """
+        digest = hashlib.sha256(f"{self.experiment_id}:{subject_id}".encode()).digest()
+        point = int.from_bytes(digest[:8], "big") % self.cumulative_weights[-1]
+        index = bisect.bisect_right(self.cumulative_weights, point)
+        return self.variation_names[index]
+
+
+# Assignment tables derived from the experiment cache, as
+# (snapshots, tables) so they are rebuilt whenever the snapshots change
+_tables = (None, [])
+
+
+def allocation_weight(experiment, variation):
+    """
+    The weight a variation is assigned with: its bandit weight for bandit
+    experiments once one has been computed, otherwise its static weight.
+    """
+    if (
+        experiment.allocation_mode != Experiment.STATIC
+        and variation.bandit_weight is not None
+    ):
+        return variation.bandit_weight
+    return variation.weight
+
+
+def build_assignment_tables(snapshots):
+    """
+    Build an assignment table for every active experiment with at least one
+    positively weighted variation.
+    """
+    tables = []
+    for experiment in snapshots.values():
+        if not experiment.is_active:
+            continue
+
+        cumulative_weights = []
+        variation_names = []
+        total = 0
+        for variation in experiment.variations.values():
+            weight = allocation_weight(experiment, variation)
+            if weight > 0:
+                total += weight
+                cumulative_weights.append(total)
+                variation_names.append(variation.name)
+
+        if total:
+            tables.append(
+                AssignmentTable(
+                    experiment.id,
+                    experiment.name,
+                    tuple(cumulative_weights),
+                    tuple(variation_names),
+                )
+            )
+    return tables
+
+
+def get_assignment_tables():
+    """
+    Return the assignment tables for the cached experiment snapshots.
+    """
+    global _tables
+    snapshots = get_experiment_snapshots()
+    cached_snapshots, tables = _tables
+    if cached_snapshots is not snapshots:
+        tables = build_assignment_tables(snapshots)
+        _tables = (snapshots, tables)
+    return tables
+
+
+def assign_variations(subject_id):
+    """
+    Assign a user or visitor to a variation of every active experiment.
+
+    Returns:
+        dict: Maps each experiment name to its id and the assigned variation.
+    """
+    return {
+        table.experiment_name: {
+            "experiment": table.experiment_id,
+            "variation": table.pick(subject_id),
+        }
+        for table in get_assignment_tables()
+    }
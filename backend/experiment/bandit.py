@@ -0,0 +1,136 @@
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+
+from config.logger import logger
+from experiment.cache import invalidate_experiment_cache
+from experiment.models import Experiment, Variation
+from experiment.process import with_counter_totals
+
+# Bandit weights are integers summing to roughly this, so the assignment
+# tables can keep using integer cumulative weights
+WEIGHT_SCALE = 10000
+
+
+def thompson_shares(conversions, views, samples, rng=None):
+    """
+    Share of traffic per arm under Thompson sampling: the probability that
+    each arm has the highest conversion rate, estimated from ``samples``
+    draws of every arm's Beta(1 + conversions, 1 + misses) posterior.
+
+    Views and conversions are tracked independently, so conversions are
+    capped at views to keep the posterior defined.
+    """
+    rng = rng or np.random.default_rng()
+    views = np.asarray(views, dtype=np.float64)
+    conversions = np.minimum(np.asarray(conversions, dtype=np.float64), views)
+    draws = rng.beta(
+        (1 + conversions)[:, None],
+        (1 + views - conversions)[:, None],
+        size=(conversions.shape[0], samples),
+    )
+    wins = np.bincount(draws.argmax(axis=0), minlength=conversions.shape[0])
+    return wins / samples
+
+
+def ucb1_shares(conversions, views):
+    """
+    Share of traffic per arm under UCB1: everything to the arm with the
+    highest upper confidence bound, or split evenly between arms that have
+    not been shown yet.
+    """
+    views = np.asarray(views, dtype=np.float64)
+    conversions = np.minimum(np.asarray(conversions, dtype=np.float64), views)
+    unseen = views == 0
+    if unseen.any():
+        return unseen / unseen.sum()
+
+    bounds = conversions / views + np.sqrt(2 * np.log(views.sum()) / views)
+    shares = np.zeros(views.shape[0])
+    shares[bounds.argmax()] = 1.0
+    return shares
+
+
+def bandit_weights(mode, conversions, views, min_share, samples, rng=None):
+    """
+    Integer allocation weights for the arms of a bandit experiment.
+
+    Every arm keeps at least ``min_share`` of the traffic, so arms keep being
+    explored between recomputations.
+    """
+    if mode == Experiment.THOMPSON:
+        shares = thompson_shares(conversions, views, samples, rng)
+    elif mode == Experiment.UCB1:
+        shares = ucb1_shares(conversions, views)
+    else:
+        raise ValueError(f"Unknown bandit allocation mode: {mode}")
+
+    arms = shares.shape[0]
+    min_share = min(min_share, 1 / arms)
+    shares = min_share + shares * (1 - min_share * arms)
+    return np.maximum(np.rint(shares * WEIGHT_SCALE), 1).astype(int).tolist()
+
+
+def recompute_bandit_weights(rng=None):
+    """
+    Recompute the bandit weight of every variation of active bandit
+    experiments from their views and conversions, including pending counter
+    shards.
+
+    Variations with a static weight of 0 are treated as switched off and get
+    a bandit weight of 0. Changed weights are saved in one bulk update and
+    the experiment cache is invalidated, so assignment picks them up without
+    touching the database per request. An experiment whose weights cannot be
+    computed is logged and keeps its current weights, so it does not hold up
+    the others.
+
+    Returns:
+        int: The number of variations whose weight changed.
+    """
+    experiments = (
+        Experiment.objects.filter(is_active=True)
+        .exclude(allocation_mode=Experiment.STATIC)
+        .prefetch_related(
+            Prefetch(
+                "variations",
+                queryset=with_counter_totals(Variation.objects.order_by("id")),
+            )
+        )
+    )
+
+    changed = []
+    for experiment in experiments:
+        enabled = [v for v in experiment.variations.all() if v.weight > 0]
+        weights = {}
+        if enabled:
+            try:
+                weights = dict(
+                    zip(
+                        [variation.id for variation in enabled],
+                        bandit_weights(
+                            experiment.allocation_mode,
+                            [variation.total_conversions for variation in enabled],
+                            [variation.total_views for variation in enabled],
+                            settings.EXPERIMENT_BANDIT_MIN_SHARE,
+                            settings.EXPERIMENT_BANDIT_SAMPLES,
+                            rng,
+                        ),
+                    )
+                )
+            except Exception:
+                logger.exception(
+                    f"Could not recompute bandit weights of experiment {experiment.name}"
+                )
+                continue
+        for variation in experiment.variations.all():
+            weight = weights.get(variation.id, 0)
+            if variation.bandit_weight != weight:
+                variation.bandit_weight = weight
+                changed.append(variation)
+
+    if changed:
+        with transaction.atomic():
+            Variation.objects.bulk_update(changed, ["bandit_weight"])
+            invalidate_experiment_cache()
+    return len(changed)
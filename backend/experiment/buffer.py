@@ -0,0 +1,121 @@
+import uuid
+
+from redis.exceptions import ResponseError, WatchError
+
+from config.redis import get_async_redis, get_redis
+
+# Hash receiving tracking hits on the request path
+PENDING_KEY = "experiment:tracking:pending"
+# Hash holding the batch currently being flushed to the database
+FLUSHING_KEY = "experiment:tracking:flushing"
+# Field of the flushing hash identifying the batch
+BATCH_FIELD = "__batch__"
+
+
+def _pending_field(experiment_id, variation_name, field):
+    return f"{experiment_id}:{field}:{variation_name}"
+
+
+def buffer_event(experiment_id, variation_name, field):
+    """
+    Count a tracking hit in Redis without touching the database.
+    """
+    get_redis().hincrby(
+        PENDING_KEY, _pending_field(experiment_id, variation_name, field), 1
+    )
+
+
+def buffer_events(entries):
+    """
+    Count many tracking hits in Redis in a single round trip.
+
+    Args:
+        entries (list): ``(experiment_id, variation_name, field)`` tuples.
+    """
+    if not entries:
+        return
+
+    pipeline = get_redis().pipeline(transaction=False)
+    for experiment_id, variation_name, field in entries:
+        pipeline.hincrby(
+            PENDING_KEY, _pending_field(experiment_id, variation_name, field), 1
+        )
+    pipeline.execute()
+
+
+async def abuffer_events(entries):
+    """
+    Async version of ``buffer_events``, using the event loop's Redis client.
+    """
+    if not entries:
+        return
+
+    pipeline = get_async_redis().pipeline(transaction=False)
+    for experiment_id, variation_name, field in entries:
+        pipeline.hincrby(
+            PENDING_KEY, _pending_field(experiment_id, variation_name, field), 1
+        )
+    await pipeline.execute()
+
+
+def claim_buffered_events():
+    """
+    Claim the buffered hits for flushing.
+
+    The pending hash is atomically renamed to the flushing key so new hits
+    start a fresh buffer. A batch left behind by a flush that crashed is
+    claimed again, with the same batch id, before any new hits are taken.
+
+    Returns:
+        tuple: ``(batch_id, counts)`` where counts maps
+        ``(experiment_id, variation_name)`` to a dict of counter deltas, or
+        ``(None, {})`` if nothing is buffered.
+    """
+    client = get_redis()
+    if not client.exists(FLUSHING_KEY):
+        try:
+            client.renamenx(PENDING_KEY, FLUSHING_KEY)
+        except ResponseError:
+            # The pending key does not exist: nothing has been tracked
+            return None, {}
+
+    client.hsetnx(FLUSHING_KEY, BATCH_FIELD, uuid.uuid4().hex)
+    entries = client.hgetall(FLUSHING_KEY)
+    batch_id = entries.pop(BATCH_FIELD.encode(), None)
+    if batch_id is None:
+        # Another worker released the batch between the calls above
+        return None, {}
+
+    counts = {}
+    for key, value in entries.items():
+        experiment_id, field, variation_name = key.decode().split(":", 2)
+        deltas = counts.setdefault((int(experiment_id), variation_name), {})
+        deltas[field] = deltas.get(field, 0) + int(value)
+    return batch_id.decode(), counts
+
+
+def release_buffered_events(batch_id):
+    """
+    Drop the claimed batch once it has been committed to the database.
+
+    Overlapping flushes can claim the same batch, and by the time the second
+    one releases it the flushing key may hold a newer batch claimed by another
+    worker. The key is therefore only deleted while it still holds
+    ``batch_id``.
+
+    Returns:
+        bool: True if the batch was dropped.
+    """
+    with get_redis().pipeline() as pipeline:
+        try:
+            pipeline.watch(FLUSHING_KEY)
+            current = pipeline.hget(FLUSHING_KEY, BATCH_FIELD)
+            if current is None or current.decode() != batch_id:
+                return False
+            pipeline.multi()
+            pipeline.delete(FLUSHING_KEY)
+            pipeline.execute()
+        except WatchError:
+            # The batch was released or replaced since it was checked
+            return False
+    return True
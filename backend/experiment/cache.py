@@ -0,0 +1,169 @@
+import threading
+import time
+import uuid
+from typing import NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+
+from config.redis import publish, subscribe
+from experiment.models import Experiment, Variation
+
+# Redis channel used to tell other processes to drop their cache
+INVALIDATION_CHANNEL = "experiment:cache:invalidate"
+# Identifies this process so it ignores its own invalidation messages
+_instance_id = uuid.uuid4().hex
+
+
+class VariationSnapshot(NamedTuple):
+    id: int
+    name: str
+    weight: int
+    bandit_weight: int  # None until the bandit has computed one
+
+
+class ExperimentSnapshot(NamedTuple):
+    id: int
+    name: str
+    is_active: bool
+    counter_shards: int
+    allocation_mode: str
+    variations: dict  # variation name -> VariationSnapshot
+
+
+_snapshots = None
+_loaded_at = 0.0
+_generation = 0
+_lock = threading.Lock()
+
+
+def load_experiment_snapshots():
+    """
+    Load a compact, read-only snapshot of every experiment and its variations.
+    """
+    experiments = Experiment.objects.only(
+        "id", "name", "is_active", "counter_shards", "allocation_mode"
+    ).prefetch_related(
+        Prefetch(
+            "variations",
+            queryset=Variation.objects.order_by("id").only(
+                "id", "experiment_id", "name", "weight", "bandit_weight"
+            ),
+        )
+    )
+    return {
+        experiment.id: ExperimentSnapshot(
+            experiment.id,
+            experiment.name,
+            experiment.is_active,
+            experiment.counter_shards,
+            experiment.allocation_mode,
+            {
+                variation.name: VariationSnapshot(
+                    variation.id,
+                    variation.name,
+                    variation.weight,
+                    variation.bandit_weight,
+                )
+                for variation in experiment.variations.all()
+            },
+        )
+        for experiment in experiments
+    }
+
+
+def get_experiment_snapshots():
+    """
+    Return the cached experiment snapshots keyed by experiment id, loading
+    them on first use, after an invalidation or once
+    ``EXPERIMENT_CACHE_TTL`` seconds have passed.
+    """
+    global _snapshots, _loaded_at
+    snapshots = _snapshots
+    if (
+        snapshots is None
+        or time.monotonic() - _loaded_at > settings.EXPERIMENT_CACHE_TTL
+    ):
+        if settings.EXPERIMENT_CACHE_BROADCAST:
+            subscribe(INVALIDATION_CHANNEL, _handle_invalidation)
+
+        generation = _generation
+        snapshots = load_experiment_snapshots()
+        with _lock:
+            # Don't cache data invalidated while it was loading
+            if generation == _generation:
+                _snapshots = snapshots
+                _loaded_at = time.monotonic()
+    return snapshots
+
+
+def get_variation(experiment_id, variation_name):
+    """
+    Look up a variation by experiment id and name without querying the
+    database.
+
+    Returns:
+        tuple: ``(ExperimentSnapshot, VariationSnapshot)``, or None if the
+        experiment or variation does not exist.
+    """
+    return _find_variation(get_experiment_snapshots(), experiment_id, variation_name)
+
+
+async def aget_variation(experiment_id, variation_name):
+    """
+    Async version of ``get_variation``. Only a cold or expired cache is
+    reloaded, in a worker thread; lookups in a warm cache stay on the event
+    loop.
+    """
+    snapshots = _snapshots
+    if (
+        snapshots is None
+        or time.monotonic() - _loaded_at > settings.EXPERIMENT_CACHE_TTL
+    ):
+        snapshots = await sync_to_async(get_experiment_snapshots)()
+    return _find_variation(snapshots, experiment_id, variation_name)
+
+
+def _find_variation(snapshots, experiment_id, variation_name):
+    try:
+        experiment = snapshots.get(int(experiment_id))
+    except (TypeError, ValueError):
+        return None
+    if experiment is None or not isinstance(variation_name, str):
+        return None
+
+    variation = experiment.variations.get(variation_name)
+    if variation is None:
+        return None
+    return experiment, variation
+
+
+def clear_experiment_cache():
+    """
+    Drop this process's cached snapshots.
+    """
+    global _snapshots, _generation
+    with _lock:
+        _generation += 1
+        _snapshots = None
+
+
+def invalidate_experiment_cache():
+    """
+    Drop the cached snapshots in this process and, once the current
+    transaction commits, in every other process.
+
+    This process's cache is cleared again on commit, as a request running
+    concurrently with the write may have reloaded the rows from before it.
+    """
+    clear_experiment_cache()
+    transaction.on_commit(clear_experiment_cache)
+    if settings.EXPERIMENT_CACHE_BROADCAST:
+        transaction.on_commit(lambda: publish(INVALIDATION_CHANNEL, _instance_id))
+
+
+def _handle_invalidation(sender_id):
+    if sender_id.decode() != _instance_id:
+        clear_experiment_cache()
@@ -0,0 +1,160 @@
+import hashlib
+import time
+
+import redis
+from django.conf import settings
+
+from config.logger import logger
+from config.redis import get_async_redis, get_redis
+
+# Bitmap of the Bloom filter of (subject, experiment, counter) keys,
+# one per dedup window
+BLOOM_KEY = "experiment:dedup:bloom:{window}"
+# HyperLogLog of the distinct subjects per variation and counter
+UNIQUES_KEY = "experiment:uniques:{variation_id}:{field}"
+# Counters whose events are deduplicated per subject and experiment
+DEDUPLICATED_FIELDS = ("conversions",)
+# Counters unique subjects are estimated for
+UNIQUE_FIELDS = ("views", "conversions")
+
+
+def _bloom_positions(key):
+    """
+    Bit positions of a key in the Bloom filter, derived by double hashing
+    one SHA-256 digest.
+    """
+    digest = hashlib.sha256(key.encode()).digest()
+    h1 = int.from_bytes(digest[:8], "big")
+    h2 = int.from_bytes(digest[8:16], "big") | 1
+    bits = settings.EXPERIMENT_DEDUP_BLOOM_BITS
+    return [(h1 + i * h2) % bits for i in range(settings.EXPERIMENT_DEDUP_BLOOM_HASHES)]
+
+
+def record_unique_events(subject_id, events):
+    """
+    Record tracking events of a user or visitor and report which are
+    duplicates.
+
+    Conversions are deduplicated per ``(subject, experiment)``: the key is
+    checked against and added to a Redis Bloom filter in one MULTI pipeline.
+    SETBIT returns the previous bit, so of two concurrent retries only one
+    sees an unset bit. Filters rotate every
+    ``EXPERIMENT_DEDUP_WINDOW_SECONDS`` and the previous window is checked
+    too, so memory stays bounded at two bitmaps of
+    ``EXPERIMENT_DEDUP_BLOOM_BITS`` bits. A false positive (rare, and tunable
+    through the filter size) drops a genuine conversion. Views are never
+    dropped.
+
+    The subject is also added to the variation's HyperLogLog for the
+    counter, from which unique visitor counts are estimated.
+
+    If Redis is unavailable every event is treated as new.
+
+    Args:
+        subject_id (str): User id or anonymous visitor id.
+        events (list): ``(experiment_id, variation_id, field)`` tuples, where
+            field is the counter the event increments.
+
+    Returns:
+        list: One bool per event, False if it is a duplicate.
+    """
+    if not events:
+        return []
+
+    pipeline = get_redis().pipeline(transaction=True)
+    checks = _queue_dedup(pipeline, subject_id, events)
+    try:
+        replies = pipeline.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not deduplicate tracking events: {e}")
+        return [True] * len(events)
+    return _read_dedup(replies, checks)
+
+
+async def arecord_unique_events(subject_id, events):
+    """
+    Async version of ``record_unique_events``, using the event loop's Redis
+    client.
+    """
+    if not events:
+        return []
+
+    pipeline = get_async_redis().pipeline(transaction=True)
+    checks = _queue_dedup(pipeline, subject_id, events)
+    try:
+        replies = await pipeline.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not deduplicate tracking events: {e}")
+        return [True] * len(events)
+    return _read_dedup(replies, checks)
+
+
+def _queue_dedup(pipeline, subject_id, events):
+    """
+    Queue the Bloom filter and HyperLogLog commands of ``events`` on a
+    pipeline.
+
+    Returns:
+        list: For each event, the reply offset of its SETBIT/GETBIT pairs,
+        or None if it is not deduplicated.
+    """
+    window_seconds = settings.EXPERIMENT_DEDUP_WINDOW_SECONDS
+    window = int(time.time() // window_seconds)
+    current_key = BLOOM_KEY.format(window=window)
+    previous_key = BLOOM_KEY.format(window=window - 1)
+
+    checks = []
+    for experiment_id, variation_id, field in events:
+        if field in DEDUPLICATED_FIELDS:
+            checks.append(len(pipeline))
+            for position in _bloom_positions(f"{subject_id}:{experiment_id}:{field}"):
+                pipeline.setbit(current_key, position, 1)
+                pipeline.getbit(previous_key, position)
+        else:
+            checks.append(None)
+        pipeline.pfadd(
+            UNIQUES_KEY.format(variation_id=variation_id, field=field), subject_id
+        )
+    pipeline.expire(current_key, window_seconds * 2)
+    return checks
+
+
+def _read_dedup(replies, checks):
+    hashes = settings.EXPERIMENT_DEDUP_BLOOM_HASHES
+    new = []
+    for offset in checks:
+        if offset is None:
+            new.append(True)
+            continue
+        end = offset + hashes * 2
+        bits = replies[offset:end]
+        in_current = all(bits[0::2])
+        in_previous = all(bits[1::2])
+        new.append(not (in_current or in_previous))
+    return new
+
+
+def count_unique_events(variation_ids):
+    """
+    Estimate the distinct users and visitors that viewed and converted on
+    each variation, from their HyperLogLogs (standard error around 0.81%).
+
+    Returns:
+        dict: Maps each variation id to ``{"views": n, "conversions": n}``,
+        or an empty dict if Redis is unavailable.
+    """
+    pipeline = get_redis().pipeline(transaction=False)
+    for variation_id in variation_ids:
+        for field in UNIQUE_FIELDS:
+            pipeline.pfcount(UNIQUES_KEY.format(variation_id=variation_id, field=field))
+
+    try:
+        replies = iter(pipeline.execute())
+    except redis.RedisError as e:
+        logger.warning(f"Could not count unique tracking events: {e}")
+        return {}
+
+    return {
+        variation_id: {field: next(replies) for field in UNIQUE_FIELDS}
+        for variation_id in variation_ids
+    }
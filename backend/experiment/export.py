@@ -0,0 +1,212 @@
+import csv
+from itertools import islice
+from typing import NamedTuple
+
+from asgiref.sync import sync_to_async
+
+from experiment.models import Experiment, Variation, VariationStat
+from experiment.process import with_counter_totals
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+class ExportTable(NamedTuple):
+    queryset: callable  # returns the queryset to export, ordered by pk
+    columns: tuple  # (column name, queryset field, column type) triples
+
+
+EXPORT_TABLES = {
+    "experiments": ExportTable(
+        lambda: Experiment.objects.order_by("pk"),
+        (
+            ("id", "id", "int"),
+            ("name", "name", "string"),
+            ("description", "description", "string"),
+            ("is_active", "is_active", "bool"),
+            ("counter_shards", "counter_shards", "int"),
+            ("created_at", "created_at", "timestamp"),
+        ),
+    ),
+    "variations": ExportTable(
+        lambda: with_counter_totals(Variation.objects.order_by("pk")),
+        (
+            ("id", "id", "int"),
+            ("experiment_id", "experiment_id", "int"),
+            ("name", "name", "string"),
+            ("weight", "weight", "int"),
+            ("views", "total_views", "int"),
+            ("conversions", "total_conversions", "int"),
+            ("created_at", "created_at", "timestamp"),
+        ),
+    ),
+    "stats": ExportTable(
+        lambda: VariationStat.objects.order_by("pk"),
+        (
+            ("id", "id", "int"),
+            ("variation_id", "variation_id", "int"),
+            ("period", "period", "string"),
+            ("bucket", "bucket", "timestamp"),
+            ("views", "views", "int"),
+            ("conversions", "conversions", "int"),
+        ),
+    ),
+}
+
+
+class ExportError(Exception):
+    pass
+
+
+def export_rows(table, chunk_size):
+    """
+    Yield the rows of an export table as tuples.
+
+    Rows are read through a server-side cursor ``chunk_size`` rows at a time,
+    so memory use does not grow with the size of the table.
+    """
+    spec = EXPORT_TABLES[table]
+    fields = [field for _, field, _ in spec.columns]
+    return spec.queryset().values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+class _Echo:
+    """
+    File-like object that hands back whatever is written to it, so
+    ``csv.writer`` can format rows one at a time.
+    """
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(table, chunk_size):
+    """
+    Yield an export table as CSV, header first, then one block of lines per
+    ``chunk_size`` rows.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _, _ in EXPORT_TABLES[table].columns])
+    rows = export_rows(table, chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        yield "".join(writer.writerow(row) for row in chunk)
+
+
+class _ParquetSink:
+    """
+    Write-only file-like object collecting the bytes the Parquet writer
+    produces until they are drained into the response.
+    """
+
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_parquet(table, chunk_size):
+    """
+    Yield an export table as a Parquet file, one row group per
+    ``chunk_size`` rows.
+
+    Raises:
+        ExportError: If pyarrow is not installed.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportError("Parquet export requires the pyarrow package.")
+
+    types = {
+        "int": pa.int64(),
+        "string": pa.string(),
+        "bool": pa.bool_(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+    }
+    columns = EXPORT_TABLES[table].columns
+    schema = pa.schema([(name, types[kind]) for name, _, kind in columns])
+
+    return _parquet_chunks(pa, pq, schema, export_rows(table, chunk_size), chunk_size)
+
+
+def _parquet_chunks(pa, pq, schema, rows, chunk_size):
+    sink = _ParquetSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == chunk_size:
+                writer.write_batch(_record_batch(pa, schema, batch))
+                batch = []
+                yield sink.drain()
+        if batch:
+            writer.write_batch(_record_batch(pa, schema, batch))
+    yield sink.drain()
+
+
+def _record_batch(pa, schema, rows):
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(column, type=field.type)
+            for column, field in zip(zip(*rows), schema)
+        ],
+        schema=schema,
+    )
+
+
+def stream_export(table, file_format, chunk_size):
+    """
+    Yield an export table in ``csv`` or ``parquet`` format.
+
+    Raises:
+        ExportError: If the table or format is unknown, or the format's
+            dependencies are missing.
+    """
+    if table not in EXPORT_TABLES:
+        raise ExportError(
+            f"Unknown table '{table}'. Choose one of: {', '.join(EXPORT_TABLES)}."
+        )
+    if file_format == "csv":
+        return stream_csv(table, chunk_size)
+    if file_format == "parquet":
+        return stream_parquet(table, chunk_size)
+    raise ExportError(
+        f"Unknown format '{file_format}'. Choose one of: {', '.join(FORMATS)}."
+    )
+
+
+async def aiter_export(chunks):
+    """
+    Iterate an export stream from async code, advancing it in a worker thread
+    so each chunk is read from the database off the event loop.
+
+    Under ASGI, Django reads a synchronous streaming response into a list
+    before sending it, so the export has to be handed over as an async
+    iterator to keep memory use bounded.
+    """
+    done = object()
+    while (chunk := await sync_to_async(next)(chunks, done)) is not done:
+        yield chunk
@@ -0,0 +1,79 @@
+import asyncio
+import json
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, override_settings
+
+from experiment.models import Experiment, Variation
+from experiment.process import flush_buffered_events
+
+ENDPOINTS = {
+    "sync": "/api/experiments/{id}/track-view",
+    "async": "/api/async/experiments/{id}/track-view",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Send concurrent view tracking requests through the ASGI handler to "
+        "the synchronous DRF endpoint and its async counterpart, and report "
+        "throughput. Pass --buffer to track through Redis, where the async "
+        "endpoint never leaves the event loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument(
+            "--buffer",
+            action="store_true",
+            help="Enable EXPERIMENT_TRACKING_BUFFER (requires Redis)",
+        )
+
+    def handle(self, *args, **options):
+        overrides = {"ALLOWED_HOSTS": ["testserver"]}
+        if options["buffer"]:
+            overrides["EXPERIMENT_TRACKING_BUFFER"] = True
+
+        with override_settings(**overrides):
+            for name, url in ENDPOINTS.items():
+                experiment = Experiment.objects.create(name=f"benchmark-{uuid.uuid4()}")
+                variation = Variation.objects.create(
+                    experiment=experiment, name="control"
+                )
+                try:
+                    elapsed, ok = asyncio.run(
+                        self.run_requests(
+                            url.format(id=experiment.id),
+                            options["requests"],
+                            options["concurrency"],
+                        )
+                    )
+                    if options["buffer"]:
+                        flush_buffered_events()
+                    variation.refresh_from_db()
+                    self.stdout.write(
+                        f"{name}: {options['requests']} requests in {elapsed:.2f}s "
+                        f"({options['requests'] / elapsed:,.0f} req/s), "
+                        f"ok={ok} recorded={variation.views}"
+                    )
+                finally:
+                    experiment.delete()
+
+    async def run_requests(self, url, requests, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+        body = json.dumps({"variation": "control"})
+
+        async def send():
+            async with semaphore:
+                response = await client.post(
+                    url, data=body, content_type="application/json"
+                )
+                return response.status_code == 200
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(send() for _ in range(requests)))
+        return time.perf_counter() - start, sum(results)
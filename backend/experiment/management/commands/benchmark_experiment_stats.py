@@ -0,0 +1,90 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from experiment.stats import (
+    DEFAULT_SAMPLES,
+    compare_variations,
+    probability_to_beat_control,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the report statistics on synthetic counts, comparing one "
+        "vectorised pass over every experiment with one call per experiment, "
+        "and the P(beat control) approximation with Monte Carlo draws only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--experiments", type=int, default=1000)
+        parser.add_argument("--variations", type=int, default=10)
+        parser.add_argument(
+            "--samples",
+            type=int,
+            default=DEFAULT_SAMPLES,
+            help="Posterior draws per variation",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        experiments = options["experiments"]
+        variations = options["variations"]
+        samples = options["samples"]
+
+        rng = np.random.default_rng(options["seed"])
+        total = experiments * variations
+        views = rng.integers(100, 100_000, size=total)
+        conversions = rng.binomial(views, rng.uniform(0.01, 0.2, size=total))
+        control_index = np.repeat(np.arange(experiments) * variations, variations)
+
+        start = time.perf_counter()
+        compare_variations(conversions, views, control_index, samples=samples)
+        vectorised = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for offset in range(0, total, variations):
+            block = slice(offset, offset + variations)
+            compare_variations(
+                conversions[block],
+                views[block],
+                control_index[block] - offset,
+                samples=samples,
+            )
+        per_experiment = time.perf_counter() - start
+
+        control_conversions = conversions[control_index]
+        control_views = views[control_index]
+        start = time.perf_counter()
+        approximated = probability_to_beat_control(
+            conversions, views, control_conversions, control_views, samples=samples
+        )
+        approximated_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sampled = probability_to_beat_control(
+            conversions,
+            views,
+            control_conversions,
+            control_views,
+            samples=samples,
+            normal_min=np.inf,
+        )
+        sampled_time = time.perf_counter() - start
+
+        self.stdout.write(
+            f"{experiments} experiments x {variations} variations, "
+            f"{samples} posterior draws each"
+        )
+        self.stdout.write(f"vectorised: {vectorised:.3f}s")
+        self.stdout.write(
+            f"per experiment: {per_experiment:.3f}s "
+            f"({per_experiment / vectorised:.1f}x slower)"
+        )
+        self.stdout.write(f"P(beat control): {approximated_time:.3f}s")
+        self.stdout.write(
+            f"P(beat control), Monte Carlo only: {sampled_time:.3f}s "
+            f"({sampled_time / approximated_time:.1f}x slower, "
+            f"max difference {np.abs(approximated - sampled).max():.4f})"
+        )
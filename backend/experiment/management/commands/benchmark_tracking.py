@@ -0,0 +1,86 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from experiment.models import Experiment, Variation
+from experiment.process import track_variation_event
+
+
+def naive_increment(experiment_id, variation_name):
+    """The read-modify-write the tracking endpoints used to perform."""
+    variation = Variation.objects.get(experiment_id=experiment_id, name=variation_name)
+    variation.views += 1
+    variation.save()
+
+
+def atomic_increment(experiment_id, variation_name):
+    track_variation_event(experiment_id, variation_name, "view")
+
+
+STRATEGIES = {
+    "naive": naive_increment,
+    "atomic": atomic_increment,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer a throwaway variation with concurrent view tracking and report "
+        "lost increments and throughput for each counter strategy. Run it "
+        "against Postgres; SQLite serialises writers and is not representative."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--hits", type=int, default=500, help="Hits per thread")
+        parser.add_argument(
+            "--strategy",
+            choices=list(STRATEGIES),
+            action="append",
+            help="Strategy to benchmark (repeatable). Defaults to all.",
+        )
+
+    def handle(self, *args, **options):
+        threads = options["threads"]
+        hits = options["hits"]
+        strategies = options["strategy"] or list(STRATEGIES)
+        expected = threads * hits
+
+        for name in strategies:
+            experiment = Experiment.objects.create(name=f"benchmark-{uuid.uuid4()}")
+            variation = Variation.objects.create(experiment=experiment, name="control")
+            try:
+                elapsed, errors = self.run_strategy(
+                    STRATEGIES[name], experiment.id, variation.name, threads, hits
+                )
+                variation.refresh_from_db()
+                lost = expected - variation.views - errors
+                self.stdout.write(
+                    f"{name}: {expected} hits in {elapsed:.2f}s "
+                    f"({expected / elapsed:,.0f} hits/s), "
+                    f"recorded={variation.views} lost={lost} errors={errors}"
+                )
+            finally:
+                experiment.delete()
+
+    def run_strategy(self, func, experiment_id, variation_name, threads, hits):
+        def worker():
+            errors = 0
+            try:
+                for _ in range(hits):
+                    try:
+                        func(experiment_id, variation_name)
+                    except Exception:
+                        errors += 1
+            finally:
+                connection.close()
+            return errors
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            futures = [pool.submit(worker) for _ in range(threads)]
+            errors = sum(future.result() for future in futures)
+        return time.perf_counter() - start, errors
@@ -0,0 +1,42 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from experiment.export import EXPORT_TABLES, FORMATS, ExportError, stream_export
+
+
+class Command(BaseCommand):
+    help = (
+        "Export experiment data as CSV or Parquet for loading into the "
+        "analytics warehouse. Rows are streamed, so memory use stays flat "
+        "however large the table is."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("table", choices=list(EXPORT_TABLES))
+        parser.add_argument("--format", choices=list(FORMATS), default="csv")
+        parser.add_argument(
+            "--output", help="File to write to. Defaults to standard output."
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=settings.EXPERIMENT_EXPORT_CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        try:
+            content = stream_export(
+                options["table"], options["format"], options["chunk_size"]
+            )
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        if options["output"]:
+            with open(options["output"], "wb") as output:
+                self.write_chunks(content, output)
+        else:
+            self.write_chunks(content, sys.stdout.buffer)
+
+    def write_chunks(self, content, output):
+        for chunk in content:
+            output.write(chunk.encode() if isinstance(chunk, str) else chunk)
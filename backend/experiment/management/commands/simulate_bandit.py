@@ -0,0 +1,114 @@
+import time
+from itertools import accumulate
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from experiment.assignment import AssignmentTable
+from experiment.bandit import bandit_weights
+from experiment.models import Experiment
+
+MODES = [Experiment.STATIC, Experiment.THOMPSON, Experiment.UCB1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay synthetic traffic against each allocation mode offline and "
+        "report conversions, regret and assignment throughput. Nothing is "
+        "read from or written to the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rates",
+            default="0.04,0.05,0.06,0.08",
+            help="Comma separated true conversion rate of each arm",
+        )
+        parser.add_argument("--visitors", type=int, default=100_000)
+        parser.add_argument(
+            "--recompute-every",
+            type=int,
+            default=1000,
+            help="Visitors between weight recomputations",
+        )
+        parser.add_argument("--min-share", type=float, default=0.01)
+        parser.add_argument("--samples", type=int, default=10000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--mode",
+            choices=MODES,
+            action="append",
+            help="Allocation mode to simulate (repeatable). Defaults to all.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            rates = np.array([float(rate) for rate in options["rates"].split(",")])
+        except ValueError:
+            raise CommandError("--rates must be a comma separated list of numbers.")
+
+        self.stdout.write(
+            f"{options['visitors']:,} visitors, arms {rates.tolist()}, "
+            f"recomputing every {options['recompute_every']:,}"
+        )
+        for mode in options["mode"] or MODES:
+            result = self.simulate(mode, rates, options)
+            self.stdout.write(
+                f"{mode}: conversions={result['conversions']:,} "
+                f"regret={result['regret']:,.1f} "
+                f"best arm share={result['best_share']:.1%} "
+                f"assignments/s={result['picks_per_second']:,.0f} "
+                f"recompute={result['recompute_ms']:.2f}ms"
+            )
+
+    def simulate(self, mode, rates, options):
+        rng = np.random.default_rng(options["seed"])
+        arms = rates.shape[0]
+        names = tuple(range(arms))
+        views = np.zeros(arms, dtype=np.int64)
+        conversions = np.zeros(arms, dtype=np.int64)
+        weights = [1] * arms
+
+        pick_seconds = 0.0
+        recompute_seconds = 0.0
+        recomputes = 0
+        visitor = 0
+        while visitor < options["visitors"]:
+            batch = min(options["recompute_every"], options["visitors"] - visitor)
+            table = AssignmentTable(1, "simulation", tuple(accumulate(weights)), names)
+
+            start = time.perf_counter()
+            picked = np.fromiter(
+                (table.pick(f"visitor-{i}") for i in range(visitor, visitor + batch)),
+                dtype=np.int64,
+                count=batch,
+            )
+            pick_seconds += time.perf_counter() - start
+
+            converted = rng.random(batch) < rates[picked]
+            views += np.bincount(picked, minlength=arms)
+            conversions += np.bincount(picked[converted], minlength=arms)
+            visitor += batch
+
+            if mode != Experiment.STATIC:
+                start = time.perf_counter()
+                weights = bandit_weights(
+                    mode,
+                    conversions,
+                    views,
+                    options["min_share"],
+                    options["samples"],
+                    rng,
+                )
+                recompute_seconds += time.perf_counter() - start
+                recomputes += 1
+
+        best = rates.argmax()
+        return {
+            "conversions": int(conversions.sum()),
+            # Expected conversions lost by not always showing the best arm
+            "regret": float(rates[best] * views.sum() - (rates * views).sum()),
+            "best_share": views[best] / views.sum(),
+            "picks_per_second": views.sum() / pick_seconds,
+            "recompute_ms": recompute_seconds / max(recomputes, 1) * 1000,
+        }
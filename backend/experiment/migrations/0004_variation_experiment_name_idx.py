@@ -0,0 +1,19 @@
+# Generated by Django 5.1.15 on 2026-10-17 19:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("experiment", "0003_rename_conversion_count_variation_conversions_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="variation",
+            index=models.Index(
+                fields=["experiment", "name"], name="variation_experiment_name_idx"
+            ),
+        ),
+    ]
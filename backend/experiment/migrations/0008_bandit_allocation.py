@@ -0,0 +1,31 @@
+# Generated by Django 5.1.15 on 2026-10-17 19:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("experiment", "0007_variation_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="experiment",
+            name="allocation_mode",
+            field=models.CharField(
+                choices=[
+                    ("static", "Static weights"),
+                    ("thompson", "Thompson sampling"),
+                    ("ucb1", "UCB1"),
+                ],
+                default="static",
+                max_length=8,
+            ),
+        ),
+        migrations.AddField(
+            model_name="variation",
+            name="bandit_weight",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.15 on 2026-10-17 20:09
+
+from django.db import migrations
+
+import experiment.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("experiment", "0008_bandit_allocation"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="variationstat",
+            name="unique_variation_stat_bucket",
+        ),
+        migrations.RemoveIndex(
+            model_name="variationstat",
+            name="variation_stat_covering_idx",
+        ),
+        migrations.AddConstraint(
+            model_name="variationstat",
+            constraint=experiment.models.CoveringUniqueConstraint(
+                fields=("variation", "period", "bucket"),
+                include=("views", "conversions"),
+                name="unique_variation_stat_bucket",
+            ),
+        ),
+    ]
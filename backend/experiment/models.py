@@ -1,11 +1,65 @@
 from django.db import models
 
 
+class CoveringUniqueConstraint(models.UniqueConstraint):
+    """
+    Unique constraint with ``include`` columns that, on databases without
+    covering indexes, is created as a plain unique constraint instead of
+    being skipped altogether like ``UniqueConstraint``.
+    """
+
+    def _without_include(self, schema_editor):
+        if schema_editor.connection.features.supports_covering_indexes:
+            return self
+        constraint = self.clone()
+        constraint.include = ()
+        return constraint
+
+    def _check(self, model, connection):
+        # Drop the warning that the constraint won't be created
+        return [
+            error
+            for error in super()._check(model, connection)
+            if error.id != "models.W039"
+        ]
+
+    def constraint_sql(self, model, schema_editor):
+        return models.UniqueConstraint.constraint_sql(
+            self._without_include(schema_editor), model, schema_editor
+        )
+
+    def create_sql(self, model, schema_editor):
+        return models.UniqueConstraint.create_sql(
+            self._without_include(schema_editor), model, schema_editor
+        )
+
+    def remove_sql(self, model, schema_editor):
+        return models.UniqueConstraint.remove_sql(
+            self._without_include(schema_editor), model, schema_editor
+        )
+
+
 class Experiment(models.Model):
+    STATIC = "static"
+    THOMPSON = "thompson"
+    UCB1 = "ucb1"
+    ALLOCATION_MODES = [
+        (STATIC, "Static weights"),
+        (THOMPSON, "Thompson sampling"),
+        (UCB1, "UCB1"),
+    ]
+
     name = models.CharField(max_length=255, unique=True)
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
+    # Number of counter rows tracking hits are spread over (1 = no sharding)
+    counter_shards = models.PositiveSmallIntegerField(default=1)
+    # How traffic is split between variations: by their static weight, or by
+    # bandit weights recomputed periodically from views and conversions
+    allocation_mode = models.CharField(
+        max_length=8, choices=ALLOCATION_MODES, default=STATIC
+    )
 
     def __str__(self):
         return self.name  # pragma: no cover
@@ -17,9 +71,96 @@ class Variation(models.Model):
     )
     name = models.CharField(max_length=255)
     weight = models.PositiveIntegerField(default=1)  # Weight for allocation
+    # Allocation weight computed by the bandit; None until first computed
+    bandit_weight = models.PositiveIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     views = models.PositiveIntegerField(default=0)
     conversions = models.PositiveIntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            # Tracking endpoints update variations by (experiment, name)
+            models.Index(
+                fields=["experiment", "name"], name="variation_experiment_name_idx"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.experiment.name} - {self.name}"  # pragma: no cover
+
+
+class VariationCounterShard(models.Model):
+    """
+    One of several rows that absorb tracking hits for a hot variation.
+
+    Hits land on a random shard so concurrent writers rarely contend for the
+    same row. Shard counts are periodically folded back into the Variation.
+    """
+
+    variation = models.ForeignKey(
+        Variation, related_name="shards", on_delete=models.CASCADE
+    )
+    shard = models.PositiveSmallIntegerField()
+    views = models.PositiveIntegerField(default=0)
+    conversions = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["variation", "shard"], name="unique_variation_counter_shard"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.variation} - shard {self.shard}"  # pragma: no cover
+
+
+class TrackingFlush(models.Model):
+    """
+    Records each batch of Redis-buffered tracking hits applied to the
+    database, so a batch re-claimed after a crash is never applied twice.
+    """
+
+    batch_id = models.CharField(max_length=32, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.batch_id  # pragma: no cover
+
+
+class VariationStat(models.Model):
+    """
+    Views and conversions of a variation within one hour or one day.
+
+    Hits are rolled up into hour buckets as they are tracked. Old hour
+    buckets are periodically compacted into day buckets.
+    """
+
+    HOUR = "hour"
+    DAY = "day"
+    PERIOD_CHOICES = [
+        (HOUR, "Hour"),
+        (DAY, "Day"),
+    ]
+
+    variation = models.ForeignKey(
+        Variation, related_name="stats", on_delete=models.CASCADE
+    )
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    bucket = models.DateTimeField()  # Start of the hour or day (UTC)
+    views = models.PositiveIntegerField(default=0)
+    conversions = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Also covers chart queries so they are answered by index-only
+            # scans, without a second index to maintain on every upsert
+            CoveringUniqueConstraint(
+                fields=["variation", "period", "bucket"],
+                include=["views", "conversions"],
+                name="unique_variation_stat_bucket",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.variation} - {self.period} {self.bucket}"  # pragma: no cover
@@ -1,31 +1,557 @@
-from experiment.models import Experiment
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+from functools import reduce
+from operator import or_
+from typing import NamedTuple, Optional
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Case,
+    F,
+    PositiveIntegerField,
+    Prefetch,
+    Q,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
 
-def generate_active_experiments_report():
-    active_experiments = Experiment.objects.filter(is_active=True)
+from experiment.buffer import (
+    abuffer_events,
+    buffer_event,
+    buffer_events,
+    claim_buffered_events,
+    release_buffered_events,
+)
+from experiment.cache import aget_variation, get_variation
+from experiment.dedup import (
+    arecord_unique_events,
+    count_unique_events,
+    record_unique_events,
+)
+from experiment.models import (
+    Experiment,
+    TrackingFlush,
+    Variation,
+    VariationCounterShard,
+)
+from experiment.stats import compare_variations
+from experiment.timeseries import record_variation_stats
 
-    if not active_experiments.exists():
+# Maps a tracked event to the Variation counter it increments
+TRACKED_EVENTS = {
+    "view": "views",
+    "conversion": "conversions",
+}
+
+
+def track_variation_event(experiment_id, variation_name, event, subject_id=None):
+    """
+    Record a view or conversion for a variation of an experiment.
+
+    The variation is resolved from the in-process experiment cache and its
+    counter is incremented with a single UPDATE using an F-expression, so
+    concurrent hits never lose increments and neither the Experiment nor the
+    Variation instance is loaded. The hit is then upserted into the current
+    hour's stats. Experiments configured with more than one counter shard
+    take the sharded path instead, and their stats are recorded when the
+    shards are folded.
+
+    With ``EXPERIMENT_TRACKING_BUFFER`` enabled the hit is only counted in
+    Redis and later applied by ``flush_buffered_events``.
+
+    With ``EXPERIMENT_DEDUP_ENABLED`` and a ``subject_id`` (user or visitor
+    id), a repeated conversion of the same subject on the same experiment is
+    acknowledged but not counted, so client retries are idempotent.
+
+    Returns:
+        bool: True if the event was recorded or is a duplicate, False if no
+        variation with that name exists on the experiment.
+    """
+    field = TRACKED_EVENTS[event]
+    found = get_variation(experiment_id, variation_name)
+    if found is None:
+        return False
+
+    experiment, variation = found
+    if subject_id and settings.EXPERIMENT_DEDUP_ENABLED:
+        if not record_unique_events(subject_id, [(experiment.id, variation.id, field)])[
+            0
+        ]:
+            return True
+
+    if settings.EXPERIMENT_TRACKING_BUFFER:
+        buffer_event(experiment.id, variation.name, field)
+        return True
+
+    if experiment.counter_shards > 1:
+        increment_counter_shard(variation.id, experiment.counter_shards, {field: 1})
+        return True
+
+    updated = Variation.objects.filter(pk=variation.id).update(**{field: F(field) + 1})
+    if updated:
+        record_variation_stats({variation.id: {field: 1}})
+    return updated > 0
+
+
+def track_variation_events(events, subject_id=None):
+    """
+    Record a batch of views and conversions.
+
+    Variations are resolved from the experiment cache and every increment is
+    applied with one grouped UPDATE, whatever the size of the batch. Counts
+    for experiments with more than one counter shard are added to a shard
+    row per variation instead.
+    Duplicate conversions are dropped as in ``track_variation_event``, with
+    one Redis round trip for the whole batch.
+
+    Args:
+        events (list): ``(experiment_id, variation_name, event)`` tuples.
+        subject_id (str): User or visitor id the events belong to, if known.
+
+    Returns:
+        list: One bool per event, True if it was recorded or is a duplicate.
+    """
+    resolved = [
+        (get_variation(experiment_id, variation_name), TRACKED_EVENTS[event])
+        for experiment_id, variation_name, event in events
+    ]
+    tracked = [found is not None for found, _ in resolved]
+
+    if subject_id and settings.EXPERIMENT_DEDUP_ENABLED:
+        known = [(found, field) for found, field in resolved if found is not None]
+        new = record_unique_events(
+            subject_id,
+            [(found[0].id, found[1].id, field) for found, field in known],
+        )
+        resolved = [entry for entry, is_new in zip(known, new) if is_new]
+
+    if settings.EXPERIMENT_TRACKING_BUFFER:
+        buffer_events(
+            [
+                (found[0].id, found[1].name, field)
+                for found, field in resolved
+                if found is not None
+            ]
+        )
+    else:
+        deltas = defaultdict(lambda: {"views": 0, "conversions": 0})
+        counter_shards = {}
+        for found, field in resolved:
+            if found is not None:
+                experiment, variation = found
+                deltas[variation.id][field] += 1
+                counter_shards[variation.id] = experiment.counter_shards
+
+        for variation_id, shards in counter_shards.items():
+            if shards > 1:
+                increment_counter_shard(variation_id, shards, deltas.pop(variation_id))
+        apply_variation_deltas(deltas)
+
+    return tracked
+
+
+async def atrack_variation_event(experiment_id, variation_name, event, subject_id=None):
+    """
+    Async version of ``track_variation_event`` for ASGI views.
+
+    With ``EXPERIMENT_TRACKING_BUFFER`` enabled the variation is resolved
+    from the warm experiment cache and the hit is deduplicated and buffered
+    through the async Redis client, without leaving the event loop.
+    Otherwise the database write runs in a worker thread: Django's async ORM
+    executes queries in a thread as well, so calling the synchronous path
+    once costs a single hop rather than one per query.
+    """
+    if not settings.EXPERIMENT_TRACKING_BUFFER:
+        return await sync_to_async(track_variation_event)(
+            experiment_id, variation_name, event, subject_id
+        )
+
+    field = TRACKED_EVENTS[event]
+    found = await aget_variation(experiment_id, variation_name)
+    if found is None:
+        return False
+
+    experiment, variation = found
+    if subject_id and settings.EXPERIMENT_DEDUP_ENABLED:
+        new = await arecord_unique_events(
+            subject_id, [(experiment.id, variation.id, field)]
+        )
+        if not new[0]:
+            return True
+
+    await abuffer_events([(experiment.id, variation.name, field)])
+    return True
+
+
+async def atrack_variation_events(events, subject_id=None):
+    """
+    Async version of ``track_variation_events``, buffering through the async
+    Redis client when ``EXPERIMENT_TRACKING_BUFFER`` is enabled.
+    """
+    if not settings.EXPERIMENT_TRACKING_BUFFER:
+        return await sync_to_async(track_variation_events)(events, subject_id)
+
+    resolved = [
+        (await aget_variation(experiment_id, variation_name), TRACKED_EVENTS[event])
+        for experiment_id, variation_name, event in events
+    ]
+    tracked = [found is not None for found, _ in resolved]
+    known = [(found, field) for found, field in resolved if found is not None]
+
+    if subject_id and settings.EXPERIMENT_DEDUP_ENABLED:
+        new = await arecord_unique_events(
+            subject_id,
+            [(found[0].id, found[1].id, field) for found, field in known],
+        )
+        known = [entry for entry, is_new in zip(known, new) if is_new]
+
+    await abuffer_events(
+        [(found[0].id, found[1].name, field) for found, field in known]
+    )
+    return tracked
+
+
+def resolve_variation_ids(keys):
+    """
+    Look up variation ids for many ``(experiment_id, variation_name)`` pairs
+    with a single query.
+
+    Returns:
+        dict: Maps each pair that exists to its variation id.
+    """
+    if not keys:
+        return {}
+
+    lookup = reduce(
+        or_,
+        (
+            Q(experiment_id=experiment_id, name=variation_name)
+            for experiment_id, variation_name in keys
+        ),
+    )
+    return {
+        (experiment_id, name): variation_id
+        for variation_id, experiment_id, name in Variation.objects.filter(
+            lookup
+        ).values_list("id", "experiment_id", "name")
+    }
+
+
+def increment_counter_shard(variation_id, counter_shards, counts):
+    """
+    Add ``counts`` (counter field name to amount) to a randomly chosen counter
+    shard of a variation, creating the variation's shard rows on first use.
+    """
+    updates = {field: F(field) + amount for field, amount in counts.items() if amount}
+    if not updates:
+        return
+
+    shard = random.randrange(max(counter_shards, 1))
+    shard_rows = VariationCounterShard.objects.filter(
+        variation_id=variation_id, shard=shard
+    )
+    if shard_rows.update(**updates):
+        return
+
+    VariationCounterShard.objects.bulk_create(
+        [
+            VariationCounterShard(variation_id=variation_id, shard=index)
+            for index in range(max(counter_shards, 1))
+        ],
+        ignore_conflicts=True,
+    )
+    shard_rows.update(**updates)
+
+
+def apply_variation_deltas(deltas):
+    """
+    Add counter deltas to many variations with a single grouped UPDATE, and
+    roll them up into the current hour's stats.
+
+    Args:
+        deltas (dict): Maps a variation id to a dict of counter field name
+            (``views`` / ``conversions``) to the amount to add.
+
+    Returns:
+        int: The number of variations updated.
+    """
+    if not deltas:
+        return 0
+
+    updates = {}
+    for field in TRACKED_EVENTS.values():
+        whens = [
+            When(pk=variation_id, then=Value(counts[field]))
+            for variation_id, counts in deltas.items()
+            if counts.get(field)
+        ]
+        if whens:
+            updates[field] = F(field) + Case(
+                *whens, default=Value(0), output_field=PositiveIntegerField()
+            )
+
+    if not updates:
+        return 0
+    with transaction.atomic():
+        updated = Variation.objects.filter(pk__in=list(deltas)).update(**updates)
+        record_variation_stats(deltas)
+    return updated
+
+
+def fold_counter_shards():
+    """
+    Fold the counts accumulated on counter shards back into the Variation
+    totals and reset the shards.
+
+    Shard rows are locked while they are folded, so hits arriving
+    concurrently wait for the fold to commit and are never lost.
+
+    Returns:
+        int: The number of variations updated.
+    """
+    with transaction.atomic():
+        shards = list(
+            VariationCounterShard.objects.select_for_update()
+            .filter(Q(views__gt=0) | Q(conversions__gt=0))
+            .values_list("id", "variation_id", "views", "conversions")
+        )
+        if not shards:
+            return 0
+
+        deltas = defaultdict(lambda: {"views": 0, "conversions": 0})
+        for _, variation_id, views, conversions in shards:
+            deltas[variation_id]["views"] += views
+            deltas[variation_id]["conversions"] += conversions
+
+        updated = apply_variation_deltas(deltas)
+        VariationCounterShard.objects.filter(
+            id__in=[shard[0] for shard in shards]
+        ).update(views=0, conversions=0)
+        return updated
+
+
+def flush_buffered_events():
+    """
+    Apply the tracking hits buffered in Redis to the Variation counters with
+    one grouped UPDATE.
+
+    The batch id is recorded in the same transaction as the counter update,
+    and the Redis batch is only dropped after that commits. A worker crashing
+    at any point therefore leaves the batch to be retried, and a retried batch
+    that was already committed is skipped, so every hit is applied once.
+
+    Returns:
+        int: The number of variations updated.
+    """
+    batch_id, counts = claim_buffered_events()
+    if batch_id is None:
+        return 0
+
+    updated = 0
+    with transaction.atomic():
+        _, created = TrackingFlush.objects.get_or_create(batch_id=batch_id)
+        if created and counts:
+            variation_ids = resolve_variation_ids(counts)
+            deltas = {
+                variation_id: counts[key] for key, variation_id in variation_ids.items()
+            }
+            updated = apply_variation_deltas(deltas)
+
+        TrackingFlush.objects.filter(
+            created_at__lt=now()
+            - timedelta(days=settings.EXPERIMENT_FLUSH_RETENTION_DAYS)
+        ).delete()
+
+    release_buffered_events(batch_id)
+    return updated
+
+
+def with_counter_totals(variations):
+    """
+    Annotate a Variation queryset with ``total_views`` and
+    ``total_conversions``: the folded totals plus any counts still pending on
+    counter shards.
+    """
+    return variations.annotate(
+        total_views=F("views") + Coalesce(Sum("shards__views"), 0),
+        total_conversions=F("conversions") + Coalesce(Sum("shards__conversions"), 0),
+    )
+
+
+class VariationReport(NamedTuple):
+    name: str
+    weight: int
+    views: int
+    conversions: int
+    conversion_rate: float
+    ci_low: float
+    ci_high: float
+    is_control: bool
+    p_value: Optional[float]  # None for the control
+    p_beat_control: Optional[float]  # None for the control
+    # Estimated distinct users/visitors, None when deduplication is disabled
+    unique_views: Optional[int]
+    unique_conversions: Optional[int]
+
+
+class ExperimentReport(NamedTuple):
+    id: int
+    name: str
+    description: str
+    created_at: datetime
+    variations: tuple  # of VariationReport, control first
+
+
+# Column headers of a variation row in the report
+REPORT_COLUMNS = (
+    "Name",
+    "Weight",
+    "Views",
+    "Conversion Rate",
+    "CI Low",
+    "CI High",
+    "P-Value",
+    "P(Beat Control)",
+    "Unique Views",
+    "Unique Conversions",
+)
+
+
+def build_active_experiments_report():
+    """
+    Collect the statistics of every active experiment.
+
+    Experiments and their variations, with counter shard totals, are loaded
+    with one prefetched query each regardless of the number of experiments,
+    and the statistics of all variations are computed in a single vectorised
+    pass. The first variation of each experiment is its control. With
+    ``EXPERIMENT_DEDUP_ENABLED``, unique visitor estimates for every
+    variation are read from Redis in one pipelined round trip.
+
+    Returns:
+        list: An ``ExperimentReport`` per active experiment.
+    """
+    experiments = list(
+        Experiment.objects.filter(is_active=True)
+        .order_by("id")
+        .prefetch_related(
+            Prefetch(
+                "variations",
+                queryset=with_counter_totals(Variation.objects.order_by("id")),
+            )
+        )
+    )
+
+    variations = []
+    control_index = []
+    for experiment in experiments:
+        experiment_variations = experiment.variations.all()
+        control_index.extend([len(variations)] * len(experiment_variations))
+        variations.extend(experiment_variations)
+
+    stats = compare_variations(
+        [variation.total_conversions for variation in variations],
+        [variation.total_views for variation in variations],
+        control_index,
+    )
+    uniques = {}
+    if settings.EXPERIMENT_DEDUP_ENABLED:
+        uniques = count_unique_events([variation.id for variation in variations])
+
+    reports = []
+    position = 0
+    for experiment in experiments:
+        variation_reports = []
+        for variation in experiment.variations.all():
+            is_control = bool(stats["is_control"][position])
+            variation_reports.append(
+                VariationReport(
+                    name=variation.name,
+                    weight=variation.weight,
+                    views=variation.total_views,
+                    conversions=variation.total_conversions,
+                    conversion_rate=float(stats["rate"][position]),
+                    ci_low=float(stats["ci_low"][position]),
+                    ci_high=float(stats["ci_high"][position]),
+                    is_control=is_control,
+                    p_value=None if is_control else float(stats["p_value"][position]),
+                    p_beat_control=(
+                        None if is_control else float(stats["p_beat_control"][position])
+                    ),
+                    unique_views=uniques.get(variation.id, {}).get("views"),
+                    unique_conversions=uniques.get(variation.id, {}).get("conversions"),
+                )
+            )
+            position += 1
+        reports.append(
+            ExperimentReport(
+                id=experiment.id,
+                name=experiment.name,
+                description=experiment.description,
+                created_at=experiment.created_at,
+                variations=tuple(variation_reports),
+            )
+        )
+    return reports
+
+
+def format_variation_row(variation):
+    """
+    Format a ``VariationReport`` as the string cells of a report row, in
+    ``REPORT_COLUMNS`` order.
+    """
+    if variation.is_control:
+        p_value = p_beat_control = "control"
+    else:
+        p_value = f"{variation.p_value:.4f}"
+        p_beat_control = f"{variation.p_beat_control:.2%}"
+    return [
+        variation.name,
+        str(variation.weight),
+        str(variation.views),
+        f"{variation.conversion_rate:.2%}",
+        f"{variation.ci_low:.2%}",
+        f"{variation.ci_high:.2%}",
+        p_value,
+        p_beat_control,
+        "-" if variation.unique_views is None else str(variation.unique_views),
+        (
+            "-"
+            if variation.unique_conversions is None
+            else str(variation.unique_conversions)
+        ),
+    ]
+
+
+def generate_active_experiments_report(reports=None):
+    """
+    Render the active experiments report as plain text.
+
+    Args:
+        reports (list): ``ExperimentReport`` objects to render. Built with
+            ``build_active_experiments_report`` when omitted.
+    """
+    if reports is None:
+        reports = build_active_experiments_report()
+
+    if not reports:
         return "No active experiments found."
 
     report_lines = ["Active Experiments Report:"]
-    for experiment in active_experiments:
+    for experiment in reports:
         report_lines.append(f"\nExperiment: {experiment.name}")
         report_lines.append(f"Description: {experiment.description}")
         report_lines.append(f"Created at: {experiment.created_at}")
         report_lines.append("Variations:")
 
-        for variation in experiment.variations.all():
-            report_lines.append("Name,Weight,Views,Conversion Rate")
-            stats = (
-                variation.name,
-                variation.weight,
-                variation.views,
-                (
-                    f"{variation.conversions/variation.views:.2%}"
-                    if variation.views > 0
-                    else "0.00%"
-                ),
-            )
-            report_lines.append(f"{stats[0]},{stats[1]},{stats[2]},{stats[3]}")
+        for variation in experiment.variations:
+            report_lines.append(",".join(REPORT_COLUMNS))
+            report_lines.append(",".join(format_variation_row(variation)))
 
     return "\n".join(report_lines)
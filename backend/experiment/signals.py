@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from experiment.cache import invalidate_experiment_cache
+from experiment.models import Experiment, Variation
+
+
+@receiver([post_save, post_delete], sender=Experiment)
+@receiver([post_save, post_delete], sender=Variation)
+def invalidate_experiment_caches(sender, **kwargs):
+    invalidate_experiment_cache()
@@ -0,0 +1,214 @@
+import numpy as np
+
+# Two-sided 95% confidence
+Z_95 = 1.959963984540054
+# Beta posterior draws per variation when estimating P(beat control)
+DEFAULT_SAMPLES = 20000
+# Smallest beta posterior parameter from which P(beat control) is computed
+# from a normal approximation of the posterior log-odds instead of Monte Carlo
+# draws. From here its error is within the Monte Carlo error of
+# DEFAULT_SAMPLES draws.
+NORMAL_APPROX_MIN_COUNT = 100
+# Upper bound on the number of posterior draws held in memory at once
+MAX_DRAWS_PER_CHUNK = 2_000_000
+# Fixed seed so a report is reproducible for the same counts
+DEFAULT_SEED = 0
+
+
+def _counts(conversions, views):
+    """
+    Conversion and view counts as float arrays, with conversions capped at
+    views. Views and conversions are tracked independently, so a variation
+    can record more conversions than views, which no statistic below is
+    defined for.
+    """
+    views = np.asarray(views, dtype=np.float64)
+    conversions = np.minimum(np.asarray(conversions, dtype=np.float64), views)
+    return conversions, views
+
+
+def wilson_interval(conversions, views, z=Z_95):
+    """
+    Wilson score interval of the conversion rate of every variation.
+
+    Args:
+        conversions (array-like): Conversions per variation.
+        views (array-like): Views per variation.
+        z (float): Standard normal quantile of the interval.
+
+    Returns:
+        tuple: ``(low, high)`` arrays. Variations without views get ``(0, 0)``.
+    """
+    conversions, views = _counts(conversions, views)
+    seen = views > 0
+    n = np.where(seen, views, 1.0)
+    rate = conversions / n
+
+    z2 = z * z
+    denominator = 1 + z2 / n
+    centre = (rate + z2 / (2 * n)) / denominator
+    margin = z * np.sqrt(rate * (1 - rate) / n + z2 / (4 * n * n)) / denominator
+
+    low = np.where(seen, np.clip(centre - margin, 0, 1), 0.0)
+    high = np.where(seen, np.clip(centre + margin, 0, 1), 0.0)
+    return low, high
+
+
+def _erfc(x):
+    """
+    Complementary error function of a non-negative array.
+
+    NumPy has no vectorised erfc, so this uses the Abramowitz and Stegun
+    7.1.26 approximation (absolute error below 1.5e-7).
+    """
+    t = 1 / (1 + 0.3275911 * x)
+    poly = t * (
+        0.254829592
+        + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429)))
+    )
+    return poly * np.exp(-x * x)
+
+
+def two_proportion_p_values(conversions, views, control_conversions, control_views):
+    """
+    Two-sided p-values of a pooled two-proportion z-test of every variation
+    against its control.
+
+    Returns:
+        ndarray: One p-value per variation. Comparisons where either side has
+        no views, or where the pooled rate is 0 or 1, get a p-value of 1.
+    """
+    conversions, views = _counts(conversions, views)
+    control_conversions, control_views = _counts(control_conversions, control_views)
+
+    testable = (views > 0) & (control_views > 0)
+    n1 = np.where(testable, views, 1.0)
+    n2 = np.where(testable, control_views, 1.0)
+    pooled = (conversions + control_conversions) / (n1 + n2)
+    variance = pooled * (1 - pooled) * (1 / n1 + 1 / n2)
+    testable &= variance > 0
+
+    z = np.abs(conversions / n1 - control_conversions / n2) / np.sqrt(
+        np.where(testable, variance, 1.0)
+    )
+    return np.where(testable, np.clip(_erfc(z / np.sqrt(2)), 0, 1), 1.0)
+
+
+def _normal_cdf(z):
+    tail = 0.5 * _erfc(np.abs(z) / np.sqrt(2))
+    return np.where(z >= 0, 1 - tail, tail)
+
+
+def _log_odds_moments(alpha, beta):
+    """
+    Mean and variance of the log-odds of a Beta(alpha, beta) variable, i.e.
+    digamma(alpha) - digamma(beta) and trigamma(alpha) + trigamma(beta), from
+    their asymptotic series, which are accurate for parameters well above 10.
+    """
+
+    def digamma(x):
+        return np.log(x) - 1 / (2 * x) - 1 / (12 * x**2) + 1 / (120 * x**4)
+
+    def trigamma(x):
+        return 1 / x + 1 / (2 * x**2) + 1 / (6 * x**3) - 1 / (30 * x**5)
+
+    return digamma(alpha) - digamma(beta), trigamma(alpha) + trigamma(beta)
+
+
+def probability_to_beat_control(
+    conversions,
+    views,
+    control_conversions,
+    control_views,
+    samples=DEFAULT_SAMPLES,
+    seed=DEFAULT_SEED,
+    normal_min=NORMAL_APPROX_MIN_COUNT,
+):
+    """
+    Probability that each variation's conversion rate is higher than its
+    control's, under uniform Beta(1, 1) priors.
+
+    When every posterior parameter of a comparison is at least
+    ``normal_min``, the log-odds of both posteriors are close to normal and
+    the probability is computed in closed form. The remaining comparisons, with few
+    conversions or few non-conversions, are estimated from ``samples``
+    posterior draws, taken as one ``(variations, samples)`` array per chunk
+    of at most ``MAX_DRAWS_PER_CHUNK`` draws per side.
+
+    Returns:
+        ndarray: One probability per variation.
+    """
+    conversions, views = _counts(conversions, views)
+    control_conversions, control_views = _counts(control_conversions, control_views)
+    alpha, beta = 1 + conversions, 1 + views - conversions
+    control_alpha = 1 + control_conversions
+    control_beta = 1 + control_views - control_conversions
+
+    mean, variance = _log_odds_moments(alpha, beta)
+    control_mean, control_variance = _log_odds_moments(control_alpha, control_beta)
+    probabilities = _normal_cdf(
+        (mean - control_mean) / np.sqrt(variance + control_variance)
+    )
+
+    smallest = np.minimum.reduce([alpha, beta, control_alpha, control_beta])
+    sampled = np.flatnonzero(smallest < normal_min)
+    rng = np.random.default_rng(seed)
+    chunk_size = max(1, MAX_DRAWS_PER_CHUNK // samples)
+    for start in range(0, sampled.shape[0], chunk_size):
+        end = start + chunk_size
+        chunk = sampled[start:end]
+        shape = (chunk.shape[0], samples)
+        variation_draws = rng.beta(alpha[chunk, None], beta[chunk, None], size=shape)
+        control_draws = rng.beta(
+            control_alpha[chunk, None], control_beta[chunk, None], size=shape
+        )
+        probabilities[chunk] = (variation_draws > control_draws).mean(axis=1)
+    return probabilities
+
+
+def compare_variations(
+    conversions, views, control_index, samples=DEFAULT_SAMPLES, seed=DEFAULT_SEED
+):
+    """
+    Compute the statistics of every variation of every experiment in one
+    vectorised pass.
+
+    Args:
+        conversions (array-like): Conversions per variation, for all
+            experiments concatenated.
+        views (array-like): Views per variation, in the same order.
+        control_index (array-like): For each variation, the position of its
+            experiment's control variation in the same arrays.
+        samples (int): Posterior draws per variation for P(beat control),
+            where it is not computed in closed form.
+        seed (int): Seed of the Monte Carlo random generator.
+
+    Returns:
+        dict: Arrays ``rate``, ``ci_low``, ``ci_high``, ``p_value`` and
+        ``p_beat_control``, plus the boolean array ``is_control``.
+    """
+    conversions, views = _counts(conversions, views)
+    control_index = np.asarray(control_index, dtype=np.intp)
+    control_conversions = conversions[control_index]
+    control_views = views[control_index]
+
+    ci_low, ci_high = wilson_interval(conversions, views)
+    return {
+        "rate": np.divide(
+            conversions, views, out=np.zeros_like(conversions), where=views > 0
+        ),
+        "ci_low": ci_low,
+        "ci_high": ci_high,
+        "p_value": two_proportion_p_values(
+            conversions, views, control_conversions, control_views
+        ),
+        "p_beat_control": probability_to_beat_control(
+            conversions,
+            views,
+            control_conversions,
+            control_views,
+            samples=samples,
+            seed=seed,
+        ),
+        "is_control": control_index == np.arange(control_index.shape[0]),
+    }
@@ -0,0 +1,141 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncDay
+from django.utils.timezone import now
+
+from experiment.models import VariationStat
+
+TRUNCATE = {
+    VariationStat.HOUR: {"minute": 0, "second": 0, "microsecond": 0},
+    VariationStat.DAY: {"hour": 0, "minute": 0, "second": 0, "microsecond": 0},
+}
+
+
+def bucket_start(at, period):
+    """
+    Return the start of the hour or day bucket containing ``at``.
+    """
+    return at.replace(**TRUNCATE[period])
+
+
+def record_variation_stats(deltas, at=None, period=VariationStat.HOUR):
+    """
+    Add counter deltas to the time buckets containing ``at``.
+
+    Every bucket is upserted with a single
+    ``INSERT ... ON CONFLICT DO UPDATE`` that adds to the existing counts.
+
+    Args:
+        deltas (dict): Maps a variation id to a dict of counter field name
+            (``views`` / ``conversions``) to the amount to add.
+        at (datetime): When the hits happened. Defaults to now.
+        period (str): ``VariationStat.HOUR`` or ``VariationStat.DAY``.
+    """
+    rows = [
+        (variation_id, counts.get("views", 0), counts.get("conversions", 0))
+        for variation_id, counts in deltas.items()
+        if counts.get("views") or counts.get("conversions")
+    ]
+    if not rows:
+        return
+
+    bucket = connection.ops.adapt_datetimefield_value(bucket_start(at or now(), period))
+    _upsert(
+        [
+            (variation_id, period, bucket, views, conversions)
+            for variation_id, views, conversions in rows
+        ]
+    )
+
+
+def _upsert(rows):
+    qn = connection.ops.quote_name
+    table = qn(VariationStat._meta.db_table)
+    values = ", ".join(["(%s, %s, %s, %s, %s)"] * len(rows))
+    sql = (
+        f"INSERT INTO {table} "
+        f"({qn('variation_id')}, {qn('period')}, {qn('bucket')}, "
+        f"{qn('views')}, {qn('conversions')}) "
+        f"VALUES {values} "
+        f"ON CONFLICT ({qn('variation_id')}, {qn('period')}, {qn('bucket')}) "
+        f"DO UPDATE SET {qn('views')} = {table}.{qn('views')} + EXCLUDED.{qn('views')}, "
+        f"{qn('conversions')} = {table}.{qn('conversions')} "
+        f"+ EXCLUDED.{qn('conversions')}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [value for row in rows for value in row])
+
+
+def compact_variation_stats(hourly_retention_days, retention_days):
+    """
+    Compact hour buckets older than ``hourly_retention_days`` into day
+    buckets and delete day buckets older than ``retention_days``.
+
+    Returns:
+        int: The number of hour buckets compacted.
+    """
+    cutoff = bucket_start(now(), VariationStat.DAY) - timedelta(
+        days=hourly_retention_days
+    )
+    with transaction.atomic():
+        old_hours = VariationStat.objects.filter(
+            period=VariationStat.HOUR, bucket__lt=cutoff
+        )
+        days = (
+            old_hours.annotate(day=TruncDay("bucket"))
+            .values("variation_id", "day")
+            .annotate(views_sum=Sum("views"), conversions_sum=Sum("conversions"))
+        )
+        rows = [
+            (
+                day["variation_id"],
+                VariationStat.DAY,
+                connection.ops.adapt_datetimefield_value(day["day"]),
+                day["views_sum"],
+                day["conversions_sum"],
+            )
+            for day in days
+        ]
+        if rows:
+            _upsert(rows)
+        compacted, _ = old_hours.delete()
+
+        VariationStat.objects.filter(
+            period=VariationStat.DAY,
+            bucket__lt=cutoff - timedelta(days=retention_days),
+        ).delete()
+    return compacted
+
+
+def daily_variation_stats(variation_ids, days):
+    """
+    Return the daily views and conversions of variations over the last
+    ``days`` days, merging recent hour buckets into their days.
+
+    Returns:
+        dict: Maps each variation id to a list of
+        ``{"date", "views", "conversions"}`` dicts in date order.
+    """
+    since = bucket_start(now(), VariationStat.DAY) - timedelta(days=days - 1)
+    rows = VariationStat.objects.filter(
+        variation_id__in=variation_ids,
+        period__in=[VariationStat.HOUR, VariationStat.DAY],
+        bucket__gte=since,
+    ).values_list("variation_id", "bucket", "views", "conversions")
+
+    totals = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+    for variation_id, bucket, views, conversions in rows.iterator():
+        day = totals[variation_id][bucket.date()]
+        day[0] += views
+        day[1] += conversions
+
+    return {
+        variation_id: [
+            {"date": date.isoformat(), "views": views, "conversions": conversions}
+            for date, (views, conversions) in sorted(totals[variation_id].items())
+        ]
+        for variation_id in variation_ids
+    }
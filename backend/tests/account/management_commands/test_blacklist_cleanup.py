@@ -39,3 +39,15 @@ class BlacklistCleanupCommandTest(TestCase):
         self.assertEqual(
             OutstandingToken.objects.filter(expires_at__gt=timezone.now()).count(), 1
         )
+
+    def test_blacklist_cleanup_command_resumes_after_id(self):
+        out = StringIO()
+        call_command(
+            "blacklist_cleanup", batch_size=1, sleep=0, start_after=2, stdout=out
+        )
+
+        self.assertIn(
+            "Successfully deleted 0 expired outstanding tokens.", out.getvalue()
+        )
+        self.assertEqual(OutstandingToken.objects.count(), 2)
+        self.assertIn("blacklisted tokens: deleted 1 in 1 batches", out.getvalue())
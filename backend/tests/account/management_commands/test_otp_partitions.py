@@ -0,0 +1,35 @@
+from datetime import date, datetime, timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from account.partitions import is_partitioned, partition_bounds, partition_name
+from worker.tasks import maintain_otp_partitions
+
+
+class OtpPartitionsCommandTest(TestCase):
+    def test_partition_name_and_bounds(self):
+        day = date(2024, 1, 31)
+
+        self.assertEqual(partition_name(day), "otp_p20240131")
+        self.assertEqual(
+            partition_bounds(day),
+            (
+                datetime(2024, 1, 31, tzinfo=timezone.utc),
+                datetime(2024, 2, 1, tzinfo=timezone.utc),
+            ),
+        )
+
+    def test_refuses_on_other_databases(self):
+        for action in ["convert", "create", "drop-expired"]:
+            with self.subTest(action=action):
+                with self.assertRaises(CommandError):
+                    call_command("otp_partitions", action, stdout=StringIO())
+
+    def test_maintenance_task_skips_unpartitioned_table(self):
+        self.assertFalse(is_partitioned())
+        # Only the task's savepoint
+        with self.assertNumQueries(2):
+            maintain_otp_partitions()
@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+from account import blacklist
+from account.blacklist import (
+    BlacklistFilter,
+    BloomRefreshToken,
+    _handle_blacklisted,
+    clear_blacklist_filter,
+    get_blacklist_filter,
+)
+
+
+class BlacklistFilterTest(TestCase):
+    def test_contains_added_jtis(self):
+        blacklist = BlacklistFilter(bits=2**16, hashes=7)
+        blacklist.add("jti-1")
+
+        self.assertIn("jti-1", blacklist)
+        self.assertNotIn("jti-2", blacklist)
+
+
+class BloomRefreshTokenTest(TestCase):
+    def setUp(self):
+        clear_blacklist_filter()
+        self.addCleanup(clear_blacklist_filter)
+        self.user = get_user_model().objects.create_user(
+            username="vimes", email="vimes@watch.ankh", password="bootstheory123"
+        )
+        self.token = str(BloomRefreshToken.for_user(self.user))
+
+    def test_valid_token_is_checked_without_queries(self):
+        get_blacklist_filter()
+
+        with self.assertNumQueries(0):
+            BloomRefreshToken(self.token)
+
+    def test_blacklisted_token_is_rejected(self):
+        BloomRefreshToken(self.token).blacklist()
+
+        with self.assertRaises(TokenError):
+            BloomRefreshToken(self.token)
+
+    def test_filter_is_built_from_database(self):
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get())
+
+        with self.assertRaises(TokenError):
+            BloomRefreshToken(self.token)
+
+    @override_settings(JWT_BLACKLIST_SYNC_SECONDS=0)
+    def test_filter_picks_up_tokens_blacklisted_elsewhere(self):
+        BloomRefreshToken(self.token)
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get())
+
+        with self.assertRaises(TokenError):
+            BloomRefreshToken(self.token)
+
+    @override_settings(JWT_BLACKLIST_SYNC_SECONDS=0)
+    def test_stale_filter_served_while_another_thread_rebuilds(self):
+        current = get_blacklist_filter()
+
+        with blacklist._rebuild_lock:
+            with self.assertNumQueries(0):
+                self.assertIs(get_blacklist_filter(), current)
+
+        self.assertIsNot(get_blacklist_filter(), current)
+
+    def test_broadcast_blacklisting(self):
+        get_blacklist_filter()
+        jti = BloomRefreshToken(self.token)["jti"]
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get())
+
+        _handle_blacklisted(jti.encode())
+
+        self.assertIn(jti, get_blacklist_filter())
+        with self.assertRaises(TokenError):
+            BloomRefreshToken(self.token)
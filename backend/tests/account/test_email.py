@@ -2,17 +2,24 @@ from datetime import datetime
 from unittest.mock import patch
 
 from django.conf import settings
+from django.core import mail
+from django.core.mail import get_connection
 from django.core.management import call_command
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from account.emails import (
     Email,
     experiment_report_email,
     initiate_password_reset_email,
     password_changed_email,
+    send_batch,
+    send_broadcast,
     verification_email,
 )
+from account.rendering import _render_email, email_cache, get_email_template
+from account.templatetags.email_tags import fragment_cache
 from experiment.models import Experiment
+from experiment.process import REPORT_COLUMNS, build_active_experiments_report
 
 
 class TestEmailClass(TestCase):
@@ -34,8 +41,8 @@ class TestEmailClass(TestCase):
 
     def test_get_template(self):
         """Test that the correct template path is returned."""
-        template_path = self.email._get_template()
-        self.assertEqual(template_path, f"email/{self.template}.html")
+        template = get_email_template(self.email.template)
+        self.assertEqual(template.template.name, f"email/{self.template}.html")
 
     def test_add_context(self):
         """Test that context can be added to the email."""
@@ -146,13 +153,14 @@ class TestEmailClass(TestCase):
         self.assertEqual(str(context.exception), "No content to send.")
 
     @patch("account.emails.EmailMultiAlternatives.send")
-    @patch("account.emails.render_to_string")
-    @patch("account.emails.strip_tags")
-    def test_send_email(self, mock_strip_tags, mock_render_to_string, mock_send):
+    @patch("account.emails.render_email")
+    def test_send_email(self, mock_render_email, mock_send):
         """Test that an email is sent with the correct content."""
-        # Mock the HTML and text content rendering
-        mock_render_to_string.return_value = "<p>This is a test email</p>"
-        mock_strip_tags.return_value = "This is a test email"
+        mock_render_email.return_value = (
+            "This is a test email",
+            "<p>This is a test email</p>",
+        )
+        mock_send.return_value = 1
 
         # Create the Email object
         email = Email(
@@ -165,17 +173,33 @@ class TestEmailClass(TestCase):
         # Call the send method
         email.send()
 
-        # Check that the HTML content is rendered using the correct template and context
-        mock_render_to_string.assert_called_once_with(
-            email._get_template(), email.context
+        # Check that the email is rendered with the correct template and context
+        mock_render_email.assert_called_once_with(
+            email.template, email.context, cache=True
         )
 
-        # Check that strip_tags is called with the HTML content
-        mock_strip_tags.assert_called_once_with(mock_render_to_string.return_value)
-
         # Ensure that the send method was called once
         mock_send.assert_called_once()
 
+    def test_send_email_bodies(self):
+        """Test that the HTML and plain text bodies are both built from the content."""
+        self.email.add_paragraph("First paragraph.")
+        self.email.add_button("Verify Email", "https://example.com/verify?token=abc")
+        self.email.add_unordered_list(["One", "Two"])
+
+        self.email.send()
+
+        message = mail.outbox[0]
+        html = message.alternatives[0][0]
+        self.assertIn('<p style="">First paragraph.</p>', html)
+        self.assertIn('<a href="https://example.com/verify?token=abc"', html)
+        self.assertIn("<title>Test Subject</title>", html)
+        self.assertEqual(
+            message.body,
+            "Test Subject\n\nFirst paragraph.\n\n"
+            "Verify Email: https://example.com/verify?token=abc\n\n- One\n- Two",
+        )
+
 
 class TestEmailFunctions(TestCase):
     def setUp(self):
@@ -228,6 +252,29 @@ class TestEmailFunctions(TestCase):
             any(item["type"] == "table" for item in email.context["content_list"])
         )
 
+    def test_experiment_report_email_tables(self):
+        """Test that each experiment gets a table of its variations."""
+        call_command("loaddata", "tests/account/fixtures/experiments.yaml")
+        reports = build_active_experiments_report()
+        email = experiment_report_email()
+
+        tables = [
+            item for item in email.context["content_list"] if item["type"] == "table"
+        ]
+        self.assertEqual(len(tables), len(reports))
+        for table, report in zip(tables, reports):
+            self.assertEqual(table["headers"], list(REPORT_COLUMNS))
+            self.assertEqual(
+                [row[0] for row in table["rows"]],
+                [variation.name for variation in report.variations],
+            )
+        headers = [
+            item["text"]
+            for item in email.context["content_list"]
+            if item["type"] == "section_header"
+        ]
+        self.assertEqual(headers, [f"Experiment: {report.name}" for report in reports])
+
     def test_experiment_report_email_none_active(self):
         """Test that experiment report email is generated correctly."""
         call_command("loaddata", "tests/account/fixtures/experiments.yaml")
@@ -239,3 +286,71 @@ class TestEmailFunctions(TestCase):
         self.assertFalse(
             any(item["type"] == "table" for item in email.context["content_list"])
         )
+
+    def test_token_emails_are_not_cached(self):
+        email_cache.clear()
+        fragment_cache.clear()
+
+        verification_email(self.user).render()
+        initiate_password_reset_email(self.user).render()
+
+        self.assertEqual(len(email_cache), 0)
+        self.assertEqual(len(fragment_cache), 0)
+
+
+class TestBatchSending(TestCase):
+    def make_email(self, to, text="Shared content."):
+        email = Email(subject="News", to=to)
+        email.add_paragraph(text)
+        return email
+
+    @patch("account.rendering._render_email", wraps=_render_email)
+    def test_send_batch_renders_identical_content_once(self, mock_render):
+        email_cache.clear()
+        emails = [self.make_email([f"user{i}@example.com"]) for i in range(3)]
+        emails.append(self.make_email(["other@example.com"], "Other content."))
+
+        with patch("account.emails.get_connection", wraps=get_connection) as conn:
+            sent = send_batch(emails)
+
+        self.assertEqual(sent, 4)
+        self.assertEqual(mock_render.call_count, 2)
+        conn.assert_called_once()
+        self.assertEqual(
+            [message.to for message in mail.outbox],
+            [email.to for email in emails],
+        )
+        self.assertIn("Other content.", mail.outbox[3].body)
+
+    @patch("account.rendering._render_email", wraps=_render_email)
+    def test_send_batch_dedups_without_render_cache(self, mock_render):
+        email_cache.clear()
+        emails = [self.make_email([f"user{i}@example.com"]) for i in range(3)]
+
+        with patch.object(email_cache, "maxsize", 0):
+            self.assertEqual(send_batch(emails), 3)
+
+        self.assertEqual(mock_render.call_count, 1)
+
+    def test_send_broadcast_sends_each_recipient_a_copy(self):
+        recipients = [f"user{i}@example.com" for i in range(3)]
+
+        sent = send_broadcast(self.make_email([]), recipients)
+
+        self.assertEqual(sent, 3)
+        self.assertEqual(
+            [message.to for message in mail.outbox], [[r] for r in recipients]
+        )
+
+    @override_settings(EMAIL_BACKEND="anymail.backends.test.EmailBackend")
+    @patch("account.emails.BATCH_SIZE", 2)
+    def test_send_broadcast_uses_anymail_batch_sends(self):
+        recipients = [f"user{i}@example.com" for i in range(3)]
+
+        send_broadcast(self.make_email([]), recipients)
+
+        self.assertEqual(
+            [message.to for message in mail.outbox],
+            [recipients[:2], recipients[2:]],
+        )
+        self.assertTrue(all(message.merge_data == {} for message in mail.outbox))
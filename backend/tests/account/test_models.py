@@ -114,6 +114,29 @@ class OneTimePasswordModelTest(TestCase):
         otp.refresh_from_db()
         self.assertFalse(otp.is_active)
 
+    def test_otp_consume_returns_user_once(self):
+        """Test that consume redeems an active token exactly once."""
+        otp = OneTimePassword.objects.create(user=self.user)
+        self.assertEqual(OneTimePassword.consume(otp.token), self.user.id)
+        self.assertIsNone(OneTimePassword.consume(otp.token))
+        otp.refresh_from_db()
+        self.assertFalse(otp.is_active)
+
+    def test_otp_consume_rejects_expired_and_unknown_tokens(self):
+        """Test that consume ignores expired and unknown tokens."""
+        otp = OneTimePassword.objects.create(user=self.user)
+        OneTimePassword.objects.filter(pk=otp.pk).update(
+            expires=now() - timedelta(minutes=1)
+        )
+        self.assertIsNone(OneTimePassword.consume(otp.token))
+        self.assertIsNone(OneTimePassword.consume("unknown"))
+
+    def test_otp_consume_is_one_query(self):
+        """Test that consume redeems a token in a single statement."""
+        otp = OneTimePassword.objects.create(user=self.user)
+        with self.assertNumQueries(1):
+            OneTimePassword.consume(otp.token)
+
     def test_otp_save_method_generates_token(self):
         """Test that the save method generates a token if not provided."""
         otp = OneTimePassword(user=self.user)
@@ -0,0 +1,88 @@
+from unittest.mock import patch
+
+import fakeredis
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from account.models import OneTimePassword
+from account.otp import TOKEN_KEY, DatabaseOTPBackend, RedisOTPBackend, get_otp_backend
+
+REDIS_BACKEND = "account.otp.RedisOTPBackend"
+
+
+class RedisTestMixin:
+    def setUp(self):
+        super().setUp()
+        self.redis = fakeredis.FakeRedis()
+        patcher = patch("account.otp.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class DatabaseOTPBackendTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="vimes", email="vimes@watch.ankh", password="bootstheory123"
+        )
+
+    def test_default_backend(self):
+        self.assertIsInstance(get_otp_backend(), DatabaseOTPBackend)
+
+    def test_create_and_consume(self):
+        backend = DatabaseOTPBackend()
+        token = backend.create(self.user, token_length=8)
+
+        self.assertEqual(len(token), 8)
+        self.assertTrue(OneTimePassword.objects.filter(token=token).exists())
+        self.assertEqual(backend.consume(token), self.user.id)
+        self.assertIsNone(backend.consume(token))
+
+    def test_create_without_replace(self):
+        backend = DatabaseOTPBackend()
+        first = backend.create(self.user)
+
+        with self.assertNumQueries(1):
+            second = backend.create(self.user, replace=False)
+        self.assertEqual(
+            OneTimePassword.objects.filter(user=self.user, is_active=True).count(), 2
+        )
+        self.assertEqual(backend.consume(second), self.user.id)
+        self.assertEqual(backend.consume(first), self.user.id)
+
+
+@override_settings(OTP_BACKEND=REDIS_BACKEND, OTP_EXPIRATION_MINUTES=15)
+class RedisOTPBackendTest(RedisTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            username="vimes", email="vimes@watch.ankh", password="bootstheory123"
+        )
+        self.backend = get_otp_backend()
+
+    def test_configured_backend(self):
+        self.assertIsInstance(self.backend, RedisOTPBackend)
+
+    def test_create_and_consume(self):
+        token = self.backend.create(self.user)
+
+        self.assertEqual(len(token), 6)
+        self.assertFalse(OneTimePassword.objects.exists())
+        self.assertEqual(self.backend.consume(token), self.user.id)
+        self.assertIsNone(self.backend.consume(token))
+
+    def test_token_expires(self):
+        token = self.backend.create(self.user)
+
+        ttl = self.redis.ttl(TOKEN_KEY.format(token=token))
+        self.assertGreater(ttl, 14 * 60)
+        self.assertLessEqual(ttl, 15 * 60)
+
+    def test_new_token_replaces_previous(self):
+        first = self.backend.create(self.user)
+        second = self.backend.create(self.user)
+
+        self.assertIsNone(self.backend.consume(first))
+        self.assertEqual(self.backend.consume(second), self.user.id)
+
+    def test_unknown_token(self):
+        self.assertIsNone(self.backend.consume("unknown"))
@@ -0,0 +1,113 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from account.cache import MISSING, LRUCache
+from account.rendering import (
+    email_cache,
+    get_email_template,
+    render_email,
+    render_html,
+    render_text,
+)
+from account.templatetags.email_tags import fragment_cache
+
+
+class RenderingTest(SimpleTestCase):
+    def test_render_html_dispatches_block_types(self):
+        html = render_html(
+            [
+                {"type": "paragraph", "text": "Hello"},
+                {"type": "divider"},
+                {"type": "button", "text": "Go", "url": ""},
+                {"type": "callout", "text": "Unknown types are skipped"},
+            ]
+        )
+
+        self.assertHTMLEqual(
+            html,
+            '<p style="">Hello</p>'
+            "<hr style='border: 1px solid #ccc; margin: 20px 0;'>",
+        )
+
+    def test_render_text(self):
+        text = render_text(
+            [
+                {"type": "section_header", "text": "Report"},
+                {"type": "ordered_list", "items": ["First", "Second"]},
+                {"type": "table", "headers": ["Name", "Views"], "rows": [["A", 3]]},
+                {"type": "space"},
+                {"type": "bold_text", "text": "Done"},
+            ]
+        )
+
+        self.assertEqual(
+            text, "Report\n\n1. First\n2. Second\n\nName | Views\nA | 3\n\nDone"
+        )
+
+    def test_render_email(self):
+        context = {
+            "title": "Welcome",
+            "current_year": 2024,
+            "content_list": [{"type": "paragraph", "text": "Hello"}],
+        }
+
+        text, html = render_email("default", context)
+
+        self.assertEqual(text, "Welcome\n\nHello")
+        self.assertIn("<h1>Welcome</h1>", html)
+        self.assertIn('<p style="">Hello</p>', html)
+        self.assertIn("&copy; 2024", html)
+
+
+class RenderCacheTest(SimpleTestCase):
+    def setUp(self):
+        email_cache.clear()
+        fragment_cache.clear()
+
+    def context(self, text):
+        return {
+            "title": "Welcome",
+            "current_year": 2024,
+            "content_list": [{"type": "paragraph", "text": text}],
+        }
+
+    def test_repeated_content_is_rendered_once(self):
+        with patch(
+            "account.rendering.get_email_template", wraps=get_email_template
+        ) as template:
+            first = render_email("default", self.context("Hello"))
+            second = render_email("default", self.context("Hello"))
+            render_email("default", self.context("Goodbye"))
+
+        self.assertEqual(first, second)
+        self.assertEqual(template.call_count, 2)
+
+    def test_fragments_are_cached_by_tag_and_arguments(self):
+        render_html([{"type": "paragraph", "text": "Thank you!"}] * 3)
+        render_html([{"type": "bold_text", "text": "Thank you!"}])
+
+        self.assertEqual(len(fragment_cache), 2)
+
+    def test_uncached_content_stays_out_of_the_caches(self):
+        context = self.context("Please verify your email.")
+        context["content_list"].append(
+            {"type": "button", "text": "Verify", "url": "/verify?token=SECRET"}
+        )
+
+        text, html = render_email("default", context, cache=False)
+
+        self.assertIn("/verify?token=SECRET", html)
+        self.assertEqual(len(email_cache), 0)
+        self.assertEqual(len(fragment_cache), 0)
+
+    def test_lru_cache_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIs(cache.get("b"), MISSING)
+        self.assertEqual(cache.get("c"), 3)
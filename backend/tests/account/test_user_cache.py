@@ -0,0 +1,97 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from account import user_cache
+from account.user_cache import (
+    INVALIDATION_CHANNEL,
+    clear_user_cache,
+    get_cached_user,
+    invalidate_user,
+)
+
+
+class UserCacheTest(TestCase):
+    def setUp(self):
+        clear_user_cache()
+        self.addCleanup(clear_user_cache)
+        self.user = get_user_model().objects.create_user(
+            username="vimes", email="vimes@watch.ankh", password="bootstheory123"
+        )
+
+    def test_user_is_loaded_once(self):
+        with self.assertNumQueries(1):
+            get_cached_user(self.user.pk)
+            user = get_cached_user(str(self.user.pk))
+
+        self.assertEqual(user, self.user)
+
+    def test_returns_copies(self):
+        get_cached_user(self.user.pk).first_name = "Changed"
+
+        self.assertEqual(get_cached_user(self.user.pk).first_name, "")
+
+    def test_saving_user_invalidates(self):
+        get_cached_user(self.user.pk)
+        self.user.first_name = "Sam"
+        self.user.save()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_cached_user(self.user.pk).first_name, "Sam")
+
+    def test_deleted_user(self):
+        get_cached_user(self.user.pk)
+        pk = self.user.pk
+        self.user.delete()
+
+        with self.assertRaises(get_user_model().DoesNotExist):
+            get_cached_user(pk)
+
+    @override_settings(JWT_USER_CACHE_SECONDS=-1)
+    def test_entries_expire(self):
+        get_cached_user(self.user.pk)
+
+        with self.assertNumQueries(1):
+            get_cached_user(self.user.pk)
+
+    @override_settings(JWT_USER_CACHE_SIZE=1)
+    def test_least_recently_used_user_is_evicted(self):
+        other = get_user_model().objects.create_user(
+            username="carrot", email="carrot@watch.ankh"
+        )
+        get_cached_user(self.user.pk)
+        get_cached_user(other.pk)
+
+        with self.assertNumQueries(1):
+            get_cached_user(self.user.pk)
+
+    @override_settings(JWT_USER_CACHE_BROADCAST=True)
+    @patch("account.user_cache.subscribe")
+    @patch("account.user_cache.publish")
+    def test_saving_user_is_broadcast_on_commit(self, mock_publish, mock_subscribe):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+            mock_publish.assert_not_called()
+
+        mock_publish.assert_called_once_with(INVALIDATION_CHANNEL, str(self.user.pk))
+
+    def test_cache_cleared_again_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_user(self.user.pk)
+            # A concurrent request reloads the user before the write commits
+            get_cached_user(self.user.pk)
+
+        with self.assertNumQueries(1):
+            get_cached_user(self.user.pk)
+
+    def test_broadcast_from_another_process_invalidates(self):
+        get_cached_user(self.user.pk)
+        # Another process deactivates the user; this one only gets the message
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertTrue(get_cached_user(self.user.pk).is_active)
+
+        user_cache._handle_invalidation(str(self.user.pk).encode())
+
+        with self.assertNumQueries(1):
+            self.assertFalse(get_cached_user(self.user.pk).is_active)
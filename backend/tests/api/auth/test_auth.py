@@ -159,6 +159,15 @@ class UserViewSetTest(APITestCase):
         self.assertEqual(code, status.HTTP_200_OK)
         self.assertEqual(msg, "Logout successful.")
 
+    def test_refresh_fails_after_logout(self):
+        self.client.post("/api/auth/logout", data={"refresh": self.refresh_token})
+
+        response = self.client.post(
+            reverse("token_refresh"), {"refresh": self.refresh_token}, format="json"
+        )
+
+        self.assertNotEqual(response.status_code, status.HTTP_200_OK)
+
     def test_logout_user_invalid_token(self):
         # Attempt to logout using an invalid refresh token
         response = self.client.post(
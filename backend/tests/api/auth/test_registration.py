@@ -2,16 +2,24 @@ import base64
 import json
 import os
 from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
 
+import fakeredis
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core import mail
+from django.db import IntegrityError, connection
 from django.test import override_settings, tag
+from django.test.utils import CaptureQueriesContext
 from django.utils.timezone import now
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APITestCase, APITransactionTestCase
 
+from account.emails import verification_email
 from account.models import OneTimePassword, User
+from api.serializers import RegisterUserSerializer
 from tests import read_api_response
 from tests.utils import mock_stripe
 
@@ -268,6 +276,14 @@ class AuthenticationTest(APITestCase):
         self.assertFalse(otp.is_active)
         self.assertEqual(msg, "Email verified successfully.")
 
+    def test_verify_email_queries(self):
+        # Savepoint, redeem the OTP, activate the user, release
+        with self.assertNumQueries(4):
+            response = self.client.post(
+                "/api/auth/verify", data={"token": self.otp_token}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_verify_email_without_token(self):
         """Test verification without providing a token."""
         data, msg, err, code = read_api_response(
@@ -426,3 +442,104 @@ class AuthenticationTest(APITestCase):
         )
         self.assertEqual(code, status.HTTP_401_UNAUTHORIZED)
         self.assertEqual(err, "Authentication required. Please sign in.")
+
+
+@override_settings(OTP_BACKEND="account.otp.RedisOTPBackend")
+class RedisOTPVerificationTest(APITestCase):
+    def setUp(self):
+        patcher = patch("account.otp.get_redis", return_value=fakeredis.FakeRedis())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_user_can_verify_email(self):
+        user = get_user_model().objects.create_user(
+            username="carrot",
+            email="carrot@watch.ankh",
+            password="ironfoundersson",
+            is_active=False,
+        )
+        verification_email(user).send()
+        token = mail.outbox[0].alternatives[0][0].split("token=")[1].split('"')[0]
+
+        data, msg, err, code = read_api_response(
+            self.client.post("/api/auth/verify", data={"token": token})
+        )
+
+        self.assertEqual(code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.is_active)
+        self.assertFalse(OneTimePassword.objects.exists())
+
+
+@tag("auth")
+@override_settings(
+    PAYMENT_REQUIRED=False,
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+)
+class SignUpQueriesTest(APITransactionTestCase):
+    """
+    Runs outside a test transaction, so only the queries the sign-up itself
+    makes are counted.
+    """
+
+    data = {
+        "username": "jasonogg",
+        "email": "jason@discworld.com",
+        "first_name": "Jason",
+        "last_name": "Ogg",
+        "password1": PASSWORD,
+        "password2": PASSWORD,
+    }
+
+    def test_sign_up_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/api/auth/sign-up", data=self.data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # Check username and email, insert the user, insert their OTP. SQLite
+        # also logs the BEGIN and COMMIT around the inserts.
+        statements = [
+            query["sql"] for query in queries if query["sql"] not in ("BEGIN", "COMMIT")
+        ]
+        self.assertEqual(len(statements), 3, statements)
+
+        user = User.objects.get(username="jasonogg")
+        self.assertFalse(user.is_active)
+        self.assertTrue(user.check_password(PASSWORD))
+        self.assertTrue(OneTimePassword.objects.filter(user=user, is_active=True))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_duplicate_insert_is_rejected(self):
+        User.objects.create_user(
+            username="jasonogg", email="jason@discworld.com", password=PASSWORD
+        )
+        # Sign-ups that race past the check in validate() hit the unique
+        # constraints instead
+        for field, error in RegisterUserSerializer.TAKEN_ERRORS.items():
+            data = {**self.data, "username": "jason", "email": "ogg@discworld.com"}
+            data[field] = self.data[field]
+            with self.assertRaisesMessage(ValidationError, error):
+                RegisterUserSerializer().create(data)
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_unique_violation_reported_by_postgres(self):
+        # Stands in for the driver error Django wraps, which carries diag
+        cause = Exception("duplicate key value violates unique constraint")
+        cause.diag = SimpleNamespace(constraint_name="account_user_email_key")
+        error = IntegrityError(*cause.args)
+        error.__cause__ = cause
+        with patch.object(User.objects, "create_user", side_effect=error):
+            with self.assertRaisesMessage(
+                ValidationError, RegisterUserSerializer.TAKEN_ERRORS["email"]
+            ):
+                RegisterUserSerializer().create(dict(self.data))
+
+    def test_other_integrity_errors_are_raised(self):
+        for message in (
+            "NOT NULL constraint failed: account_user.email",
+            "CHECK constraint failed",
+        ):
+            error = IntegrityError(message)
+            with patch.object(User.objects, "create_user", side_effect=error):
+                with self.assertRaises(IntegrityError):
+                    RegisterUserSerializer().create(dict(self.data))
@@ -0,0 +1,228 @@
+import json
+import os
+from unittest.mock import patch
+
+import fakeredis
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.db.backends.utils import CursorWrapper
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from experiment.cache import clear_experiment_cache, get_experiment_snapshots
+from experiment.models import Variation
+from experiment.process import flush_buffered_events
+
+
+class AsyncTrackingTest(TestCase):
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    fixtures = [os.path.join(base_dir, "fixtures", "experiments.yaml")]
+
+    def setUp(self):
+        clear_experiment_cache()
+
+    def read(self, response):
+        body = json.loads(response.content)
+        return body["data"], body["message"], body["error"], response.status_code
+
+    async def post(self, url, data, **kwargs):
+        return await self.async_client.post(
+            url, data=json.dumps(data), content_type="application/json", **kwargs
+        )
+
+    async def test_track_view(self):
+        response = await self.post(
+            "/api/async/experiments/1/track-view", {"variation": "Variation A"}
+        )
+        data, msg, err, code = self.read(response)
+
+        self.assertEqual(code, status.HTTP_200_OK)
+        self.assertEqual(msg, "View tracked successfully.")
+        variation = await Variation.objects.aget(name="Variation A")
+        self.assertEqual(variation.views, 1)
+
+    async def test_track_conversion_with_form_data(self):
+        response = await self.async_client.post(
+            "/api/async/experiments/1/track-conversion", {"variation": "Variation B"}
+        )
+        data, msg, err, code = self.read(response)
+
+        self.assertEqual(code, status.HTTP_200_OK)
+        self.assertEqual(msg, "Conversion tracked successfully.")
+        variation = await Variation.objects.aget(name="Variation B")
+        self.assertEqual(variation.conversions, 1)
+
+    async def test_track_invalid_variation(self):
+        response = await self.post(
+            "/api/async/experiments/1/track-view", {"variation": "Missing"}
+        )
+        data, msg, err, code = self.read(response)
+
+        self.assertEqual(code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(err, "Variation not found.")
+
+    async def test_track_non_string_variation(self):
+        for variation in ([], {"name": "Variation A"}):
+            response = await self.post(
+                "/api/async/experiments/1/track-view", {"variation": variation}
+            )
+            data, msg, err, code = self.read(response)
+
+            self.assertEqual(code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(err, "Variation not found.")
+
+    async def test_invalid_json(self):
+        response = await self.async_client.post(
+            "/api/async/experiments/1/track-view",
+            data="{not json",
+            content_type="application/json",
+        )
+        data, msg, err, code = self.read(response)
+
+        self.assertEqual(code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(err, "Invalid JSON body.")
+
+    async def test_json_body_not_an_object(self):
+        for url in (
+            "/api/async/experiments/1/track-view",
+            "/api/async/experiments/track",
+        ):
+            for body in ([1], "x", None):
+                response = await self.post(url, body)
+                data, msg, err, code = self.read(response)
+
+                self.assertEqual(code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(err, "Invalid JSON body.")
+
+    async def test_invalid_token(self):
+        response = await self.post(
+            "/api/async/experiments/1/track-view",
+            {"variation": "Variation A"},
+            headers={"Authorization": "Bearer not-a-token"},
+        )
+        data, msg, err, code = self.read(response)
+
+        self.assertEqual(code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_only_post(self):
+        response = await self.async_client.get("/api/async/experiments/1/track-view")
+
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    async def test_track_batch(self):
+        events = [
+            {"experiment": 1, "variation": "Variation A", "event": "view"},
+            {"experiment": 1, "variation": "Missing", "event": "view"},
+        ]
+        response = await self.post("/api/async/experiments/track", {"events": events})
+        data, msg, err, code = self.read(response)
+
+        self.assertEqual(code, status.HTTP_200_OK)
+        self.assertEqual([r["tracked"] for r in data["results"]], [True, False])
+        self.assertEqual(data["results"][1]["error"], "Variation not found.")
+        variation = await Variation.objects.aget(name="Variation A")
+        self.assertEqual(variation.views, 1)
+
+    async def test_track_batch_invalid(self):
+        response = await self.post("/api/async/experiments/track", {"events": []})
+        data, msg, err, code = self.read(response)
+
+        self.assertEqual(code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("events", err)
+
+
+@override_settings(EXPERIMENT_TRACKING_BUFFER=True, EXPERIMENT_DEDUP_ENABLED=True)
+class AsyncBufferedTrackingTest(AsyncTrackingTest):
+    def setUp(self):
+        super().setUp()
+        server = fakeredis.FakeServer()
+        self.redis = fakeredis.FakeRedis(server=server)
+        for target, client in (
+            ("experiment.buffer.get_redis", self.redis),
+            ("experiment.buffer.get_async_redis", None),
+            ("experiment.dedup.get_async_redis", None),
+        ):
+            if client is None:
+                patcher = patch(
+                    target,
+                    side_effect=lambda: fakeredis.FakeAsyncRedis(server=server),
+                )
+            else:
+                patcher = patch(target, return_value=client)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        get_experiment_snapshots()
+
+    def assertNoQueries(self):
+        # assertNumQueries needs the connection, which is off limits in async
+        # code, so fail on any query executed instead
+        return patch.object(
+            CursorWrapper,
+            "execute",
+            side_effect=AssertionError("Unexpected database query"),
+        )
+
+    async def flush(self):
+        await sync_to_async(flush_buffered_events)()
+
+    async def test_track_view(self):
+        with self.assertNoQueries():
+            response = await self.post(
+                "/api/async/experiments/1/track-view", {"variation": "Variation A"}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        await self.flush()
+        variation = await Variation.objects.aget(name="Variation A")
+        self.assertEqual(variation.views, 1)
+
+    async def test_track_conversion_with_form_data(self):
+        for _ in range(2):
+            await self.async_client.post(
+                "/api/async/experiments/1/track-conversion",
+                {"variation": "Variation B", "visitor": "visitor-1"},
+            )
+
+        await self.flush()
+        variation = await Variation.objects.aget(name="Variation B")
+        self.assertEqual(variation.conversions, 1)
+
+    async def test_conversions_deduplicated_by_token(self):
+        user = await sync_to_async(get_user_model().objects.create_user)(
+            username="rincewind", email="rincewind@uu.am", password="testpass123"
+        )
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+        for visitor in ("a", "b"):
+            response = await self.post(
+                "/api/async/experiments/1/track-conversion",
+                {"variation": "Variation B", "visitor": visitor},
+                headers=headers,
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        await self.flush()
+        variation = await Variation.objects.aget(name="Variation B")
+        self.assertEqual(variation.conversions, 1)
+
+    async def test_track_batch(self):
+        events = [
+            {"experiment": 1, "variation": "Variation A", "event": "view"},
+            {"experiment": 1, "variation": "Missing", "event": "view"},
+            {"experiment": 1, "variation": "Variation B", "event": "conversion"},
+            {"experiment": 1, "variation": "Variation B", "event": "conversion"},
+        ]
+        with self.assertNoQueries():
+            response = await self.post(
+                "/api/async/experiments/track",
+                {"events": events, "visitor": "visitor-1"},
+            )
+        data, msg, err, code = self.read(response)
+        self.assertEqual(
+            [r["tracked"] for r in data["results"]], [True, False, True, True]
+        )
+
+        await self.flush()
+        variation_a = await Variation.objects.aget(name="Variation A")
+        variation_b = await Variation.objects.aget(name="Variation B")
+        self.assertEqual((variation_a.views, variation_b.conversions), (1, 1))
@@ -1,9 +1,17 @@
 import os
+from unittest.mock import patch
 
+import fakeredis
+from django.contrib.auth import get_user_model
+from django.test import override_settings
 from rest_framework import status
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 
-from experiment.models import Variation
+from experiment.assignment import assign_variations
+from experiment.cache import get_experiment_snapshots
+from experiment.models import Experiment, Variation
+from experiment.process import flush_buffered_events
 from tests import read_api_response
 
 
@@ -66,3 +74,302 @@ class ExperimentViewSetTest(APITestCase):
 
         self.assertEqual(code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(err, "Variation not found.")
+
+    def test_track_view_non_string_variation(self):
+        for url in (
+            "/api/experiments/1/track-view",
+            "/api/experiments/1/track-conversion",
+        ):
+            response = self.client.post(url, data={"variation": []}, format="json")
+            data, msg, err, code = read_api_response(response)
+
+            self.assertEqual(code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(err, "Variation not found.")
+
+    def test_track_view_unknown_experiment(self):
+        url = "/api/experiments/999/track-view"
+        response = self.client.post(url, data={"variation": "Variation A"})
+        data, msg, err, code = read_api_response(response)
+
+        self.assertEqual(code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(err, "Variation not found.")
+
+    def test_track_view_queries(self):
+        url = "/api/experiments/1/track-view"
+        get_experiment_snapshots()
+        # The counter UPDATE and the hourly stats upsert
+        with self.assertNumQueries(2):
+            response = self.client.post(url, data={"variation": "Variation A"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class ExperimentTrackBatchTest(APITestCase):
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    fixtures = [os.path.join(base_dir, "fixtures", "experiments.yaml")]
+    url = "/api/experiments/track"
+
+    def test_track_batch(self):
+        events = [
+            {"experiment": 1, "variation": "Variation A", "event": "view"},
+            {"experiment": 1, "variation": "Variation A", "event": "view"},
+            {"experiment": 1, "variation": "Variation B", "event": "view"},
+            {"experiment": 1, "variation": "Variation B", "event": "conversion"},
+            {"experiment": 1, "variation": "Missing", "event": "view"},
+        ]
+        # Variations resolve from the cache, one UPDATE applies the increments
+        # and one upsert records the hourly stats, inside a savepoint
+        get_experiment_snapshots()
+        with self.assertNumQueries(4):
+            response = self.client.post(self.url, {"events": events}, format="json")
+        data, msg, err, code = read_api_response(response)
+
+        self.assertEqual(code, status.HTTP_200_OK)
+        self.assertEqual(msg, "Events tracked successfully.")
+        self.assertEqual(
+            [result["tracked"] for result in data["results"]],
+            [True, True, True, True, False],
+        )
+        self.assertEqual(data["results"][4]["error"], "Variation not found.")
+
+        variation_a = Variation.objects.get(name="Variation A")
+        variation_b = Variation.objects.get(name="Variation B")
+        self.assertEqual((variation_a.views, variation_a.conversions), (2, 0))
+        self.assertEqual((variation_b.views, variation_b.conversions), (1, 1))
+
+    def test_track_batch_invalid_event(self):
+        events = [{"experiment": 1, "variation": "Variation A", "event": "click"}]
+        response = self.client.post(self.url, {"events": events}, format="json")
+        data, msg, err, code = read_api_response(response)
+
+        self.assertEqual(code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Variation.objects.get(name="Variation A").views, 0)
+
+    def test_track_batch_empty(self):
+        response = self.client.post(self.url, {"events": []}, format="json")
+        data, msg, err, code = read_api_response(response)
+
+        self.assertEqual(code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(EXPERIMENT_TRACKING_BUFFER=True)
+    def test_track_batch_buffered(self):
+        redis = fakeredis.FakeRedis()
+        events = [
+            {"experiment": 1, "variation": "Variation A", "event": "view"},
+            {"experiment": 1, "variation": "Variation B", "event": "conversion"},
+        ]
+        get_experiment_snapshots()
+        with patch("experiment.buffer.get_redis", return_value=redis):
+            with self.assertNumQueries(0):
+                response = self.client.post(self.url, {"events": events}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            flush_buffered_events()
+
+        self.assertEqual(Variation.objects.get(name="Variation A").views, 1)
+        self.assertEqual(Variation.objects.get(name="Variation B").conversions, 1)
+
+
+class ExperimentAssignmentsTest(APITestCase):
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    fixtures = [os.path.join(base_dir, "fixtures", "experiments.yaml")]
+    url = "/api/experiments/assignments"
+
+    def test_assignments_for_visitor(self):
+        response = self.client.get(self.url, {"visitor": "visitor-1"})
+        data, msg, err, code = read_api_response(response)
+
+        self.assertEqual(code, status.HTTP_200_OK)
+        assignment = data["assignments"]["Test Experiment"]
+        self.assertEqual(assignment["experiment"], 1)
+        self.assertIn(assignment["variation"], {"Variation A", "Variation B"})
+
+        # The same visitor gets the same assignments
+        response = self.client.get(self.url, {"visitor": "visitor-1"})
+        self.assertEqual(read_api_response(response)[0], data)
+
+    def test_assignments_for_authenticated_user(self):
+        user = get_user_model().objects.create_user(
+            username="rincewind", email="rincewind@uu.am", password="testpass123"
+        )
+        self.client.force_authenticate(user=user)
+        response = self.client.get(self.url)
+        data, msg, err, code = read_api_response(response)
+
+        self.assertEqual(code, status.HTTP_200_OK)
+        self.assertEqual(data, {"assignments": assign_variations(str(user.id))})
+
+    def test_assignments_require_visitor_for_anonymous_users(self):
+        response = self.client.get(self.url)
+        data, msg, err, code = read_api_response(response)
+
+        self.assertEqual(code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(err, "A 'visitor' id is required for anonymous users.")
+
+
+class ExperimentStatsTest(APITestCase):
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    fixtures = [os.path.join(base_dir, "fixtures", "experiments.yaml")]
+    url = "/api/experiments/1/stats"
+
+    def setUp(self):
+        self.admin = get_user_model().objects.create_user(
+            username="ridcully",
+            email="ridcully@uu.am",
+            password="testpass123",
+            is_staff=True,
+        )
+
+    def test_stats(self):
+        self.client.post(
+            "/api/experiments/1/track-view", data={"variation": "Variation A"}
+        )
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(self.url, {"days": 30})
+        data, msg, err, code = read_api_response(response)
+
+        self.assertEqual(code, status.HTTP_200_OK)
+        self.assertEqual(data["days"], 30)
+        self.assertEqual(data["variations"]["Variation A"][0]["views"], 1)
+        self.assertEqual(data["variations"]["Variation B"], [])
+
+    def test_stats_unknown_experiment(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get("/api/experiments/999/stats")
+        data, msg, err, code = read_api_response(response)
+
+        self.assertEqual(code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(err, "Experiment not found.")
+
+    def test_stats_invalid_days(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(self.url, {"days": 0})
+        data, msg, err, code = read_api_response(response)
+
+        self.assertEqual(code, status.HTTP_400_BAD_REQUEST)
+
+    def test_stats_require_admin(self):
+        response = self.client.get(self.url)
+        data, msg, err, code = read_api_response(response)
+
+        self.assertEqual(code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ExperimentExportTest(APITestCase):
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    fixtures = [os.path.join(base_dir, "fixtures", "experiments.yaml")]
+    url = "/api/experiments/export"
+
+    def setUp(self):
+        self.admin = get_user_model().objects.create_user(
+            username="ridcully",
+            email="ridcully@uu.am",
+            password="testpass123",
+            is_staff=True,
+        )
+
+    def test_export_csv(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(self.url, {"table": "experiments"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="experiments.csv"'
+        )
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:2], ["id", "name"])
+        self.assertEqual(len(lines), Experiment.objects.count() + 1)
+
+    def test_export_parquet(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(self.url, {"file_format": "parquet"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="variations.parquet"'
+        )
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"PAR1"))
+
+    @override_settings(EXPERIMENT_EXPORT_CHUNK_SIZE=2)
+    async def test_export_streams_chunks_under_asgi(self):
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(self.admin)}"}
+        response = await self.async_client.get(
+            self.url, {"table": "variations"}, headers=headers
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        # The header, then one chunk per two variations
+        count = await Variation.objects.acount()
+        self.assertEqual(len(chunks), 1 + (count + 1) // 2)
+        lines = b"".join(chunks).decode().splitlines()
+        self.assertEqual(len(lines), count + 1)
+
+    def test_export_invalid_table(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(self.url, {"table": "users"})
+        data, msg, err, code = read_api_response(response)
+
+        self.assertEqual(code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Unknown table 'users'", err)
+
+    def test_export_requires_admin(self):
+        user = get_user_model().objects.create_user(
+            username="rincewind", email="rincewind@uu.am", password="testpass123"
+        )
+        self.client.force_authenticate(user=user)
+        response = self.client.get(self.url)
+        data, msg, err, code = read_api_response(response)
+
+        self.assertEqual(code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(EXPERIMENT_DEDUP_ENABLED=True)
+class ExperimentConversionDedupTest(APITestCase):
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    fixtures = [os.path.join(base_dir, "fixtures", "experiments.yaml")]
+
+    def setUp(self):
+        patcher = patch(
+            "experiment.dedup.get_redis", return_value=fakeredis.FakeRedis()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_retried_conversion_counts_once(self):
+        url = "/api/experiments/1/track-conversion"
+        for _ in range(3):
+            response = self.client.post(
+                url, data={"variation": "Variation B", "visitor": "visitor-1"}
+            )
+            data, msg, err, code = read_api_response(response)
+            self.assertEqual(code, status.HTTP_200_OK)
+            self.assertEqual(msg, "Conversion tracked successfully.")
+
+        self.assertEqual(Variation.objects.get(name="Variation B").conversions, 1)
+
+    def test_authenticated_user_is_deduplicated_by_id(self):
+        user = get_user_model().objects.create_user(
+            username="rincewind", email="rincewind@uu.am", password="testpass123"
+        )
+        self.client.force_authenticate(user=user)
+        url = "/api/experiments/1/track-conversion"
+        self.client.post(url, data={"variation": "Variation B", "visitor": "a"})
+        self.client.post(url, data={"variation": "Variation B", "visitor": "b"})
+
+        self.assertEqual(Variation.objects.get(name="Variation B").conversions, 1)
+
+    def test_batch_conversions_are_deduplicated(self):
+        event = {"experiment": 1, "variation": "Variation B", "event": "conversion"}
+        response = self.client.post(
+            "/api/experiments/track",
+            data={"events": [event, event], "visitor": "visitor-1"},
+            format="json",
+        )
+        data, msg, err, code = read_api_response(response)
+
+        self.assertEqual(code, status.HTTP_200_OK)
+        self.assertEqual([r["tracked"] for r in data["results"]], [True, True])
+        self.assertEqual(Variation.objects.get(name="Variation B").conversions, 1)
@@ -0,0 +1,116 @@
+import os
+import tempfile
+from unittest.mock import patch
+
+import fakeredis
+from anymail.exceptions import AnymailAPIError
+from django.core import mail
+from django.test import TestCase, override_settings
+from prometheus_client import REGISTRY, CollectorRegistry
+
+from account.emails import Email
+from account.metrics import CeleryQueueCollector
+from account.rendering import email_cache
+
+
+def sample(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@override_settings(METRICS_TOKEN="secret")
+class MetricsTest(TestCase):
+    def setUp(self):
+        self.broker = fakeredis.FakeRedis()
+        patcher = patch(
+            "account.metrics.redis.Redis.from_url", return_value=self.broker
+        )
+        self.from_url = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_metrics(self):
+        return self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+
+    def make_email(self):
+        email = Email(subject="Hello", to=["gytha@lancre.gov"])
+        email.add_paragraph("Metrics")
+        return email
+
+    def test_metrics_endpoint(self):
+        self.broker.rpush("default", "task-1", "task-2")
+        self.make_email().send()
+
+        response = self.get_metrics()
+
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('email_messages_sent_total{provider="locmem"}', body)
+        self.assertIn('email_send_seconds_bucket{le="0.01",provider="locmem"}', body)
+        self.assertIn('email_render_seconds_count{template="default"}', body)
+        self.assertIn('celery_queue_depth{queue="default"} 2.0', body)
+
+    def test_queue_depth_in_multiprocess_mode(self):
+        self.broker.rpush("default", "task-1")
+
+        with tempfile.TemporaryDirectory() as directory:
+            with patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": directory}):
+                response = self.get_metrics()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'celery_queue_depth{queue="default"} 1.0', response.content.decode()
+        )
+
+    def test_cache_hits_are_not_timed_as_renders(self):
+        email_cache.clear()
+        labels = {"template": "default"}
+        renders = sample("email_render_seconds_count", labels)
+        hits = sample("email_render_cache_hits_total", labels)
+
+        self.make_email().render()
+        self.make_email().render()
+
+        self.assertEqual(sample("email_render_seconds_count", labels), renders + 1)
+        self.assertEqual(sample("email_render_cache_hits_total", labels), hits + 1)
+
+    def test_send_is_counted(self):
+        labels = {"provider": "locmem"}
+        sent = sample("email_messages_sent_total", labels)
+        calls = sample("email_send_seconds_count", labels)
+
+        self.make_email().send()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(sample("email_messages_sent_total", labels), sent + 1)
+        self.assertEqual(sample("email_send_seconds_count", labels), calls + 1)
+
+    def test_failures_are_counted_by_error_code(self):
+        labels = {"provider": "locmem", "error_code": "422"}
+        failures = sample("email_send_failures_total", labels)
+
+        with patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=AnymailAPIError("Rejected", status_code=422),
+        ):
+            with self.assertRaises(AnymailAPIError):
+                self.make_email().send()
+
+        self.assertEqual(sample("email_send_failures_total", labels), failures + 1)
+
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.get_metrics().status_code, 200)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_disabled_without_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+    @override_settings(METRICS_TOKEN="", DEBUG=True)
+    def test_open_without_token_in_debug(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    def test_registering_does_not_read_the_broker(self):
+        CollectorRegistry().register(CeleryQueueCollector())
+
+        self.from_url.assert_not_called()
@@ -1,6 +1,8 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
 
 from account.serializers import UserSerializer
+from api.serializers import LogInSerializer
 
 
 class TestUserSerializer(TestCase):
@@ -26,3 +28,32 @@ class TestUserSerializer(TestCase):
         self.assertEqual(serializer.validated_data, {})
         self.assertEqual(serializer.data, invalid_serializer_data)
         self.assertEqual(serializer.errors, {"username": ["This field is required."]})
+
+
+class TestLogInSerializerClaims(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="vimes",
+            email="vimes@watch.ankh",
+            first_name="Sam",
+            last_name="Vimes",
+            payment_method_id="pm_123",
+        )
+
+    def test_default_claims(self):
+        token = LogInSerializer.get_token(self.user)
+
+        self.assertEqual(token["id"], str(self.user.id))
+        self.assertEqual(token["username"], "vimes")
+        self.assertEqual(token["email"], "vimes@watch.ankh")
+        self.assertEqual(token["first_name"], "Sam")
+        self.assertEqual(token["last_name"], "Vimes")
+        self.assertNotIn("payment_method_id", token.payload)
+
+    @override_settings(JWT_USER_CLAIMS=["username", "date_joined"])
+    def test_configured_claims(self):
+        access = LogInSerializer.get_token(self.user).access_token
+
+        self.assertEqual(access["username"], "vimes")
+        self.assertEqual(access["date_joined"], str(self.user.date_joined))
+        self.assertNotIn("email", access.payload)
@@ -36,6 +36,30 @@ class UserViewSetTest(APITestCase):
         self.assertEqual(data["first_name"], self.user.first_name)
         self.assertEqual(data["last_name"], self.user.last_name)
 
+    def test_retrieve_user_is_served_from_cache(self):
+        self.client.get("/api/users/me")
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/users/me")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_update_user_refreshes_cache(self):
+        self.client.get("/api/users/me")
+        self.client.patch("/api/users/me", data={"first_name": "Updated"})
+
+        data, msg, err, code = read_api_response(self.client.get("/api/users/me"))
+
+        self.assertEqual(data["first_name"], "Updated")
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get("/api/users/me")
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get("/api/users/me")
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
     def test_update_user(self):
         update_data = {
             "first_name": "Updated",
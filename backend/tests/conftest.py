@@ -0,0 +1,13 @@
+import pytest
+from django.test.utils import override_settings
+
+from tests.test_runner import TEST_SETTINGS
+
+
+@pytest.fixture(autouse=True, scope="session")
+def test_settings():
+    """
+    Apply the settings of the Django test runner when running under pytest.
+    """
+    with override_settings(**TEST_SETTINGS):
+        yield
@@ -0,0 +1,79 @@
+import os
+from collections import Counter
+
+from django.test import TestCase
+
+from experiment.assignment import assign_variations, get_assignment_tables
+from experiment.cache import clear_experiment_cache
+from experiment.models import Experiment, Variation
+
+
+class AssignVariationsTest(TestCase):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    fixtures = [os.path.join(base_dir, "fixtures", "experiments.yaml")]
+
+    def setUp(self):
+        clear_experiment_cache()
+
+    def test_assigns_every_active_experiment(self):
+        assignments = assign_variations("visitor-1")
+
+        self.assertEqual(
+            set(assignments),
+            {"Unseen University Ad Campaign", "Ankh-Morpork Recruitment Campaign"},
+        )
+        campaign = assignments["Unseen University Ad Campaign"]
+        self.assertEqual(campaign["experiment"], 1)
+        self.assertIn(campaign["variation"], {"Wizards Only Ad", "General Magic Ad"})
+
+    def test_assignment_is_sticky(self):
+        self.assertEqual(assign_variations("visitor-1"), assign_variations("visitor-1"))
+
+    def test_assignment_follows_weights(self):
+        counts = Counter(
+            assign_variations(f"visitor-{i}")["Ankh-Morpork Recruitment Campaign"][
+                "variation"
+            ]
+            for i in range(4000)
+        )
+
+        # Weighted 3:1
+        share = counts["Commander Vimes Endorsement"] / 4000
+        self.assertAlmostEqual(share, 0.75, delta=0.03)
+
+    def test_zero_weight_variations_are_never_assigned(self):
+        Variation.objects.filter(name="Nobby Nobbs Testimonial").update(weight=0)
+        clear_experiment_cache()
+
+        for i in range(100):
+            assignment = assign_variations(f"visitor-{i}")
+            self.assertEqual(
+                assignment["Ankh-Morpork Recruitment Campaign"]["variation"],
+                "Commander Vimes Endorsement",
+            )
+
+    def test_tables_are_cached(self):
+        get_assignment_tables()
+        with self.assertNumQueries(0):
+            assign_variations("visitor-1")
+
+    def test_saving_an_experiment_invalidates_tables(self):
+        get_assignment_tables()
+        experiment = Experiment.objects.get(name="Ankh-Morpork Recruitment Campaign")
+        experiment.is_active = False
+        experiment.save()
+
+        self.assertNotIn(
+            "Ankh-Morpork Recruitment Campaign", assign_variations("visitor-1")
+        )
+
+    def test_deleting_a_variation_invalidates_tables(self):
+        get_assignment_tables()
+        Variation.objects.get(name="Wizards Only Ad").delete()
+
+        for i in range(50):
+            assignment = assign_variations(f"visitor-{i}")
+            self.assertEqual(
+                assignment["Unseen University Ad Campaign"]["variation"],
+                "General Magic Ad",
+            )
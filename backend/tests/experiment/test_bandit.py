@@ -0,0 +1,161 @@
+import os
+from collections import Counter
+from io import StringIO
+from unittest.mock import patch
+
+import numpy as np
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from experiment.assignment import assign_variations
+from experiment.bandit import (
+    WEIGHT_SCALE,
+    bandit_weights,
+    recompute_bandit_weights,
+    thompson_shares,
+    ucb1_shares,
+)
+from experiment.cache import clear_experiment_cache, get_experiment_snapshots
+from experiment.models import Experiment, Variation
+
+
+class BanditSharesTest(SimpleTestCase):
+    def test_thompson_favours_the_better_arm(self):
+        shares = thompson_shares(
+            [10, 40], [1000, 1000], samples=5000, rng=np.random.default_rng(0)
+        )
+
+        self.assertAlmostEqual(shares.sum(), 1)
+        self.assertGreater(shares[1], 0.99)
+
+    def test_thompson_splits_unknown_arms(self):
+        shares = thompson_shares(
+            [0, 0], [0, 0], samples=20000, rng=np.random.default_rng(0)
+        )
+
+        self.assertAlmostEqual(shares[0], 0.5, delta=0.02)
+
+    def test_thompson_more_conversions_than_views(self):
+        shares = thompson_shares(
+            [1, 3], [0, 10], samples=100, rng=np.random.default_rng(0)
+        )
+
+        self.assertAlmostEqual(shares.sum(), 1)
+
+    def test_ucb1_tries_unseen_arms_first(self):
+        np.testing.assert_array_equal(
+            ucb1_shares([5, 0, 0], [100, 0, 0]), [0, 0.5, 0.5]
+        )
+
+    def test_ucb1_picks_the_highest_bound(self):
+        # Arm 1 has the lower rate but far fewer views, so a higher bound
+        np.testing.assert_array_equal(ucb1_shares([100, 1], [1000, 10]), [0, 1])
+
+    def test_weights_keep_a_minimum_share(self):
+        weights = bandit_weights(Experiment.UCB1, [100, 200], [1000, 1000], 0.05, 0)
+
+        self.assertEqual(weights, [WEIGHT_SCALE * 5 // 100, WEIGHT_SCALE * 95 // 100])
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            bandit_weights(Experiment.STATIC, [1], [1], 0.01, 10)
+
+
+@override_settings(EXPERIMENT_BANDIT_MIN_SHARE=0.1, EXPERIMENT_BANDIT_SAMPLES=2000)
+class RecomputeBanditWeightsTest(TestCase):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    fixtures = [os.path.join(base_dir, "fixtures", "experiments.yaml")]
+
+    def setUp(self):
+        clear_experiment_cache()
+        self.experiment = Experiment.objects.get(name="Unseen University Ad Campaign")
+        self.experiment.allocation_mode = Experiment.THOMPSON
+        self.experiment.save()
+        self.loser = Variation.objects.get(name="Wizards Only Ad")
+        self.winner = Variation.objects.get(name="General Magic Ad")
+        Variation.objects.filter(pk=self.loser.pk).update(views=1000, conversions=10)
+        Variation.objects.filter(pk=self.winner.pk).update(views=1000, conversions=100)
+
+    def test_recompute_weights(self):
+        changed = recompute_bandit_weights(rng=np.random.default_rng(0))
+
+        self.assertEqual(changed, 2)
+        self.loser.refresh_from_db()
+        self.winner.refresh_from_db()
+        self.assertEqual(self.loser.bandit_weight, WEIGHT_SCALE // 10)
+        self.assertEqual(self.winner.bandit_weight, WEIGHT_SCALE * 9 // 10)
+        # Static experiments are left alone
+        self.assertFalse(
+            Variation.objects.exclude(experiment=self.experiment)
+            .filter(bandit_weight__isnull=False)
+            .exists()
+        )
+
+    def test_unchanged_weights_are_not_saved(self):
+        recompute_bandit_weights(rng=np.random.default_rng(0))
+
+        with self.assertNumQueries(2):
+            self.assertEqual(recompute_bandit_weights(rng=np.random.default_rng(0)), 0)
+
+    def test_counts_pending_shards(self):
+        Variation.objects.filter(pk=self.winner.pk).update(conversions=10)
+        self.winner.shards.create(shard=0, views=0, conversions=90)
+
+        recompute_bandit_weights(rng=np.random.default_rng(0))
+
+        self.winner.refresh_from_db()
+        self.assertEqual(self.winner.bandit_weight, WEIGHT_SCALE * 9 // 10)
+
+    def test_switched_off_variation(self):
+        Variation.objects.filter(pk=self.winner.pk).update(weight=0)
+
+        recompute_bandit_weights(rng=np.random.default_rng(0))
+
+        self.winner.refresh_from_db()
+        self.loser.refresh_from_db()
+        self.assertEqual(self.winner.bandit_weight, 0)
+        self.assertEqual(self.loser.bandit_weight, WEIGHT_SCALE)
+
+    def test_failing_experiment_is_skipped(self):
+        other = Experiment.objects.get(name="Ankh-Morpork Recruitment Campaign")
+        Experiment.objects.filter(pk=other.pk).update(allocation_mode=Experiment.UCB1)
+
+        with patch(
+            "experiment.bandit.thompson_shares", side_effect=ValueError("broken")
+        ), self.assertLogs("custom_logger", "ERROR") as logs:
+            recompute_bandit_weights(rng=np.random.default_rng(0))
+
+        self.assertIn(self.experiment.name, logs.output[0])
+        self.winner.refresh_from_db()
+        self.assertIsNone(self.winner.bandit_weight)
+        self.assertTrue(other.variations.filter(bandit_weight__isnull=False).exists())
+
+    def test_assignment_uses_bandit_weights(self):
+        get_experiment_snapshots()
+        recompute_bandit_weights(rng=np.random.default_rng(0))
+
+        with self.assertNumQueries(2):
+            get_experiment_snapshots()  # Reloaded after the invalidation
+        with self.assertNumQueries(0):
+            counts = Counter(
+                assign_variations(f"visitor-{i}")[self.experiment.name]["variation"]
+                for i in range(4000)
+            )
+
+        self.assertAlmostEqual(counts[self.winner.name] / 4000, 0.9, delta=0.03)
+
+
+class SimulateBanditCommandTest(SimpleTestCase):
+    def test_simulate_bandit(self):
+        out = StringIO()
+        call_command(
+            "simulate_bandit",
+            visitors=2000,
+            recompute_every=500,
+            samples=500,
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        for mode in ("static", "thompson", "ucb1"):
+            self.assertIn(f"{mode}: conversions=", output)
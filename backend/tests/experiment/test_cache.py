@@ -0,0 +1,99 @@
+import os
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from experiment import cache
+from experiment.cache import (
+    INVALIDATION_CHANNEL,
+    clear_experiment_cache,
+    get_experiment_snapshots,
+    get_variation,
+    invalidate_experiment_cache,
+)
+from experiment.models import Experiment, Variation
+from experiment.process import track_variation_event
+
+
+class ExperimentCacheTest(TestCase):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    fixtures = [os.path.join(base_dir, "fixtures", "experiments.yaml")]
+
+    def setUp(self):
+        clear_experiment_cache()
+
+    def test_snapshot_contents(self):
+        experiment = get_experiment_snapshots()[3]
+
+        self.assertEqual(experiment.name, "Lancre Witch Potion Sales")
+        self.assertFalse(experiment.is_active)
+        self.assertEqual(experiment.counter_shards, 1)
+        self.assertEqual(
+            list(experiment.variations),
+            ["Granny Weatherwax Recommendation", "Nanny Ogg Special Offer"],
+        )
+        self.assertEqual(experiment.variations["Nanny Ogg Special Offer"].id, 6)
+
+    def test_get_variation_is_cached(self):
+        get_experiment_snapshots()
+        with self.assertNumQueries(0):
+            experiment, variation = get_variation("1", "Wizards Only Ad")
+            self.assertIsNone(get_variation(1, "Missing"))
+            self.assertIsNone(get_variation(999, "Wizards Only Ad"))
+            self.assertIsNone(get_variation("not-an-id", "Wizards Only Ad"))
+
+        self.assertEqual(experiment.id, 1)
+        self.assertEqual(variation.id, 1)
+
+    def test_tracking_resolves_from_cache(self):
+        get_experiment_snapshots()
+        with self.assertNumQueries(2):
+            self.assertTrue(track_variation_event("1", "Wizards Only Ad", "view"))
+        with self.assertNumQueries(0):
+            self.assertFalse(track_variation_event("1", "Missing", "view"))
+
+    def test_saving_a_variation_invalidates_the_cache(self):
+        get_experiment_snapshots()
+        Variation.objects.create(experiment_id=1, name="Luggage Ad")
+
+        self.assertIsNotNone(get_variation(1, "Luggage Ad"))
+
+    def test_deleting_an_experiment_invalidates_the_cache(self):
+        get_experiment_snapshots()
+        Experiment.objects.get(pk=2).delete()
+
+        self.assertNotIn(2, get_experiment_snapshots())
+
+    @override_settings(EXPERIMENT_CACHE_TTL=0)
+    def test_cache_expires(self):
+        get_experiment_snapshots()
+        with self.assertNumQueries(2):
+            get_experiment_snapshots()
+
+    def test_cache_cleared_again_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_experiment_cache()
+            # A concurrent request reloads the rows before the write commits
+            snapshots = get_experiment_snapshots()
+
+        self.assertIsNot(get_experiment_snapshots(), snapshots)
+
+    @override_settings(EXPERIMENT_CACHE_BROADCAST=True)
+    @patch("experiment.cache.subscribe")
+    @patch("experiment.cache.publish")
+    def test_invalidation_is_broadcast_on_commit(self, mock_publish, mock_subscribe):
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_experiment_cache()
+            mock_publish.assert_not_called()
+
+        mock_publish.assert_called_once_with(INVALIDATION_CHANNEL, cache._instance_id)
+
+    def test_broadcast_from_another_process_clears_the_cache(self):
+        snapshots = get_experiment_snapshots()
+
+        # Our own messages are ignored
+        cache._handle_invalidation(cache._instance_id.encode())
+        self.assertIs(get_experiment_snapshots(), snapshots)
+
+        cache._handle_invalidation(b"another-process")
+        self.assertIsNot(get_experiment_snapshots(), snapshots)
@@ -0,0 +1,108 @@
+import os
+
+from django.db.models import Q
+from django.test import TestCase
+
+from experiment.models import Experiment, Variation, VariationCounterShard
+from experiment.process import (
+    apply_variation_deltas,
+    fold_counter_shards,
+    generate_active_experiments_report,
+    track_variation_event,
+    track_variation_events,
+    with_counter_totals,
+)
+
+
+class CounterShardTest(TestCase):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    fixtures = [os.path.join(base_dir, "fixtures", "experiments.yaml")]
+
+    def setUp(self):
+        self.experiment = Experiment.objects.get(name="Unseen University Ad Campaign")
+        self.experiment.counter_shards = 4
+        self.experiment.save()
+        self.variation = Variation.objects.get(name="Wizards Only Ad")
+
+    def test_sharded_hits_go_to_shard_rows(self):
+        for _ in range(10):
+            track_variation_event(self.experiment.id, self.variation.name, "view")
+        track_variation_event(self.experiment.id, self.variation.name, "conversion")
+
+        self.variation.refresh_from_db()
+        self.assertEqual(self.variation.views, 50)
+        self.assertEqual(self.variation.conversions, 5)
+
+        shards = VariationCounterShard.objects.filter(variation=self.variation)
+        self.assertEqual(shards.count(), 4)
+        self.assertEqual(sum(shard.views for shard in shards), 10)
+        self.assertEqual(sum(shard.conversions for shard in shards), 1)
+
+    def test_sharded_batch_goes_to_shard_rows(self):
+        other = Variation.objects.get(name="Commander Vimes Endorsement")
+        events = [(self.experiment.id, self.variation.name, "view")] * 3 + [
+            (self.experiment.id, self.variation.name, "conversion"),
+            (other.experiment_id, other.name, "view"),
+        ]
+        self.assertEqual(track_variation_events(events), [True] * 5)
+
+        self.variation.refresh_from_db()
+        self.assertEqual((self.variation.views, self.variation.conversions), (50, 5))
+        shards = VariationCounterShard.objects.filter(variation=self.variation)
+        self.assertEqual(sum(shard.views for shard in shards), 3)
+        self.assertEqual(sum(shard.conversions for shard in shards), 1)
+        # All of a variation's batched counts land on a single shard row
+        self.assertEqual(shards.filter(views__gt=0).count(), 1)
+
+        # Unsharded experiments are still updated directly
+        other.refresh_from_db()
+        self.assertEqual(other.views, 201)
+        self.assertFalse(VariationCounterShard.objects.filter(variation=other))
+
+    def test_sharded_unknown_variation(self):
+        self.assertFalse(track_variation_event(self.experiment.id, "Missing", "view"))
+        self.assertFalse(VariationCounterShard.objects.exists())
+
+    def test_counter_totals_include_shards(self):
+        for _ in range(3):
+            track_variation_event(self.experiment.id, self.variation.name, "view")
+
+        variation = with_counter_totals(Variation.objects.filter(pk=self.variation.pk))
+        self.assertEqual(variation.get().total_views, 53)
+        self.assertEqual(variation.get().total_conversions, 5)
+        self.assertIn(
+            "Wizards Only Ad,1,53,9.43%", generate_active_experiments_report()
+        )
+
+    def test_fold_counter_shards(self):
+        for _ in range(7):
+            track_variation_event(self.experiment.id, self.variation.name, "view")
+        track_variation_event(self.experiment.id, self.variation.name, "conversion")
+
+        self.assertEqual(fold_counter_shards(), 1)
+
+        self.variation.refresh_from_db()
+        self.assertEqual(self.variation.views, 57)
+        self.assertEqual(self.variation.conversions, 6)
+        self.assertFalse(
+            VariationCounterShard.objects.filter(
+                Q(views__gt=0) | Q(conversions__gt=0)
+            ).exists()
+        )
+        # Nothing left to fold
+        self.assertEqual(fold_counter_shards(), 0)
+
+    def test_apply_variation_deltas(self):
+        other = Variation.objects.get(name="General Magic Ad")
+        updated = apply_variation_deltas(
+            {
+                self.variation.id: {"views": 3, "conversions": 1},
+                other.id: {"views": 2},
+            }
+        )
+
+        self.assertEqual(updated, 2)
+        self.variation.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.variation.views, self.variation.conversions), (53, 6))
+        self.assertEqual((other.views, other.conversions), (102, 15))
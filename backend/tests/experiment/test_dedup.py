@@ -0,0 +1,162 @@
+import os
+from unittest.mock import patch
+
+import fakeredis
+import redis
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from experiment.cache import clear_experiment_cache
+from experiment.dedup import count_unique_events, record_unique_events
+from experiment.models import Variation
+from experiment.process import (
+    build_active_experiments_report,
+    generate_active_experiments_report,
+    track_variation_event,
+    track_variation_events,
+)
+
+
+class RedisTestMixin:
+    def setUp(self):
+        super().setUp()
+        self.redis = fakeredis.FakeRedis()
+        patcher = patch("experiment.dedup.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+@override_settings(EXPERIMENT_DEDUP_WINDOW_SECONDS=3600)
+class RecordUniqueEventsTest(RedisTestMixin, SimpleTestCase):
+    def test_repeated_conversions_are_duplicates(self):
+        self.assertEqual(record_unique_events("v1", [(1, 1, "conversions")]), [True])
+        self.assertEqual(record_unique_events("v1", [(1, 1, "conversions")]), [False])
+        # Another visitor, or another experiment, is not a duplicate
+        self.assertEqual(record_unique_events("v2", [(1, 1, "conversions")]), [True])
+        self.assertEqual(record_unique_events("v1", [(2, 3, "conversions")]), [True])
+
+    def test_views_are_never_duplicates(self):
+        events = [(1, 1, "views"), (1, 1, "views")]
+
+        self.assertEqual(record_unique_events("v1", events), [True, True])
+        self.assertEqual(record_unique_events("v1", events), [True, True])
+
+    def test_duplicates_within_a_batch(self):
+        events = [(1, 1, "conversions"), (1, 1, "views"), (1, 1, "conversions")]
+
+        self.assertEqual(record_unique_events("v1", events), [True, True, False])
+
+    def test_previous_window_is_checked(self):
+        with patch("experiment.dedup.time.time", return_value=3600 * 10):
+            record_unique_events("v1", [(1, 1, "conversions")])
+        with patch("experiment.dedup.time.time", return_value=3600 * 11):
+            self.assertEqual(
+                record_unique_events("v1", [(1, 1, "conversions")]), [False]
+            )
+        with patch("experiment.dedup.time.time", return_value=3600 * 13):
+            self.assertEqual(
+                record_unique_events("v1", [(1, 1, "conversions")]), [True]
+            )
+
+    def test_bloom_filter_expires(self):
+        record_unique_events("v1", [(1, 1, "conversions")])
+
+        bloom_keys = self.redis.keys("experiment:dedup:bloom:*")
+        self.assertEqual(len(bloom_keys), 1)
+        self.assertEqual(self.redis.ttl(bloom_keys[0]), 7200)
+
+    def test_redis_error_on_execute(self):
+        pipeline = self.redis.pipeline(transaction=True)
+        with patch.object(self.redis, "pipeline", return_value=pipeline):
+            with patch.object(
+                pipeline, "execute", side_effect=redis.ConnectionError("down")
+            ):
+                self.assertEqual(
+                    record_unique_events(
+                        "v1", [(1, 1, "conversions"), (1, 1, "conversions")]
+                    ),
+                    [True, True],
+                )
+
+    def test_count_unique_events(self):
+        for visitor in ("v1", "v2", "v3"):
+            record_unique_events(visitor, [(1, 1, "views")])
+        record_unique_events("v1", [(1, 1, "conversions"), (1, 1, "conversions")])
+
+        self.assertEqual(
+            count_unique_events([1, 2]),
+            {1: {"views": 3, "conversions": 1}, 2: {"views": 0, "conversions": 0}},
+        )
+
+
+@override_settings(EXPERIMENT_DEDUP_ENABLED=True)
+class DeduplicatedTrackingTest(RedisTestMixin, TestCase):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    fixtures = [os.path.join(base_dir, "fixtures", "experiments.yaml")]
+
+    def setUp(self):
+        super().setUp()
+        clear_experiment_cache()
+        self.variation = Variation.objects.get(name="Wizards Only Ad")
+
+    def track(self, event, subject_id):
+        return track_variation_event(
+            self.variation.experiment_id, self.variation.name, event, subject_id
+        )
+
+    def test_repeated_conversion_is_counted_once(self):
+        self.assertTrue(self.track("conversion", "v1"))
+        self.assertTrue(self.track("conversion", "v1"))
+        self.assertTrue(self.track("conversion", "v2"))
+
+        self.variation.refresh_from_db()
+        self.assertEqual(self.variation.conversions, 5 + 2)
+
+    def test_views_are_all_counted(self):
+        self.track("view", "v1")
+        self.track("view", "v1")
+
+        self.variation.refresh_from_db()
+        self.assertEqual(self.variation.views, 50 + 2)
+
+    def test_events_without_subject_are_not_deduplicated(self):
+        self.track("conversion", None)
+        self.track("conversion", None)
+
+        self.variation.refresh_from_db()
+        self.assertEqual(self.variation.conversions, 5 + 2)
+
+    def test_batch_deduplication(self):
+        experiment_id = self.variation.experiment_id
+        events = [
+            (experiment_id, self.variation.name, "conversion"),
+            (experiment_id, self.variation.name, "view"),
+            (experiment_id, "Missing", "conversion"),
+            (experiment_id, self.variation.name, "conversion"),
+        ]
+
+        self.assertEqual(
+            track_variation_events(events, "v1"), [True, True, False, True]
+        )
+
+        self.variation.refresh_from_db()
+        self.assertEqual((self.variation.views, self.variation.conversions), (51, 6))
+
+    def test_report_shows_unique_visitors(self):
+        self.track("view", "v1")
+        self.track("view", "v1")
+        self.track("view", "v2")
+        self.track("conversion", "v2")
+
+        control = build_active_experiments_report()[0].variations[0]
+        self.assertEqual((control.unique_views, control.unique_conversions), (2, 1))
+        self.assertIn(
+            "Wizards Only Ad,1,53,11.32%", generate_active_experiments_report()
+        )
+        self.assertIn(",control,control,2,1\n", generate_active_experiments_report())
+
+    @override_settings(EXPERIMENT_DEDUP_ENABLED=False)
+    def test_report_without_deduplication(self):
+        control = build_active_experiments_report()[0].variations[0]
+
+        self.assertIsNone(control.unique_views)
+        self.assertIn(",control,control,-,-\n", generate_active_experiments_report())
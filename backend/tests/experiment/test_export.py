@@ -0,0 +1,93 @@
+import csv
+import io
+import os
+import tempfile
+from unittest.mock import patch
+
+import pyarrow.parquet as pq
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from experiment.export import ExportError, stream_export
+from experiment.models import Variation
+
+
+class ExportTest(TestCase):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    fixtures = [os.path.join(base_dir, "fixtures", "experiments.yaml")]
+
+    def read_csv(self, chunks):
+        return list(csv.DictReader(io.StringIO("".join(chunks))))
+
+    def test_csv_export(self):
+        variation = Variation.objects.get(name="Wizards Only Ad")
+        variation.shards.create(shard=0, views=5, conversions=1)
+
+        rows = self.read_csv(stream_export("variations", "csv", chunk_size=2))
+
+        self.assertEqual(len(rows), Variation.objects.count())
+        row = next(row for row in rows if row["name"] == "Wizards Only Ad")
+        self.assertEqual(row["views"], "55")
+        self.assertEqual(row["conversions"], "6")
+        self.assertEqual(row["experiment_id"], str(variation.experiment_id))
+
+    def test_csv_export_streams_lines(self):
+        chunks = list(stream_export("experiments", "csv", chunk_size=1))
+
+        self.assertEqual(
+            chunks[0].strip(), "id,name,description,is_active,counter_shards,created_at"
+        )
+        self.assertEqual(len(chunks), 4)
+
+    def test_parquet_export(self):
+        chunks = list(stream_export("variations", "parquet", chunk_size=2))
+        table = pq.read_table(io.BytesIO(b"".join(chunks)))
+
+        self.assertEqual(table.num_rows, Variation.objects.count())
+        self.assertEqual(pq.ParquetFile(io.BytesIO(b"".join(chunks))).num_row_groups, 3)
+        self.assertEqual(
+            sorted(table.column("name").to_pylist()),
+            sorted(Variation.objects.values_list("name", flat=True)),
+        )
+
+    def test_parquet_export_of_empty_table(self):
+        chunks = list(stream_export("stats", "parquet", chunk_size=10))
+
+        self.assertEqual(pq.read_table(io.BytesIO(b"".join(chunks))).num_rows, 0)
+
+    def test_parquet_requires_pyarrow(self):
+        with patch.dict("sys.modules", {"pyarrow": None}):
+            with self.assertRaisesMessage(ExportError, "requires the pyarrow"):
+                stream_export("variations", "parquet", chunk_size=10)
+
+    def test_unknown_table_and_format(self):
+        with self.assertRaises(ExportError):
+            stream_export("users", "csv", chunk_size=10)
+        with self.assertRaises(ExportError):
+            stream_export("variations", "xlsx", chunk_size=10)
+
+    def test_export_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "experiments.csv")
+            call_command("export_experiments", "experiments", output=path)
+
+            with open(path) as output:
+                rows = list(csv.DictReader(output))
+
+        self.assertEqual(
+            [row["name"] for row in rows][0], "Unseen University Ad Campaign"
+        )
+
+    def test_export_command_parquet_to_stdout(self):
+        stdout = io.BytesIO()
+        with patch("sys.stdout", io.TextIOWrapper(stdout)):
+            call_command("export_experiments", "stats", format="parquet")
+            output = stdout.getvalue()
+
+        self.assertEqual(pq.read_table(io.BytesIO(output)).num_rows, 0)
+
+    def test_export_command_missing_pyarrow(self):
+        with patch.dict("sys.modules", {"pyarrow": None}):
+            with self.assertRaises(CommandError):
+                call_command("export_experiments", "stats", format="parquet")
@@ -2,8 +2,13 @@ import os
 
 from django.test import TestCase
 
-from experiment.models import Experiment
-from experiment.process import generate_active_experiments_report
+from experiment.models import Experiment, Variation
+from experiment.process import (
+    VariationReport,
+    build_active_experiments_report,
+    generate_active_experiments_report,
+    track_variation_event,
+)
 
 
 class GenerateActiveExperimentsReportTest(TestCase):
@@ -34,9 +39,14 @@ class GenerateActiveExperimentsReportTest(TestCase):
         self.assertIn("Variations:", report)
 
         # Check variation data
-        self.assertIn("Name,Weight,Views,Conversion Rate", report)
-        self.assertIn("Wizards Only Ad,1,50,10.00%", report)
-        self.assertIn("General Magic Ad,2,100,15.00%", report)
+        self.assertIn(
+            "Name,Weight,Views,Conversion Rate,CI Low,CI High,P-Value,P(Beat Control)",
+            report,
+        )
+        self.assertIn(
+            "Wizards Only Ad,1,50,10.00%,4.35%,21.36%,control,control", report
+        )
+        self.assertIn("General Magic Ad,2,100,15.00%,9.31%,23.28%,0.3958,", report)
 
         # Check that inactive experiments are not included
         self.assertNotIn("Lancre Witch Potion Sales", report)
@@ -57,3 +67,97 @@ class GenerateActiveExperimentsReportTest(TestCase):
             f"{variation.views},{variation.conversions / variation.views:.2%}"
         )
         self.assertIn(expected_conversion_rate, report)
+
+
+class BuildActiveExperimentsReportTest(TestCase):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    fixtures = [
+        os.path.join(base_dir, "fixtures/experiments.yaml"),
+    ]
+
+    def add_experiments(self, count):
+        start = Experiment.objects.count()
+        for i in range(start, start + count):
+            experiment = Experiment.objects.create(name=f"Extra {i}", is_active=True)
+            Variation.objects.create(experiment=experiment, name="A", views=10)
+            Variation.objects.create(
+                experiment=experiment, name="B", views=10, conversions=2
+            )
+
+    def test_structured_report(self):
+        reports = build_active_experiments_report()
+
+        self.assertEqual(
+            [report.name for report in reports],
+            ["Unseen University Ad Campaign", "Ankh-Morpork Recruitment Campaign"],
+        )
+        control, variation = reports[0].variations
+        self.assertIsInstance(control, VariationReport)
+        self.assertEqual(
+            (control.name, control.views, control.conversions),
+            ("Wizards Only Ad", 50, 5),
+        )
+        self.assertTrue(control.is_control)
+        self.assertIsNone(control.p_value)
+        self.assertAlmostEqual(variation.conversion_rate, 0.15)
+        self.assertFalse(variation.is_control)
+        self.assertAlmostEqual(variation.p_value, 0.3958, places=4)
+
+    def test_query_count_is_constant(self):
+        self.add_experiments(2)
+        with self.assertNumQueries(2):
+            self.assertEqual(len(build_active_experiments_report()), 4)
+
+        self.add_experiments(20)
+        with self.assertNumQueries(2):
+            self.assertEqual(len(build_active_experiments_report()), 24)
+
+    def test_more_conversions_than_views(self):
+        Variation.objects.filter(name="General Magic Ad").update(views=0, conversions=1)
+
+        variation = build_active_experiments_report()[0].variations[1]
+
+        self.assertEqual((variation.views, variation.conversions), (0, 1))
+        self.assertEqual(variation.conversion_rate, 0)
+        self.assertIn(
+            "General Magic Ad,2,0,0.00%", generate_active_experiments_report()
+        )
+
+    def test_report_includes_shard_totals(self):
+        variation = Variation.objects.get(name="Wizards Only Ad")
+        variation.shards.create(shard=0, views=5, conversions=1)
+
+        control = build_active_experiments_report()[0].variations[0]
+
+        self.assertEqual((control.views, control.conversions), (55, 6))
+
+
+class TrackVariationEventTest(TestCase):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    fixtures = [
+        os.path.join(base_dir, "fixtures/experiments.yaml"),
+    ]
+
+    def test_track_view_increments_views(self):
+        variation = Variation.objects.get(name="Wizards Only Ad")
+        self.assertTrue(
+            track_variation_event(variation.experiment_id, variation.name, "view")
+        )
+        variation.refresh_from_db()
+        self.assertEqual(variation.views, 51)
+        self.assertEqual(variation.conversions, 5)
+
+    def test_track_conversion_increments_conversions(self):
+        variation = Variation.objects.get(name="Wizards Only Ad")
+        self.assertTrue(
+            track_variation_event(variation.experiment_id, variation.name, "conversion")
+        )
+        variation.refresh_from_db()
+        self.assertEqual(variation.views, 50)
+        self.assertEqual(variation.conversions, 6)
+
+    def test_track_unknown_variation(self):
+        variation = Variation.objects.get(name="Wizards Only Ad")
+        self.assertFalse(
+            track_variation_event(variation.experiment_id, "Missing", "view")
+        )
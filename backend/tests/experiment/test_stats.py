@@ -0,0 +1,141 @@
+import math
+from unittest.mock import patch
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from experiment.stats import (
+    compare_variations,
+    probability_to_beat_control,
+    two_proportion_p_values,
+    wilson_interval,
+)
+
+
+def reference_p_value(c1, n1, c2, n2):
+    pooled = (c1 + c2) / (n1 + n2)
+    z = abs(c1 / n1 - c2 / n2) / math.sqrt(pooled * (1 - pooled) * (1 / n1 + 1 / n2))
+    return math.erfc(z / math.sqrt(2))
+
+
+class WilsonIntervalTest(SimpleTestCase):
+    def test_interval(self):
+        low, high = wilson_interval([5, 15], [50, 100])
+
+        np.testing.assert_allclose(low, [0.04348, 0.09306], atol=1e-5)
+        np.testing.assert_allclose(high, [0.21360, 0.23284], atol=1e-5)
+
+    def test_no_views(self):
+        low, high = wilson_interval([0], [0])
+
+        self.assertEqual((low[0], high[0]), (0, 0))
+
+    def test_bounds(self):
+        low, high = wilson_interval([0, 20], [20, 20])
+
+        self.assertEqual(low[0], 0)
+        self.assertEqual(high[1], 1)
+
+
+class TwoProportionTest(SimpleTestCase):
+    def test_matches_reference(self):
+        cases = [(15, 100, 5, 50), (30, 200, 20, 200), (1, 1000, 9, 1000)]
+        p_values = two_proportion_p_values(*zip(*cases))
+
+        for p_value, case in zip(p_values, cases):
+            self.assertAlmostEqual(p_value, reference_p_value(*case), places=6)
+
+    def test_untestable_comparisons(self):
+        p_values = two_proportion_p_values(
+            [0, 3, 0], [0, 10, 10], [2, 0, 0], [10, 0, 10]
+        )
+
+        np.testing.assert_array_equal(p_values, [1, 1, 1])
+
+
+class ProbabilityToBeatControlTest(SimpleTestCase):
+    def test_probabilities(self):
+        probabilities = probability_to_beat_control(
+            [200, 100, 100], [1000, 1000, 1000], [100, 200, 100], [1000, 1000, 1000]
+        )
+
+        self.assertGreater(probabilities[0], 0.99)
+        self.assertLess(probabilities[1], 0.01)
+        self.assertAlmostEqual(probabilities[2], 0.5, delta=0.02)
+
+    def test_seeded(self):
+        args = ([12], [100], [10], [100])
+
+        self.assertEqual(
+            probability_to_beat_control(*args, seed=3)[0],
+            probability_to_beat_control(*args, seed=3)[0],
+        )
+
+    def test_chunks(self):
+        with patch("experiment.stats.MAX_DRAWS_PER_CHUNK", 2000):
+            probabilities = probability_to_beat_control(
+                [50] * 5, [100] * 5, [10] * 5, [100] * 5, samples=1000
+            )
+
+        self.assertEqual(probabilities.shape, (5,))
+        self.assertTrue((probabilities > 0.99).all())
+
+    def test_normal_approximation(self):
+        args = (
+            [120, 100, 900, 2000],
+            [1000, 1000, 10000, 10000],
+            [100, 100, 1000, 1950],
+        )
+        control_views = [1000, 1000, 10000, 100000]
+
+        with patch("experiment.stats.np.random.default_rng") as default_rng:
+            approximated = probability_to_beat_control(*args, control_views)
+        sampled = probability_to_beat_control(
+            *args, control_views, samples=200_000, normal_min=np.inf
+        )
+
+        default_rng.return_value.beta.assert_not_called()
+        np.testing.assert_allclose(approximated, sampled, atol=0.01)
+
+    def test_small_counts_are_sampled(self):
+        with patch("experiment.stats.np.random.default_rng") as default_rng:
+            default_rng.return_value.beta.side_effect = [
+                np.ones((1, 10)),
+                np.zeros((1, 10)),
+            ]
+            probabilities = probability_to_beat_control(
+                [100, 5], [1000, 1000], [100, 3], [1000, 1000], samples=10
+            )
+
+        self.assertAlmostEqual(probabilities[0], 0.5)
+        self.assertEqual(probabilities[1], 1)
+
+
+class CompareVariationsTest(SimpleTestCase):
+    def test_compare_across_experiments(self):
+        result = compare_variations(
+            conversions=[5, 15, 3, 0],
+            views=[50, 100, 10, 0],
+            control_index=[0, 0, 2, 2],
+        )
+
+        np.testing.assert_array_equal(result["is_control"], [True, False, True, False])
+        np.testing.assert_allclose(result["rate"], [0.1, 0.15, 0.3, 0])
+        self.assertAlmostEqual(result["p_value"][0], 1)
+        self.assertAlmostEqual(
+            result["p_value"][1], reference_p_value(15, 100, 5, 50), places=6
+        )
+        self.assertEqual(result["p_value"][3], 1)
+        self.assertGreater(result["p_beat_control"][1], 0.5)
+
+    def test_more_conversions_than_views(self):
+        # Views and conversions are tracked separately, so this can happen
+        result = compare_variations(
+            conversions=[5, 3, 1], views=[2, 10, 0], control_index=[0, 0, 0]
+        )
+
+        np.testing.assert_allclose(result["rate"], [1, 0.3, 0])
+        self.assertEqual(result["ci_high"][0], 1)
+        for values in result.values():
+            self.assertFalse(np.isnan(values.astype(np.float64)).any())
+        self.assertLess(result["p_beat_control"][1], 0.5)
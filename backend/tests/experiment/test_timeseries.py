@@ -0,0 +1,143 @@
+import os
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.utils.timezone import now
+
+from experiment.cache import clear_experiment_cache
+from experiment.models import Variation, VariationStat
+from experiment.process import fold_counter_shards, track_variation_event
+from experiment.timeseries import (
+    bucket_start,
+    compact_variation_stats,
+    daily_variation_stats,
+    record_variation_stats,
+)
+
+
+class VariationStatsTest(TestCase):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    fixtures = [os.path.join(base_dir, "fixtures", "experiments.yaml")]
+
+    def setUp(self):
+        clear_experiment_cache()
+        self.variation = Variation.objects.get(name="Wizards Only Ad")
+        self.other = Variation.objects.get(name="General Magic Ad")
+
+    def test_record_upserts_hour_buckets(self):
+        at = now().replace(hour=10, minute=15)
+        record_variation_stats({self.variation.id: {"views": 2}}, at=at)
+        record_variation_stats(
+            {
+                self.variation.id: {"views": 3, "conversions": 1},
+                self.other.id: {"views": 1},
+            },
+            at=at.replace(minute=45),
+        )
+
+        stat = VariationStat.objects.get(variation=self.variation)
+        self.assertEqual(stat.period, VariationStat.HOUR)
+        self.assertEqual(stat.bucket, bucket_start(at, VariationStat.HOUR))
+        self.assertEqual((stat.views, stat.conversions), (5, 1))
+        self.assertEqual(VariationStat.objects.get(variation=self.other).views, 1)
+
+    def test_bucket_key_is_unique(self):
+        # Created without its covering columns where they are unsupported,
+        # since the upsert needs the key
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, VariationStat._meta.db_table
+            )
+        constraint = constraints["unique_variation_stat_bucket"]
+        self.assertTrue(constraint["unique"])
+        self.assertEqual(constraint["columns"], ["variation_id", "period", "bucket"])
+
+    def test_next_hour_gets_a_new_bucket(self):
+        at = now().replace(hour=10)
+        record_variation_stats({self.variation.id: {"views": 1}}, at=at)
+        record_variation_stats(
+            {self.variation.id: {"views": 1}}, at=at + timedelta(hours=1)
+        )
+
+        self.assertEqual(VariationStat.objects.count(), 2)
+
+    def test_tracking_records_stats(self):
+        experiment_id = self.variation.experiment_id
+        track_variation_event(experiment_id, self.variation.name, "view")
+        track_variation_event(experiment_id, self.variation.name, "conversion")
+
+        stat = VariationStat.objects.get(variation=self.variation)
+        self.assertEqual((stat.views, stat.conversions), (1, 1))
+
+    def test_folding_shards_records_stats(self):
+        experiment = self.variation.experiment
+        experiment.counter_shards = 2
+        experiment.save()
+        track_variation_event(experiment.id, self.variation.name, "view")
+        self.assertFalse(VariationStat.objects.exists())
+
+        fold_counter_shards()
+
+        self.assertEqual(VariationStat.objects.get(variation=self.variation).views, 1)
+
+    def test_compact_hours_into_days(self):
+        old_day = bucket_start(now(), VariationStat.DAY) - timedelta(days=10)
+        for hour in (1, 5, 23):
+            record_variation_stats(
+                {self.variation.id: {"views": hour, "conversions": 1}},
+                at=old_day + timedelta(hours=hour),
+            )
+        recent = now() - timedelta(hours=1)
+        record_variation_stats({self.variation.id: {"views": 4}}, at=recent)
+        # A day bucket past the retention period
+        VariationStat.objects.create(
+            variation=self.variation,
+            period=VariationStat.DAY,
+            bucket=old_day - timedelta(days=30),
+            views=1,
+        )
+
+        self.assertEqual(compact_variation_stats(7, 20), 3)
+
+        day = VariationStat.objects.get(period=VariationStat.DAY)
+        self.assertEqual(day.bucket, old_day)
+        self.assertEqual((day.views, day.conversions), (29, 3))
+        hour = VariationStat.objects.get(period=VariationStat.HOUR)
+        self.assertEqual(hour.views, 4)
+
+    def test_daily_stats_merge_hours_and_days(self):
+        today = bucket_start(now(), VariationStat.DAY)
+        VariationStat.objects.create(
+            variation=self.variation,
+            period=VariationStat.DAY,
+            bucket=today - timedelta(days=20),
+            views=10,
+            conversions=2,
+        )
+        VariationStat.objects.create(
+            variation=self.variation,
+            period=VariationStat.DAY,
+            bucket=today - timedelta(days=120),
+            views=99,
+        )
+        record_variation_stats({self.variation.id: {"views": 1}}, at=today)
+        record_variation_stats(
+            {self.variation.id: {"views": 2, "conversions": 1}},
+            at=today + timedelta(hours=3),
+        )
+
+        series = daily_variation_stats([self.variation.id, self.other.id], 90)
+
+        self.assertEqual(
+            series[self.variation.id],
+            [
+                {
+                    "date": (today - timedelta(days=20)).date().isoformat(),
+                    "views": 10,
+                    "conversions": 2,
+                },
+                {"date": today.date().isoformat(), "views": 3, "conversions": 1},
+            ],
+        )
+        self.assertEqual(series[self.other.id], [])
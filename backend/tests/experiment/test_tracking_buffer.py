@@ -0,0 +1,148 @@
+import os
+from unittest.mock import patch
+
+import fakeredis
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from experiment.buffer import FLUSHING_KEY, PENDING_KEY, claim_buffered_events
+from experiment.cache import get_experiment_snapshots
+from experiment.models import TrackingFlush, Variation
+from experiment.process import flush_buffered_events, track_variation_event
+
+
+@override_settings(EXPERIMENT_TRACKING_BUFFER=True)
+class TrackingBufferTest(TestCase):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    fixtures = [os.path.join(base_dir, "fixtures", "experiments.yaml")]
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        patcher = patch("experiment.buffer.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.variation = Variation.objects.get(name="Wizards Only Ad")
+        get_experiment_snapshots()
+
+    def track(self, event, times=1, name=None):
+        for _ in range(times):
+            track_variation_event(
+                self.variation.experiment_id, name or self.variation.name, event
+            )
+
+    def assertCounts(self, views, conversions):
+        self.variation.refresh_from_db()
+        self.assertEqual(self.variation.views, views)
+        self.assertEqual(self.variation.conversions, conversions)
+
+    def test_tracking_skips_the_database(self):
+        with self.assertNumQueries(0):
+            self.track("view", times=3)
+            self.track("conversion")
+
+        self.assertCounts(50, 5)
+        self.assertTrue(self.redis.exists(PENDING_KEY))
+
+    def test_flush_applies_buffered_events(self):
+        self.track("view", times=3)
+        self.track("conversion", times=2)
+
+        self.assertEqual(flush_buffered_events(), 1)
+
+        self.assertCounts(53, 7)
+        self.assertFalse(self.redis.exists(PENDING_KEY))
+        self.assertFalse(self.redis.exists(FLUSHING_KEY))
+        self.assertEqual(TrackingFlush.objects.count(), 1)
+
+    def test_flush_is_single_update(self):
+        other = Variation.objects.get(name="General Magic Ad")
+        self.track("view", times=2)
+        track_variation_event(other.experiment_id, other.name, "conversion")
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(flush_buffered_events(), 2)
+
+        updates = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "experiment_variation"')
+        ]
+        self.assertEqual(len(updates), 1)
+
+    def test_flush_with_nothing_buffered(self):
+        self.assertEqual(flush_buffered_events(), 0)
+        self.assertFalse(TrackingFlush.objects.exists())
+
+    def test_unknown_variations_are_rejected(self):
+        self.assertFalse(
+            track_variation_event(self.variation.experiment_id, "Missing", "view")
+        )
+        self.assertFalse(self.redis.exists(PENDING_KEY))
+
+    def test_variations_deleted_before_flush_are_dropped(self):
+        self.track("view")
+        self.track("view", name="General Magic Ad")
+        Variation.objects.filter(name="General Magic Ad").delete()
+
+        self.assertEqual(flush_buffered_events(), 1)
+        self.assertCounts(51, 5)
+
+    def test_flush_retried_after_crash_before_commit(self):
+        self.track("view", times=4)
+
+        with patch(
+            "experiment.process.apply_variation_deltas", side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                flush_buffered_events()
+
+        self.assertCounts(50, 5)
+        self.assertTrue(self.redis.exists(FLUSHING_KEY))
+
+        # Hits arriving after the crash go to a fresh buffer
+        self.track("view")
+        flush_buffered_events()
+        self.assertCounts(54, 5)
+        flush_buffered_events()
+        self.assertCounts(55, 5)
+
+    def test_flush_is_exactly_once_after_crash_before_release(self):
+        self.track("view", times=4)
+
+        with patch(
+            "experiment.process.release_buffered_events", side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                flush_buffered_events()
+
+        self.assertCounts(54, 5)
+        self.assertTrue(self.redis.exists(FLUSHING_KEY))
+
+        # The re-claimed batch was already committed and is not applied again
+        self.assertEqual(flush_buffered_events(), 0)
+        self.assertCounts(54, 5)
+        self.assertFalse(self.redis.exists(FLUSHING_KEY))
+
+    def test_overlapping_flush_keeps_newer_batch(self):
+        self.track("view", times=4)
+        # A second worker claims the same batch and stalls before committing
+        stale = claim_buffered_events()
+
+        flush_buffered_events()
+        self.assertCounts(54, 5)
+
+        # A third worker claims a newer batch and has not committed it yet
+        self.track("view", times=2)
+        newer_id, _ = claim_buffered_events()
+        self.assertNotEqual(newer_id, stale[0])
+
+        # The stalled worker finds its batch already applied
+        with patch("experiment.process.claim_buffered_events", return_value=stale):
+            self.assertEqual(flush_buffered_events(), 0)
+
+        # The newer batch is still there to be retried
+        self.assertTrue(self.redis.exists(FLUSHING_KEY))
+        flush_buffered_events()
+        self.assertCounts(56, 5)
+        self.assertFalse(self.redis.exists(FLUSHING_KEY))
@@ -1,5 +1,15 @@
 from django.conf import settings
 from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+# Settings overridden for every test. Tests that need one of them on enable it
+# with override_settings.
+TEST_SETTINGS = {
+    # No broker runs under test, so don't subscribe to or publish invalidations
+    "EXPERIMENT_CACHE_BROADCAST": False,
+    "JWT_BLACKLIST_BROADCAST": False,
+    "JWT_USER_CACHE_BROADCAST": False,
+}
 
 
 class CollectOnlyTestRunner(DiscoverRunner):
@@ -20,6 +30,15 @@ class CollectOnlyTestRunner(DiscoverRunner):
             help="List tests without running them",
         )
 
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.test_settings = override_settings(**TEST_SETTINGS)
+        self.test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_settings.disable()
+        super().teardown_test_environment(**kwargs)
+
     def run_tests(self, test_labels, **kwargs):
         """
         Run the test suite with collect-only support
@@ -0,0 +1,81 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+
+from account.models import OneTimePassword
+from experiment.models import Experiment
+from worker.tasks import delete_invalid_otps
+from worker.utils import chunked_delete
+
+
+class ChunkedDeleteTest(TestCase):
+    def setUp(self):
+        self.experiments = [
+            Experiment.objects.create(name=f"experiment-{i}", is_active=i % 2 == 0)
+            for i in range(7)
+        ]
+
+    def test_deletes_in_batches(self):
+        reports = []
+
+        with patch("worker.utils.time.sleep") as sleep:
+            result = chunked_delete(
+                Experiment.objects.filter(is_active=True),
+                batch_size=2,
+                sleep=0.5,
+                progress=reports.append,
+            )
+
+        self.assertEqual(result.deleted, 4)
+        self.assertEqual(result.batches, 2)
+        self.assertEqual(result.last_pk, self.experiments[6].pk)
+        self.assertEqual([report.deleted for report in reports], [2, 4])
+        sleep.assert_called_with(0.5)
+        self.assertFalse(Experiment.objects.filter(is_active=True).exists())
+        self.assertEqual(Experiment.objects.count(), 3)
+
+    def test_resumes_after_pk(self):
+        result = chunked_delete(
+            Experiment.objects.all(),
+            batch_size=10,
+            start_after=self.experiments[3].pk,
+        )
+
+        self.assertEqual(result.deleted, 3)
+        self.assertEqual(
+            list(Experiment.objects.values_list("pk", flat=True)),
+            [experiment.pk for experiment in self.experiments[:4]],
+        )
+
+    def test_nothing_to_delete(self):
+        result = chunked_delete(Experiment.objects.none(), batch_size=10)
+
+        self.assertEqual(result.deleted, 0)
+        self.assertEqual(result.batches, 0)
+        self.assertIsNone(result.last_pk)
+
+
+class DeleteInvalidOtpsBatchTest(TestCase):
+    @override_settings(CLEANUP_BATCH_SIZE=2, CLEANUP_BATCH_SLEEP_SECONDS=0)
+    def test_deletes_invalid_otps_in_batches(self):
+        users = [
+            get_user_model().objects.create_user(
+                username=f"user{i}", email=f"user{i}@example.com"
+            )
+            for i in range(5)
+        ]
+        for user in users:
+            OneTimePassword.objects.create(user=user)
+        OneTimePassword.objects.filter(user__in=users[:4]).update(
+            expires=now() - timedelta(minutes=1)
+        )
+
+        delete_invalid_otps()
+
+        self.assertEqual(
+            list(OneTimePassword.objects.values_list("user", flat=True)),
+            [users[4].pk],
+        )
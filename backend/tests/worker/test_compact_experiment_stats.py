@@ -0,0 +1,29 @@
+import os
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+
+from experiment.models import Variation, VariationStat
+from worker.tasks import compact_experiment_stats
+
+
+class CompactExperimentStatsTest(TestCase):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    fixtures = [os.path.join(base_dir, "fixtures", "experiments.yaml")]
+
+    @override_settings(EXPERIMENT_STATS_HOURLY_RETENTION_DAYS=7)
+    def test_compact_experiment_stats_task(self):
+        variation = Variation.objects.first()
+        VariationStat.objects.create(
+            variation=variation,
+            period=VariationStat.HOUR,
+            bucket=(now() - timedelta(days=30)).replace(minute=0, second=0),
+            views=3,
+        )
+
+        compact_experiment_stats()
+
+        stat = VariationStat.objects.get()
+        self.assertEqual(stat.period, VariationStat.DAY)
+        self.assertEqual(stat.views, 3)
@@ -0,0 +1,25 @@
+import os
+
+from django.test import TestCase
+
+from experiment.models import Variation, VariationCounterShard
+from worker.tasks import fold_variation_counter_shards
+
+
+class FoldVariationCounterShardsTest(TestCase):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    fixtures = [os.path.join(base_dir, "fixtures", "experiments.yaml")]
+
+    def test_fold_variation_counter_shards_task(self):
+        variation = Variation.objects.first()
+        views = variation.views
+        VariationCounterShard.objects.create(variation=variation, shard=0, views=4)
+        VariationCounterShard.objects.create(variation=variation, shard=1, views=2)
+
+        fold_variation_counter_shards()
+
+        variation.refresh_from_db()
+        self.assertEqual(variation.views, views + 6)
+        self.assertEqual(
+            sum(VariationCounterShard.objects.values_list("views", flat=True)), 0
+        )
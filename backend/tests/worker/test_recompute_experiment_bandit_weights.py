@@ -0,0 +1,28 @@
+import os
+
+from django.test import TestCase
+
+from experiment.models import Experiment, Variation
+from worker.tasks import recompute_experiment_bandit_weights
+
+
+class RecomputeExperimentBanditWeightsTest(TestCase):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    fixtures = [os.path.join(base_dir, "fixtures", "experiments.yaml")]
+
+    def test_recompute_experiment_bandit_weights_task(self):
+        experiment = Experiment.objects.first()
+        experiment.allocation_mode = Experiment.UCB1
+        experiment.save()
+
+        recompute_experiment_bandit_weights()
+
+        weights = Variation.objects.filter(experiment=experiment).values_list(
+            "bandit_weight", flat=True
+        )
+        self.assertTrue(all(weight is not None for weight in weights))
+        self.assertFalse(
+            Variation.objects.exclude(experiment=experiment)
+            .filter(bandit_weight__isnull=False)
+            .exists()
+        )
@@ -1,5 +1,6 @@
 from datetime import timedelta
 
+from celery import Task
 from celery.schedules import crontab
 from django.conf import settings
 from django.db.models import Q
@@ -7,19 +8,50 @@ from django.utils import timezone
 
 from account.emails import experiment_report_email
 from account.models import OneTimePassword
+from account.partitions import (
+    create_partitions,
+    drop_expired_partitions,
+    is_partitioned,
+)
+from experiment.bandit import recompute_bandit_weights
+from experiment.process import flush_buffered_events, fold_counter_shards
+from experiment.timeseries import compact_variation_stats
 from worker.celery_config import app
+from worker.utils import chunked_delete
 
 schedule = {
     "make_a_wish": {
         "task": "worker.tasks.make_a_wish",
         "schedule": crontab(minute="11", hour="11"),
     },
-    "delete_expired_otps": {
-        "task": "worker.tasks.delete_expired_otps",
+    "delete_invalid_otps": {
+        "task": "worker.tasks.delete_invalid_otps",
         "schedule": crontab(hour=0, minute=0),
     },
+    "maintain_otp_partitions": {
+        "task": "worker.tasks.maintain_otp_partitions",
+        "schedule": crontab(hour=0, minute=5),
+    },
+    "fold_variation_counter_shards": {
+        "task": "worker.tasks.fold_variation_counter_shards",
+        "schedule": crontab(minute="*"),
+    },
+    "compact_experiment_stats": {
+        "task": "worker.tasks.compact_experiment_stats",
+        "schedule": crontab(hour=1, minute=0),
+    },
+    "recompute_experiment_bandit_weights": {
+        "task": "worker.tasks.recompute_experiment_bandit_weights",
+        "schedule": timedelta(seconds=settings.EXPERIMENT_BANDIT_INTERVAL_SECONDS),
+    },
 }
 
+if settings.EXPERIMENT_TRACKING_BUFFER:
+    schedule["flush_experiment_tracking_buffer"] = {
+        "task": "worker.tasks.flush_experiment_tracking_buffer",
+        "schedule": timedelta(seconds=settings.EXPERIMENT_BUFFER_FLUSH_SECONDS),
+    }
+
 if settings.DEBUG:  # pragma: no cover
     schedule["test_task"] = {
         "task": "worker.tasks.test_task",
@@ -39,14 +71,52 @@ def make_a_wish():
     print("11:11 - Make a wish!")  # pragma: no cover
 
 
-@app.task
+# Not wrapped in a transaction: every batch commits on its own, so locks are
+# short and an interrupted run picks up where it stopped.
+@app.task(base=Task)
 def delete_invalid_otps():
     invalid_cond = Q(expires__lt=timezone.now()) | Q(is_active=False)
     invalid_otps = OneTimePassword.objects.filter(invalid_cond)
-    invalid_otps.delete()
+    chunked_delete(
+        invalid_otps,
+        settings.CLEANUP_BATCH_SIZE,
+        settings.CLEANUP_BATCH_SLEEP_SECONDS,
+    )
+
+
+@app.task
+def maintain_otp_partitions():
+    if is_partitioned():
+        create_partitions(settings.OTP_PARTITION_DAYS_AHEAD)
+        drop_expired_partitions()
 
 
 @app.task
 def send_experiment_report_email():
     email = experiment_report_email()
     email.send()
+
+
+@app.task
+def fold_variation_counter_shards():
+    fold_counter_shards()
+
+
+@app.task
+def compact_experiment_stats():
+    compact_variation_stats(
+        settings.EXPERIMENT_STATS_HOURLY_RETENTION_DAYS,
+        settings.EXPERIMENT_STATS_RETENTION_DAYS,
+    )
+
+
+@app.task
+def recompute_experiment_bandit_weights():
+    recompute_bandit_weights()
+
+
+# Not wrapped in a transaction: the flush commits its own transaction before
+# releasing the Redis batch, which is what makes it safe to retry.
+@app.task(base=Task)
+def flush_experiment_tracking_buffer():
+    flush_buffered_events()
@@ -1,6 +1,11 @@
+import time
+from typing import NamedTuple
+
 from celery import Task
 from django.db import transaction
 
+from config.logger import logger
+
 
 class TransactionAtomicTask(Task):
     """
@@ -10,3 +15,64 @@ class TransactionAtomicTask(Task):
     def __call__(self, *args, **kwargs):
         with transaction.atomic():
             return super().__call__(*args, **kwargs)
+
+
+class DeleteProgress(NamedTuple):
+    deleted: int  # rows of the queryset's model deleted so far
+    batches: int
+    last_pk: object  # pass as start_after to resume
+    elapsed: float  # seconds
+
+
+def chunked_delete(queryset, batch_size, sleep=0, start_after=None, progress=None):
+    """
+    Delete the rows of ``queryset`` in primary key order, ``batch_size`` rows
+    per transaction, sleeping ``sleep`` seconds between batches.
+
+    Short batches keep locks brief and let replication and vacuum keep up,
+    where a single unbounded DELETE would hold locks and write the whole
+    table's WAL at once. Deletion can be interrupted at any point and resumed
+    by passing the last reported ``last_pk`` as ``start_after``.
+
+    Args:
+        queryset: The rows to delete. Related rows are cascaded as usual.
+        batch_size (int): Rows per batch.
+        sleep (float): Seconds to pause between batches.
+        start_after: Skip rows with a primary key up to and including this.
+        progress (callable): Called with a ``DeleteProgress`` after each batch.
+
+    Returns:
+        DeleteProgress: The totals once no rows are left.
+    """
+    label = queryset.model._meta.label
+    queryset = queryset.order_by("pk")
+    start = time.monotonic()
+    state = DeleteProgress(0, 0, start_after, 0.0)
+
+    while True:
+        batch = queryset
+        if state.last_pk is not None:
+            batch = batch.filter(pk__gt=state.last_pk)
+        pks = list(batch.values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            return state
+
+        with transaction.atomic():
+            _, deleted = queryset.filter(pk__in=pks).delete()
+        state = DeleteProgress(
+            state.deleted + deleted.get(label, 0),
+            state.batches + 1,
+            pks[-1],
+            time.monotonic() - start,
+        )
+        logger.info(
+            f"Deleted {state.deleted} {label} rows in {state.batches} batches "
+            f"({state.elapsed:.1f}s, last pk {state.last_pk})"
+        )
+        if progress:
+            progress(state)
+
+        if len(pks) < batch_size:
+            return state
+        if sleep:
+            time.sleep(sleep)